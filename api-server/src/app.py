@@ -10,37 +10,107 @@ Run:
 
 Endpoints:
     POST   /sessions                → Create a new recording session
-    GET    /sessions                → List all sessions
+    GET    /sessions                → List sessions (paged + filtered, see list_sessions)
     GET    /sessions/{id}           → Get session details
-    POST   /sessions/{id}/stop      → Stop recording + trigger analysis
+    POST   /sessions/{id}/stop      → Stop recording + queue analysis
+    GET    /sessions/{id}/jobs      → Analysis job progress
+    GET    /sessions/{id}/speaker-map → Diarization labels + their seller/customer roles
+    PUT    /sessions/{id}/speaker-map → Replace the roles and relabel transcript + timeline
     GET    /sessions/{id}/timeline   → Get merged timeline
     GET    /sessions/{id}/insights   → Get AI insights
+    GET    /sessions/{id}/live       → Server-Sent Events feed of new rows while recording
+    GET    /clients/{slug}           → A customer's meetings + insights + emotion series
+    GET    /search?q=                → Ranked transcript snippets across all sessions
+    GET    /analytics                → Per-period / per-customer aggregates of session rollups
+    GET    /metrics                  → Prometheus metrics (latency, DB timings, Claude tokens)
+    GET    /debug/profile            → Sampling profiler, folded stacks (PROFILER_ENABLED=1 only)
+    POST   /sessions/{id}/physiology:batch → Bulk physiology upload (column arrays)
+
+/timeline, /physiology and /transcript return a JSON array by default.
+Send `Accept: application/x-ndjson` to stream one JSON object per line
+instead (rows are read from the cursor as they're sent).
+
+/timeline, /physiology, /transcript and /insights send an ETag; repeat the
+request with `If-None-Match` to get a 304 if the session hasn't changed.
+Responses are gzipped when the client sends `Accept-Encoding: gzip`.
+
+/timeline, /physiology and /transcript take `from_ms`/`to_ms`/`limit` to
+read just a window of a long call (segments straddling an edge included).
+
+/physiology can also be sent as columnar binary for charts (Arrow IPC or
+packed float32, picked by Accept; see physio_binary).
 """
 
+import base64
+import hashlib
+import json
+import re
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Iterator, Literal, Optional
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
-from shared.config import API_HOST, API_PORT
+from shared.config import (
+    API_HOST, API_PORT, ANALYSIS_WORKERS, ANALYSIS_MAX_ATTEMPTS,
+    LIVE_POLL_INTERVAL_MS, LIVE_MOOD_WINDOW_MS,
+    SLOW_REQUEST_MS, PROFILER_ENABLED, PROFILER_MAX_SECONDS,
+)
+from shared import metrics
+from shared.models import PhysiologyBatch
 
-sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "sync-engine" / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "sync_engine" / "src"))
 import db_manager
-from timeline_builder import build_timeline
+import timeline_builder
+from timeline_builder import get_timeline, iter_timeline
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "insights-engine" / "src"))
 from analyzer import analyze_session
 
+from . import physio_binary
+from .ingest import BatchValidationError, validate_physiology_batch
+from .instrumentation import MetricsMiddleware, sample_stacks
+from .jobs import AnalysisWorkerPool
+from .live import LiveFeedHub
+
 
 # ─── App Setup ──────────────────────────────────────────────
 
+# Time every db_manager query and the timeline merge (see shared/metrics.py).
+# get_timeline/iter_timeline reach the merge through refresh_timeline.
+metrics.instrument_module(db_manager)
+metrics.instrument_module(timeline_builder, ["build_timeline", "refresh_timeline"])
+
+analysis_pool = AnalysisWorkerPool(
+    analyze_session,
+    workers=ANALYSIS_WORKERS,
+    max_attempts=ANALYSIS_MAX_ATTEMPTS,
+)
+
+
+live_hub = LiveFeedHub(LIVE_POLL_INTERVAL_MS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    analysis_pool.start()
+    yield
+    await live_hub.close()
+    analysis_pool.stop()
+    # Pooled SQLite connections (see db_manager.ConnectionManager)
+    db_manager.close_connections()
+
+
 app = FastAPI(
     title="SalesLens API",
     description="Sales conversation intelligence powered by Presage + ElevenLabs + Claude",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -49,8 +119,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# JSON bodies over 1 KB are gzipped for clients that accept it (the SSE
+# feed is left alone). Level 6: most of the size win for much less CPU than 9.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=6)
+
+# Outermost, so request timings include compression
+app.add_middleware(MetricsMiddleware, slow_request_ms=SLOW_REQUEST_MS)
+
 
 # ─── Request/Response Models ────────────────────────────────
 
@@ -62,6 +140,9 @@ class CreateSessionResponse(BaseModel):
     session_id: str
     message: str
 
+class SpeakerMapUpdate(BaseModel):
+    roles: dict[str, Literal["seller", "customer"]]    # diarization label -> role; others unmapped
+
 
 # ─── Session Endpoints ──────────────────────────────────────
 
@@ -78,10 +159,73 @@ def create_session(req: CreateSessionRequest):
     )
 
 
+MAX_SESSIONS_PAGE = 500
+
+# Largest `limit` accepted by the windowed /timeline, /physiology, /transcript reads.
+MAX_WINDOW_ROWS = 100_000
+
+
+def _encode_cursor(session: dict) -> str:
+    raw = json.dumps([session["start_time_ms"], session["session_id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[int, str]:
+    try:
+        start_time_ms, session_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(start_time_ms), str(session_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @app.get("/sessions")
-def list_sessions():
-    """List all sessions, newest first."""
-    return db_manager.list_sessions()
+def list_sessions(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_SESSIONS_PAGE),
+    cursor: Optional[str] = None,
+    status: Optional[list[str]] = Query(None),
+    customer: Optional[str] = None,
+    since_ms: Optional[int] = None,
+    until_ms: Optional[int] = None,
+    fields: Optional[str] = None,
+):
+    """
+    List sessions, newest first.
+
+    Paged with `limit`; when there are more, the X-Next-Cursor header holds
+    the `cursor` for the next page. Filters: `status` (repeatable),
+    `customer` (exact name, case-insensitive), `since_ms`/`until_ms` on
+    start_time_ms (since_ms <= start < until_ms).
+    `fields=session_id,customer_name,...` returns only those columns (e.g.
+    skip notes in list views). Without `limit`, everything matching is
+    returned.
+    """
+    selected = db_manager.SESSION_FIELDS
+    if fields:
+        requested = tuple(f.strip() for f in fields.split(",") if f.strip())
+        unknown = set(requested) - set(db_manager.SESSION_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(sorted(unknown))}")
+        # The cursor needs the sort key, so it's always read (and dropped below if not asked for).
+        selected = tuple(dict.fromkeys(("start_time_ms", "session_id") + requested))
+
+    rows = db_manager.list_sessions(
+        limit=limit + 1 if limit else None,
+        after=_decode_cursor(cursor) if cursor else None,
+        statuses=status,
+        customer=customer,
+        since_ms=since_ms,
+        until_ms=until_ms,
+        fields=selected,
+    )
+
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1])
+
+    if fields:
+        rows = [{f: row[f] for f in requested} for row in rows]
+    return rows
 
 
 @app.get("/sessions/{session_id}")
@@ -93,56 +237,410 @@ def get_session(session_id: str):
     return session
 
 
-@app.post("/sessions/{session_id}/stop")
+@app.post("/sessions/{session_id}/stop", status_code=202)
 def stop_session(session_id: str):
-    """Stop a recording session and trigger AI analysis."""
+    """Stop a recording session and queue AI analysis. Poll /sessions/{id}/jobs for progress."""
     session = db_manager.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    # Mark session as completed
-    db_manager.stop_session(session_id)
+    # Fold in any physiology that didn't come through /physiology:batch
+    db_manager.update_mood_timeseries(db_manager.DB_PATH, session_id, LIVE_MOOD_WINDOW_MS)
 
-    # Trigger AI analysis
-    db_manager.update_session_status(session_id, "analyzing")
-    try:
-        result = analyze_session(session_id)
-        if "error" in result:
-            db_manager.update_session_status(session_id, "error")
-            return {"status": "error", "detail": result["error"]}
-        return {"status": "analyzed", "score": result.get("overall_score")}
-    except Exception as e:
-        db_manager.update_session_status(session_id, "error")
-        return {"status": "error", "detail": str(e)}
+    # Mark session as completed + queue the job (one transaction); the worker
+    # pool moves it to analyzing/analyzed/error
+    job = analysis_pool.enqueue(session_id, stop_session=True)
+    return {"status": "queued", "job_id": job["id"]}
+
+
+@app.get("/sessions/{session_id}/jobs")
+def get_jobs(session_id: str):
+    """Analysis jobs for a session (newest first) with their status and queue position."""
+    session = db_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return db_manager.get_analysis_jobs_for_session(session_id)
+
+
+@app.get("/sessions/{session_id}/speaker-map")
+def get_speaker_map(session_id: str):
+    """Diarization labels in the transcript, with segment counts and mapped role (null if unmapped)."""
+    session = db_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return db_manager.get_speaker_map(session_id)
+
+
+@app.put("/sessions/{session_id}/speaker-map")
+def put_speaker_map(session_id: str, update: SpeakerMapUpdate):
+    """
+    Replace the session's label -> role map and relabel its transcript and
+    timeline in one transaction (a fixed number of statements, however long
+    the call). Returns the new map and how many segments changed speaker.
+    """
+    session = db_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    relabelled = db_manager.set_speaker_map(session_id, update.roles)
+    return {"relabelled": relabelled, "labels": db_manager.get_speaker_map(session_id)}
+
+
+# ─── Streaming ──────────────────────────────────────────────
+
+NDJSON = "application/x-ndjson"
+NDJSON_LINES_PER_CHUNK = 500    # Rows batched into each write to the socket
+
+
+def _wants_ndjson(request: Request) -> bool:
+    return NDJSON in request.headers.get("accept", "")
+
+
+def _ndjson_response(rows: Iterator[dict], headers: dict | None = None) -> StreamingResponse:
+    def lines():
+        chunk = []
+        for row in rows:
+            chunk.append(json.dumps(row, ensure_ascii=False))
+            if len(chunk) >= NDJSON_LINES_PER_CHUNK:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON, headers=headers)
+
+
+# ─── Conditional GET ────────────────────────────────────────
+# /timeline, /physiology, /transcript and /insights carry an ETag built from
+# db_manager.get_session_version. A matching If-None-Match gets a 304 before
+# any timeline merge or data read happens; finished sessions never change,
+# so after the first load the dashboard only pays for one indexed lookup.
+
+def _session_etag(request: Request, session_id: str, resource: str) -> str | None:
+    """None for an unknown session: nothing to validate against, so it's served uncached."""
+    version = db_manager.get_session_version(session_id)
+    if version is None:
+        return None
+    accept = request.headers.get("accept", "")
+    representation = physio_binary.binary_format(accept) or (NDJSON if NDJSON in accept else "json")
+    digest = hashlib.sha1(f"{resource}|{representation}|{version}".encode()).hexdigest()[:20]
+    # Weak: the same data may be sent gzipped or not
+    return f'W/"{digest}"'
+
+
+def _time_window(from_ms: int | None, to_ms: int | None, limit: int | None) -> dict:
+    """from_ms/to_ms/limit query params as db_manager kwargs (empty = whole session)."""
+    if from_ms is not None and to_ms is not None and from_ms > to_ms:
+        raise HTTPException(status_code=400, detail="from_ms must be <= to_ms")
+    return {"from_ms": from_ms, "to_ms": to_ms, "limit": limit}
+
+
+def _window_key(window: dict) -> str:
+    return f"{window['from_ms']}:{window['to_ms']}:{window['limit']}"
+
+
+def _cache_headers(etag: str | None) -> dict:
+    if etag is None:
+        return {}
+    # no-cache = the browser may keep it but must revalidate (cheap 304) each time
+    return {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept, Accept-Encoding"}
+
+
+def _not_modified(request: Request, etag: str | None) -> Response | None:
+    header = request.headers.get("if-none-match")
+    if not header or etag is None:
+        return None
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    if "*" in tags or etag.removeprefix("W/") in tags:
+        return Response(status_code=304, headers=_cache_headers(etag))
+    return None
 
 
 # ─── Data Endpoints ─────────────────────────────────────────
 
 @app.get("/sessions/{session_id}/timeline")
-def get_timeline(session_id: str):
-    """Get the merged timeline (transcript + physiology) for a session."""
+def get_session_timeline(
+    session_id: str,
+    request: Request,
+    response: Response,
+    from_ms: Optional[int] = None,
+    to_ms: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_WINDOW_ROWS),
+):
+    """
+    Get the merged timeline (transcript + physiology) for a session.
+    `from_ms`/`to_ms` return only entries overlapping that window, `limit` the first N.
+    """
+    window = _time_window(from_ms, to_ms, limit)
+    etag = _session_etag(request, session_id, f"timeline|{_window_key(window)}")
+    if cached := _not_modified(request, etag):
+        return cached
+
+    session = db_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if _wants_ndjson(request):
+        return _ndjson_response(iter_timeline(session_id, session, **window), _cache_headers(etag))
+    response.headers.update(_cache_headers(etag))
+    return get_timeline(session_id, session, **window)
+
+
+@app.get("/sessions/{session_id}/live")
+def get_live_feed(session_id: str, request: Request):
+    """Push new physiology / transcript / mood rows as they land (text/event-stream)."""
     session = db_manager.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    return build_timeline(session_id)
+    return StreamingResponse(
+        live_hub.stream(session_id, request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/sessions/{session_id}/insights")
-def get_insights(session_id: str):
+def get_insights(session_id: str, request: Request, response: Response):
     """Get AI-generated insights for a session."""
+    etag = _session_etag(request, session_id, "insights")
+    if cached := _not_modified(request, etag):
+        return cached
+    response.headers.update(_cache_headers(etag))
     return db_manager.get_insights_for_session(session_id)
 
 
 @app.get("/sessions/{session_id}/physiology")
-def get_physiology(session_id: str):
-    """Get raw physiology data for a session (for charts)."""
-    return db_manager.get_physiology_for_session(session_id)
+def get_physiology(
+    session_id: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    from_ms: Optional[int] = None,
+    to_ms: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_WINDOW_ROWS),
+):
+    """
+    Get raw physiology data for a session (for charts).
+    `from_ms`/`to_ms` (inclusive) and `limit` return just that slice.
+
+    With `Accept: application/vnd.apache.arrow.stream` or
+    `application/x-saleslens-physio-f32` the response is columnar binary
+    (see physio_binary) holding timestamp_ms plus `fields=heart_rate,...`
+    (default: every numeric column).
+    """
+    window = _time_window(from_ms, to_ms, limit)
+    media_type = physio_binary.binary_format(request.headers.get("accept", ""))
+    if media_type:
+        selected = list(db_manager.PHYSIOLOGY_COLUMNS)
+        if fields:
+            selected = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+            unknown = set(selected) - set(db_manager.PHYSIOLOGY_COLUMNS)
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(sorted(unknown))}")
+        if media_type == physio_binary.ARROW_STREAM and not physio_binary.arrow_available():
+            raise HTTPException(status_code=406, detail=f"Arrow is not available; use {physio_binary.PACKED_F32}")
+
+        etag = _session_etag(request, session_id, f"physiology|{_window_key(window)}|{','.join(selected)}")
+        if cached := _not_modified(request, etag):
+            return cached
+        timestamps, values = db_manager.get_physiology_columns(
+            session_id, selected, start_ms=from_ms, end_ms=to_ms, limit=limit
+        )
+        encode = physio_binary.encode_arrow if media_type == physio_binary.ARROW_STREAM else physio_binary.encode_packed
+        return Response(encode(timestamps, values, selected), media_type=media_type, headers=_cache_headers(etag))
+
+    etag = _session_etag(request, session_id, f"physiology|{_window_key(window)}")
+    if cached := _not_modified(request, etag):
+        return cached
+    if _wants_ndjson(request):
+        return _ndjson_response(db_manager.iter_physiology_for_session(session_id, **window), _cache_headers(etag))
+    response.headers.update(_cache_headers(etag))
+    return db_manager.get_physiology_for_session(session_id, **window)
+
+
+@app.post("/sessions/{session_id}/physiology:batch", status_code=201)
+def ingest_physiology_batch(session_id: str, batch: PhysiologyBatch):
+    """
+    Bulk physiology upload. One timestamp_ms array plus one array per field,
+    validated as whole columns and written in a single transaction, together
+    with the mood windows they land in (what the live feed shows).
+    """
+    session = db_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    try:
+        columns = validate_physiology_batch(batch)
+    except BatchValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors)
+
+    with db_manager.transaction():
+        inserted = db_manager.insert_physiology_batch(session_id, batch.timestamp_ms, columns)
+        db_manager.update_mood_timeseries(db_manager.DB_PATH, session_id, LIVE_MOOD_WINDOW_MS)
+    return {"session_id": session_id, "inserted": inserted}
 
 
 @app.get("/sessions/{session_id}/transcript")
-def get_transcript(session_id: str):
-    """Get raw transcript for a session."""
-    return db_manager.get_transcript_for_session(session_id)
+def get_transcript(
+    session_id: str,
+    request: Request,
+    response: Response,
+    from_ms: Optional[int] = None,
+    to_ms: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_WINDOW_ROWS),
+):
+    """
+    Get raw transcript for a session.
+    `from_ms`/`to_ms` return only segments overlapping that window (including
+    ones that start before it or run past it), `limit` the first N.
+    """
+    window = _time_window(from_ms, to_ms, limit)
+    etag = _session_etag(request, session_id, f"transcript|{_window_key(window)}")
+    if cached := _not_modified(request, etag):
+        return cached
+    if _wants_ndjson(request):
+        return _ndjson_response(db_manager.iter_transcript_for_session(session_id, **window), _cache_headers(etag))
+    response.headers.update(_cache_headers(etag))
+    return db_manager.get_transcript_for_session(session_id, **window)
+
+
+# ─── Client Endpoints ───────────────────────────────────────
+
+UNKNOWN_CLIENT = "Unknown Client"       # Dashboard name for sessions without customer_name
+CLIENT_EMOTION_POINTS = 120             # Emotion series length per meeting in /clients/{slug}
+
+
+def _client_slug(name: str | None) -> str:
+    """Client id used by /clients and /clients/{slug}: lowercased, non-alphanumeric runs as '-'."""
+    return re.sub(r"[^a-z0-9]+", "-", (name or UNKNOWN_CLIENT).lower())
+
+
+def _group_by_session(rows: list[dict]) -> dict[str, list[dict]]:
+    grouped: dict[str, list[dict]] = {}
+    for row in rows:
+        grouped.setdefault(row.pop("session_id"), []).append(row)
+    return grouped
+
+
+@app.get("/clients")
+def list_clients():
+    """
+    Every client for the clients list, most recently met first: meeting
+    count, successful meetings, current streak and last meeting, aggregated
+    in SQL. `id` is the slug /clients/{slug} takes.
+    """
+    names = db_manager.list_customer_names()
+    display: dict[str, str] = {}
+    for name in names:
+        display.setdefault(_client_slug(name), name or UNKNOWN_CLIENT)
+
+    summaries = db_manager.get_customer_summaries([(name, _client_slug(name)) for name in names])
+    return [{"id": s["group"], "name": display[s["group"]], **{k: v for k, v in s.items() if k != "group"}}
+            for s in summaries]
+
+
+@app.get("/clients/{slug}")
+def get_client(slug: str):
+    """
+    One customer's profile in one response: every meeting (newest first)
+    with its insights, transcript and a downsampled emotion/engagement series.
+    `slug` is the dashboard's slug of customer_name.
+    """
+    names = [n for n in db_manager.list_customer_names() if _client_slug(n) == slug]
+    sessions = db_manager.get_sessions_for_customers(names) if names else []
+    if not sessions:
+        raise HTTPException(status_code=404, detail="Client not found")
+
+    session_ids = [s["session_id"] for s in sessions]
+    insights = _group_by_session(db_manager.get_insights_for_sessions(session_ids))
+    transcripts = _group_by_session(db_manager.get_transcripts_for_sessions(session_ids))
+    emotions = _group_by_session(db_manager.get_emotion_series_for_sessions(session_ids, CLIENT_EMOTION_POINTS))
+
+    return {
+        "id": slug,
+        "name": sessions[0]["customer_name"] or UNKNOWN_CLIENT,
+        "meetings": [
+            {
+                **s,
+                "insights": insights.get(s["session_id"], []),
+                "transcript": transcripts.get(s["session_id"], []),
+                "emotions": emotions.get(s["session_id"], []),
+            }
+            for s in sessions
+        ],
+    }
+
+
+# ─── Analytics ──────────────────────────────────────────────
+
+@app.get("/analytics")
+def get_analytics(
+    group_by: str = "month",
+    customer: Optional[str] = None,
+    since_ms: Optional[int] = None,
+    until_ms: Optional[int] = None,
+):
+    """
+    Cross-session summary from the per-session rollups (session_stats),
+    one row per group: `group_by` = day | week | month | quarter | year
+    (UTC, by session start) or customer. Each row has session count,
+    talk time and seller talk ratio, engagement / emotion mean-min-max,
+    heart-rate mean and peak, and mean analysis score. Filters: `customer`
+    (exact name, case-insensitive) and `since_ms`/`until_ms` on the session's
+    start time (since_ms <= start < until_ms).
+    """
+    if group_by not in db_manager.ANALYTICS_GROUPS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by must be one of: {', '.join(db_manager.ANALYTICS_GROUPS)}",
+        )
+    return db_manager.get_analytics(group_by, customer=customer, since_ms=since_ms, until_ms=until_ms)
+
+
+# ─── Search ─────────────────────────────────────────────────
+
+MAX_SEARCH_RESULTS = 100
+
+
+@app.get("/search")
+def search(
+    q: str = Query(..., min_length=1),
+    customer: Optional[str] = None,
+    since_ms: Optional[int] = None,
+    until_ms: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS),
+):
+    """
+    Full-text search over every transcript, best match first.
+
+    `q` is plain words (all must match); "quoted words" match as a phrase and
+    a trailing * as a prefix. Filters: `customer` (exact name,
+    case-insensitive) and `since_ms`/`until_ms` on the session's start time
+    (since_ms <= start < until_ms). Each hit has the session, customer, speaker, segment times and a snippet
+    with the matched words in [brackets].
+    """
+    return db_manager.search_transcripts(
+        q, customer=customer, since_ms=since_ms, until_ms=until_ms, limit=limit
+    )
+
+
+# ─── Metrics ────────────────────────────────────────────────
+
+@app.get("/metrics")
+def get_metrics():
+    """Request latency, per-query DB timings and row counts, Claude latency and tokens (Prometheus text)."""
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+if PROFILER_ENABLED:
+    @app.get("/debug/profile")
+    def profile(
+        seconds: float = Query(10, gt=0, le=PROFILER_MAX_SECONDS),
+        interval_ms: float = Query(10, ge=1, le=1000),
+    ):
+        """
+        Sample every thread's stack for `seconds` and return folded stacks
+        (for flamegraph.pl / speedscope). Run it while reproducing a slow request.
+        """
+        return Response(sample_stacks(seconds, interval_ms / 1000), media_type="text/plain")
 
 
 # ─── Health Check ───────────────────────────────────────────
@@ -0,0 +1,106 @@
+"""
+api-server/src/ingest.py — Validation for bulk physiology uploads.
+
+POST /sessions/{id}/physiology:batch takes columns, not rows (see
+shared.models.PhysiologyBatch). Instead of building a PhysiologyEvent per
+sample, each column is turned into one NumPy array and checked in a single
+pass: equal lengths, finite values, and the ranges documented on
+PhysiologyEvent. Nulls are allowed everywhere except timestamp_ms.
+
+The first bad sample of each failing check is reported with its index, so
+a capture client can tell which reading to look at.
+"""
+
+import numpy as np
+
+from shared.models import PhysiologyBatch
+
+# Inclusive (min, max) per field; None = unbounded on that side.
+FIELD_RANGES: dict[str, tuple[float | None, float | None]] = {
+    "heart_rate": (0.0, None),
+    "hrv": (0.0, None),
+    "breathing_rate": (0.0, None),
+    "phasic": (None, None),
+    "emotion_score": (-1.0, 1.0),
+    "engagement": (0.0, 1.0),
+    "blink_rate": (0.0, None),
+}
+
+# Largest batch accepted in one request.
+MAX_BATCH_ROWS = 100_000
+
+
+class BatchValidationError(ValueError):
+    """Batch rejected; `errors` is a list of {field, index, message}."""
+
+    def __init__(self, errors: list[dict]):
+        super().__init__("; ".join(f"{e['field']}[{e['index']}]: {e['message']}" for e in errors))
+        self.errors = errors
+
+
+def _first(mask: np.ndarray) -> int:
+    return int(np.flatnonzero(mask)[0])
+
+
+def validate_physiology_batch(batch: PhysiologyBatch) -> dict[str, list]:
+    """
+    Check a batch and return the present columns ready for
+    db_manager.insert_physiology_batch (original lists, None kept as NULL).
+    Raises BatchValidationError listing every failing field.
+    """
+    n = len(batch.timestamp_ms)
+    if n == 0:
+        raise BatchValidationError([{"field": "timestamp_ms", "index": 0, "message": "batch is empty"}])
+    if n > MAX_BATCH_ROWS:
+        raise BatchValidationError([{
+            "field": "timestamp_ms", "index": MAX_BATCH_ROWS,
+            "message": f"batch has {n} rows, max is {MAX_BATCH_ROWS}",
+        }])
+
+    errors = []
+    timestamps = np.asarray(batch.timestamp_ms, dtype=np.int64)
+    if (timestamps < 0).any():
+        errors.append({"field": "timestamp_ms", "index": _first(timestamps < 0), "message": "must be >= 0"})
+
+    columns: dict[str, list] = {}
+    for field, (lo, hi) in FIELD_RANGES.items():
+        values = getattr(batch, field)
+        if values is None:
+            continue
+        if len(values) != n:
+            errors.append({
+                "field": field, "index": min(len(values), n),
+                "message": f"has {len(values)} values, timestamp_ms has {n}",
+            })
+            continue
+
+        # None -> NaN, so nulls drop out of every comparison below
+        arr = np.asarray(values, dtype=np.float64)
+        present = ~np.isnan(arr)
+        bad = np.isinf(arr)
+        if lo is not None:
+            bad |= present & (arr < lo)
+        if hi is not None:
+            bad |= present & (arr > hi)
+        if bad.any():
+            i = _first(bad)
+            errors.append({
+                "field": field, "index": i,
+                "message": f"{values[i]} outside [{lo if lo is not None else '-inf'}, {hi if hi is not None else 'inf'}]",
+            })
+            continue
+        columns[field] = values
+
+    if batch.is_talking is not None:
+        if len(batch.is_talking) != n:
+            errors.append({
+                "field": "is_talking", "index": min(len(batch.is_talking), n),
+                "message": f"has {len(batch.is_talking)} values, timestamp_ms has {n}",
+            })
+        else:
+            columns["is_talking"] = [None if v is None else int(v) for v in batch.is_talking]
+
+    if errors:
+        raise BatchValidationError(errors)
+
+    return columns
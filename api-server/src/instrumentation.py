@@ -0,0 +1,105 @@
+"""
+api-server/src/instrumentation.py — Request timing middleware and an on-demand sampling profiler.
+
+MetricsMiddleware times every request from arrival to its last body byte
+(so streamed NDJSON is measured in full), labelled by route template, not
+raw path. It also opens a metrics.RequestTimings for the request, so the
+time spent in db_manager and in the timeline merge is split out per route
+(saleslens_http_request_phase_seconds). Requests slower than
+SLOW_REQUEST_MS are counted and logged with that breakdown.
+
+sample_stacks() is the profiler behind GET /debug/profile (only mounted
+when PROFILER_ENABLED=1): it samples every thread's Python stack at a fixed
+interval and returns folded stacks ("frame;frame;frame count" lines), which
+flamegraph.pl and speedscope read directly. Start it, reproduce the slow
+request, and look at where the samples pile up.
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+
+from shared import metrics
+
+log = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (a BaseHTTPMiddleware would buffer streaming responses)."""
+
+    def __init__(self, app, slow_request_ms: int):
+        self.app = app
+        self.slow_request_s = slow_request_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = metrics.RequestTimings()
+        token = metrics.current_request.set(timings)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.HTTP_IN_FLIGHT.dec()
+            metrics.current_request.reset(token)
+            self._record(scope, status, elapsed, timings)
+
+    def _record(self, scope, status: int, elapsed: float, timings: metrics.RequestTimings):
+        route = scope.get("route")
+        # Unmatched paths share one label so scanners can't blow up the series count
+        route = getattr(route, "path", None) or "unmatched"
+        metrics.HTTP_REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route, status=status)
+
+        other = max(0.0, elapsed - timings.db - timings.timeline_merge)
+        metrics.HTTP_PHASE_SECONDS.observe(timings.db, route=route, phase="db")
+        metrics.HTTP_PHASE_SECONDS.observe(timings.timeline_merge, route=route, phase="timeline_merge")
+        metrics.HTTP_PHASE_SECONDS.observe(other, route=route, phase="other")
+
+        if elapsed >= self.slow_request_s:
+            metrics.SLOW_REQUESTS.inc(route=route)
+            log.warning(
+                "slow request: %s %s -> %s in %.0f ms (db %.0f ms, timeline merge %.0f ms, other %.0f ms)",
+                scope["method"], scope["path"], status, elapsed * 1000,
+                timings.db * 1000, timings.timeline_merge * 1000, other * 1000,
+            )
+
+
+# ─── Sampling Profiler ──────────────────────────────────────
+
+def _folded(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def sample_stacks(seconds: float, interval_s: float) -> str:
+    """Sample all threads (except this one) for `seconds`; folded stacks, most frequent first."""
+    me = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    counts: Counter[str] = Counter()
+
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident != me:
+                counts[f"{names.get(ident, ident)};{_folded(frame)}"] += 1
+        time.sleep(interval_s)
+
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
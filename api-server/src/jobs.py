@@ -0,0 +1,115 @@
+"""
+api-server/src/jobs.py — Background worker pool for session analysis.
+
+POST /sessions/{id}/stop used to run the whole Claude analysis inside the
+HTTP request. Now it only writes a row to `analysis_jobs` and returns; a
+fixed number of worker threads pull pending jobs from SQLite and run them.
+
+Because the queue IS the table, nothing is lost on restart: jobs that were
+'running' when the process died are put back to 'pending' on startup
+(up to ANALYSIS_MAX_ATTEMPTS), and the workers pick them up again.
+
+Session status transitions:
+    completed → analyzing   (worker picks the job up)
+    analyzing → analyzed    (set by analyze_session on success, in the same
+                             transaction as its insights and the job's 'done')
+    analyzing → error       (analyze_session returned an error or raised)
+
+A database error in a worker (e.g. "database is locked") is logged and the
+worker backs off and carries on; it never takes the thread down. A job whose
+bookkeeping failed that way stays 'running' and is resumed on next start.
+"""
+
+import logging
+import threading
+from typing import Callable
+
+import db_manager
+
+log = logging.getLogger(__name__)
+
+
+class AnalysisWorkerPool:
+    """Fixed-size pool of threads draining the analysis_jobs table."""
+
+    # How long an idle worker sleeps before re-checking the table on its own
+    # (covers jobs enqueued by another process).
+    IDLE_POLL_SECONDS = 5.0
+    # Backoff after an unexpected error in the worker loop, doubled per
+    # consecutive failure up to the max.
+    ERROR_BACKOFF_SECONDS = 0.5
+    ERROR_BACKOFF_MAX_SECONDS = 30.0
+
+    def __init__(self, analyze: Callable[..., dict], workers: int, max_attempts: int):
+        """analyze(session_id, job_id=...) saves the result and finishes the job itself."""
+        self._analyze = analyze
+        self._workers = max(1, workers)
+        self._max_attempts = max_attempts
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self):
+        self._stopping.clear()
+        requeued = db_manager.requeue_interrupted_analysis_jobs(self._max_attempts)
+        if requeued:
+            log.info("Resuming %d interrupted analysis job(s)", requeued)
+
+        for i in range(self._workers):
+            t = threading.Thread(target=self._run, name=f"analysis-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop taking new jobs. A job mid-analysis is left 'running' and resumed on next start."""
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def enqueue(self, session_id: str, stop_session: bool = False) -> dict:
+        """
+        Queue analysis for a session. stop_session=True also marks the
+        recording finished, in the same transaction, so a crash can't leave a
+        stopped session without a job.
+        """
+        with db_manager.transaction():
+            if stop_session:
+                db_manager.stop_session(session_id)
+            job = db_manager.enqueue_analysis_job(session_id)
+        with self._wakeup:
+            self._wakeup.notify()
+        return job
+
+    def _run(self):
+        backoff = self.ERROR_BACKOFF_SECONDS
+        while not self._stopping.is_set():
+            try:
+                job = db_manager.claim_next_analysis_job()
+                if job is None:
+                    with self._wakeup:
+                        self._wakeup.wait(self.IDLE_POLL_SECONDS)
+                    continue
+                self._process(job)
+                backoff = self.ERROR_BACKOFF_SECONDS
+            except Exception:
+                log.exception("Analysis worker error; retrying in %.1f s", backoff)
+                self._stopping.wait(backoff)
+                backoff = min(backoff * 2, self.ERROR_BACKOFF_MAX_SECONDS)
+
+    def _process(self, job: dict):
+        session_id = job["session_id"]
+        db_manager.update_session_status(session_id, "analyzing")
+
+        try:
+            result = self._analyze(session_id, job_id=job["id"])
+        except Exception as e:
+            log.exception("Analysis failed for session %s", session_id)
+            result = {"error": str(e)}
+
+        if "error" in result:
+            with db_manager.transaction():
+                db_manager.finish_analysis_job(job["id"], "error", error=result["error"])
+                db_manager.update_session_status(session_id, "error")
@@ -0,0 +1,195 @@
+"""
+api-server/src/live.py — Server-Sent Events feed for sessions being recorded.
+
+GET /sessions/{id}/live pushes new physiology_events, transcript_segments
+and mood_timeseries rows as they land, so the dashboard doesn't have to
+re-read everything on a poll.
+
+Reads are coalesced: a single poller runs every LIVE_POLL_INTERVAL_MS for
+the whole server. It first asks SQLite whether anything was committed at
+all (PRAGMA data_version); only then does it query, once per watched
+session, the rows past that session's id watermarks, and fans them out to
+every viewer. 1 viewer or 500, the DB sees the same reads.
+
+Wire format (one SSE event per table per tick):
+
+    id: <physiology id>:<transcript id>:<mood id>
+    event: physiology | transcript | mood
+    data: [ {row}, ... ]
+
+The feed only reads. Mood windows are kept current on the write path (the
+physiology ingest endpoint) and rewritten in place as they fill, so a mood
+row for a window_start_ms that was already sent replaces the earlier one. Clients
+that reconnect with Last-Event-ID get everything after those ids first;
+hub events overlapping that replay are trimmed to the rows it didn't send.
+"""
+
+import asyncio
+import json
+import logging
+from typing import AsyncIterator
+
+import db_manager
+
+log = logging.getLogger(__name__)
+
+
+class _Subscriber:
+    def __init__(self, max_pending: int):
+        # (event, rows, watermarks after the tick, formatted message)
+        self.queue: asyncio.Queue[tuple[str, list, dict, str]] = asyncio.Queue(maxsize=max_pending)
+        self.dropped = False
+
+
+def _event_id(watermarks: dict) -> str:
+    return ":".join(str(watermarks[event]) for event in db_manager.LIVE_TABLES)
+
+
+def _parse_event_id(value: str | None) -> dict | None:
+    if not value:
+        return None
+    try:
+        ids = [int(part) for part in value.split(":")]
+    except ValueError:
+        return None
+    if len(ids) != len(db_manager.LIVE_TABLES):
+        return None
+    return dict(zip(db_manager.LIVE_TABLES, ids))
+
+
+def _format_event(event: str, batch: list, watermarks: dict) -> str:
+    return f"id: {_event_id(watermarks)}\nevent: {event}\ndata: {json.dumps(batch, ensure_ascii=False)}\n\n"
+
+
+def _format_events(rows: dict, watermarks: dict) -> list[str]:
+    return [_format_event(event, batch, watermarks) for event, batch in rows.items() if batch]
+
+
+def _skip_replayed(event: str, batch: list, watermarks: dict, message: str, replayed: dict) -> str | None:
+    """
+    A hub event as it should reach a viewer that was just sent everything up
+    to `replayed` (Last-Event-ID resume): None if the replay covered all of
+    it, otherwise only the newer rows, with an id that doesn't go backwards.
+    """
+    fresh = [row for row in batch if row["id"] > replayed[event]]
+    if not fresh:
+        return None
+    if len(fresh) == len(batch) and all(watermarks[e] >= replayed[e] for e in replayed):
+        return message
+    return _format_event(event, fresh, {e: max(watermarks[e], replayed[e]) for e in replayed})
+
+
+class LiveFeedHub:
+    """One poller for all live viewers; fans new rows out per session."""
+
+    HEARTBEAT_SECONDS = 15.0    # SSE comment so proxies don't drop idle streams
+    MAX_PENDING_EVENTS = 256    # Per viewer; a viewer this far behind is disconnected
+
+    def __init__(self, poll_interval_ms: int):
+        self._interval = poll_interval_ms / 1000
+        self._subscribers: dict[str, set[_Subscriber]] = {}
+        self._watermarks: dict[str, dict] = {}
+        self._task: asyncio.Task | None = None
+        self._detector: db_manager.ChangeDetector | None = None
+
+    async def stream(self, session_id: str, last_event_id: str | None = None) -> AsyncIterator[str]:
+        sub = _Subscriber(self.MAX_PENDING_EVENTS)
+        await self._join(session_id, sub)
+        try:
+            replayed = None
+            resume_from = _parse_event_id(last_event_id)
+            if resume_from:
+                rows = await asyncio.to_thread(db_manager.get_live_rows_after, session_id, resume_from)
+                # The hub pushes from its own watermarks, which may be behind what was just read
+                replayed = {
+                    event: max([resume_from[event], *(row["id"] for row in rows[event][-1:])])
+                    for event in db_manager.LIVE_TABLES
+                }
+                for message in _format_events(rows, replayed):
+                    yield message
+
+            while not sub.dropped:
+                try:
+                    event, batch, watermarks, message = await asyncio.wait_for(
+                        sub.queue.get(), self.HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if replayed:
+                    message = _skip_replayed(event, batch, watermarks, message, replayed)
+                    if all(watermarks[e] >= replayed[e] for e in replayed):
+                        replayed = None     # hub has caught up; nothing left to skip
+                    if message is None:
+                        continue
+                yield message
+        finally:
+            self._leave(session_id, sub)
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._detector:
+            self._detector.close()
+            self._detector = None
+
+    async def _join(self, session_id: str, sub: _Subscriber):
+        if session_id not in self._watermarks:
+            self._watermarks[session_id] = await asyncio.to_thread(db_manager.get_live_watermarks, session_id)
+        self._subscribers.setdefault(session_id, set()).add(sub)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll_loop())
+
+    def _leave(self, session_id: str, sub: _Subscriber):
+        subs = self._subscribers.get(session_id)
+        if subs is None:
+            return
+        subs.discard(sub)
+        if not subs:
+            del self._subscribers[session_id]
+            self._watermarks.pop(session_id, None)
+
+    async def _poll_loop(self):
+        if self._detector is None:
+            self._detector = db_manager.ChangeDetector()
+            await asyncio.to_thread(self._detector.changed)    # baseline
+
+        while self._subscribers:
+            await asyncio.sleep(self._interval)
+            try:
+                if await asyncio.to_thread(self._detector.changed):
+                    for session_id in list(self._subscribers):
+                        await self._poll_session(session_id)
+            except Exception:
+                log.exception("Live feed poll failed")
+
+    async def _poll_session(self, session_id: str):
+        watermarks = self._watermarks.get(session_id)
+        if watermarks is None:
+            return
+
+        rows = await asyncio.to_thread(db_manager.get_live_rows_after, session_id, watermarks)
+
+        for event, batch in rows.items():
+            if batch:
+                watermarks[event] = batch[-1]["id"]
+
+        snapshot = dict(watermarks)
+        events = [(event, batch, snapshot, _format_event(event, batch, snapshot))
+                  for event, batch in rows.items() if batch]
+        if not events:
+            return
+
+        for sub in list(self._subscribers.get(session_id, ())):
+            for item in events:
+                try:
+                    sub.queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    # Too far behind: drop it; the client reconnects with Last-Event-ID.
+                    sub.dropped = True
+                    break
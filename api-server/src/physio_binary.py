@@ -0,0 +1,92 @@
+"""
+api-server/src/physio_binary.py — Binary encodings of physiology columns for charts.
+
+GET /sessions/{id}/physiology as JSON repeats every key (and raw_json) once
+per second of data. For charts the dashboard only needs a few numeric
+columns, so two columnar formats are offered, chosen by the Accept header.
+Both are built straight from db_manager.get_physiology_columns (one NumPy
+array per column, no per-row dicts).
+
+Arrow IPC stream — `Accept: application/vnd.apache.arrow.stream`
+    One record batch: timestamp_ms (int64) + one float32 column per field,
+    NULL readings as nulls. Needs pyarrow on the server; without it the
+    endpoint answers 406.
+
+Packed float32 — `Accept: application/x-saleslens-physio-f32`
+    All integers little-endian, no dependencies on either side:
+
+        offset  size       contents
+        0       4          magic b"SLPF"
+        4       2          format version (1)
+        6       2          k = number of fields
+        8       4          n = number of rows
+        12      8          base_ms (int64): timestamp of the first row, 0 if n == 0
+        20      ...        k field names, each: uint8 length + ASCII bytes
+        ...     0-3        zero padding to a multiple of 4
+        H       4 * n      uint32 offsets: timestamp_ms - base_ms
+        H+4n    4 * n * k  k float32 columns of n values, in field order;
+                           NULL readings are NaN
+
+    Every array starts on a 4-byte boundary, so a browser can wrap them in
+    Uint32Array / Float32Array views without copying.
+"""
+
+import struct
+
+import numpy as np
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PACKED_F32 = "application/x-saleslens-physio-f32"
+
+PACKED_MAGIC = b"SLPF"
+PACKED_VERSION = 1
+
+
+def binary_format(accept: str) -> str | None:
+    """The binary media type requested by an Accept header, or None for JSON/NDJSON."""
+    for media_type in (PACKED_F32, ARROW_STREAM):
+        if media_type in accept:
+            return media_type
+    return None
+
+
+def arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def encode_packed(timestamps: np.ndarray, values: np.ndarray, fields: list[str]) -> bytes:
+    """timestamps: int64[n]; values: float64[n, k] with NaN for NULL (see get_physiology_columns)."""
+    n, k = len(timestamps), len(fields)
+    base_ms = int(timestamps[0]) if n else 0
+    offsets = timestamps - base_ms
+    if n and int(offsets[-1]) > np.iinfo(np.uint32).max:
+        raise ValueError("session spans more than 2^32 ms; too long for the packed format")
+
+    header = bytearray(struct.pack("<4sHHIq", PACKED_MAGIC, PACKED_VERSION, k, n, base_ms))
+    for name in fields:
+        encoded = name.encode("ascii")
+        header += struct.pack("<B", len(encoded)) + encoded
+    header += b"\0" * (-len(header) % 4)
+
+    # Column-major: transposing the (n, k) result gives each field contiguously.
+    columns = np.ascontiguousarray(values.T, dtype="<f4")
+    return bytes(header) + offsets.astype("<u4").tobytes() + columns.tobytes()
+
+
+def encode_arrow(timestamps: np.ndarray, values: np.ndarray, fields: list[str]) -> bytes:
+    import pyarrow as pa
+
+    arrays = [pa.array(timestamps, type=pa.int64())]
+    for i in range(len(fields)):
+        column = values[:, i]
+        arrays.append(pa.array(column.astype(np.float32), mask=np.isnan(column), type=pa.float32()))
+    batch = pa.RecordBatch.from_arrays(arrays, names=["timestamp_ms", *fields])
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,21 @@
+"""
+Shared setup for the api-server tests: import paths and a scratch DB.
+
+shared.config reads DB_PATH once, at import time, so it is set here before
+any test module imports the app / db_manager.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+SCRATCH = Path(tempfile.mkdtemp(prefix="saleslens-api-tests-"))
+os.environ.setdefault("DB_PATH", str(SCRATCH / "test.db"))
+os.environ.setdefault("CLAUDE_CACHE_DIR", str(SCRATCH / "claude_cache"))
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "sync_engine" / "src"))
+sys.path.insert(0, str(ROOT / "insights-engine" / "src"))
+sys.path.insert(0, str(ROOT / "api-server"))
@@ -0,0 +1,108 @@
+"""REST endpoints: conditional GETs and /sessions keyset paging."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import db_manager
+from init_db import init_db
+from src import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    # No `with`: the lifespan would start the analysis workers
+    init_db(db_manager.DB_PATH)
+    return TestClient(app.app)
+
+
+# ─── ETag / If-None-Match ───────────────────────────────────
+
+def test_matching_etag_gets_304_until_the_session_changes(client):
+    db_manager.insert_session(db_manager.DB_PATH, "etag", 1_000)
+    db_manager.insert_insight("etag", "summary", "first")
+
+    first = client.get("/sessions/etag/insights")
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert len(first.json()) == 1
+
+    cached = client.get("/sessions/etag/insights", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    db_manager.insert_insight("etag", "summary", "second")
+    changed = client.get("/sessions/etag/insights", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert len(changed.json()) == 2
+    assert changed.headers["etag"] != etag
+
+
+def test_etag_differs_per_resource_and_representation(client):
+    db_manager.insert_session(db_manager.DB_PATH, "etag-kinds", 1_000)
+
+    insights = client.get("/sessions/etag-kinds/insights").headers["etag"]
+    transcript = client.get("/sessions/etag-kinds/transcript").headers["etag"]
+    ndjson = client.get("/sessions/etag-kinds/transcript", headers={"Accept": "application/x-ndjson"}).headers["etag"]
+    assert len({insights, transcript, ndjson}) == 3
+
+    stale = client.get("/sessions/etag-kinds/transcript", headers={"If-None-Match": insights})
+    assert stale.status_code == 200
+
+
+@pytest.mark.parametrize("resource", ["insights", "physiology", "transcript"])
+def test_unknown_session_is_an_empty_list(client, resource):
+    response = client.get(f"/sessions/no-such-session/{resource}", headers={"If-None-Match": "*"})
+    assert response.status_code == 200
+    assert response.json() == []
+    assert "etag" not in response.headers
+
+
+def test_unknown_session_timeline_is_404(client):
+    assert client.get("/sessions/no-such-session/timeline").status_code == 404
+
+
+# ─── GET /sessions paging ───────────────────────────────────
+
+def _pages(client, **params):
+    pages, cursor = [], None
+    while True:
+        response = client.get("/sessions", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append([s["session_id"] for s in response.json()])
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+
+
+def test_pages_split_tied_start_times_without_gaps(client):
+    for i in range(5):
+        db_manager.insert_session(db_manager.DB_PATH, f"tie-{i}", 5_000, customer_name="Tie Co")
+
+    assert _pages(client, customer="tie co", limit=2) == [["tie-4", "tie-3"], ["tie-2", "tie-1"], ["tie-0"]]
+
+
+def test_no_cursor_after_a_full_last_page(client):
+    for i in range(4):
+        db_manager.insert_session(db_manager.DB_PATH, f"even-{i}", 6_000 + i, customer_name="Even Co")
+
+    assert _pages(client, customer="Even Co", limit=2) == [["even-3", "even-2"], ["even-1", "even-0"]]
+    assert _pages(client, customer="Even Co", limit=4) == [["even-3", "even-2", "even-1", "even-0"]]
+
+
+def test_cursor_survives_a_fields_selection(client):
+    for i in range(3):
+        db_manager.insert_session(db_manager.DB_PATH, f"fields-{i}", 7_000 + i, customer_name="Fields Co")
+
+    first = client.get("/sessions", params={"customer": "Fields Co", "limit": 2, "fields": "customer_name"})
+    assert first.json() == [{"customer_name": "Fields Co"}] * 2
+
+    rest = client.get("/sessions", params={"customer": "Fields Co", "cursor": first.headers["x-next-cursor"]})
+    assert [s["session_id"] for s in rest.json()] == ["fields-0"]
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "bnVsbA", "WzEsMiwzXQ"])  # junk, null, [1,2,3]
+def test_invalid_cursor_is_400(client, cursor):
+    response = client.get("/sessions", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -4,11 +4,8 @@ import { ClientList } from "@/components/crm/ClientList"
 export default async function ClientsPage() {
     const clients = await fetchClientsForList()
 
-    const totalMeetings = clients.reduce((sum, c) => sum + c.meetings.length, 0)
-    const totalSuccessful = clients.reduce(
-        (sum, c) => sum + c.meetings.filter((m: any) => m.isSuccessful).length,
-        0
-    )
+    const totalMeetings = clients.reduce((sum, c) => sum + c.meetings, 0)
+    const totalSuccessful = clients.reduce((sum, c) => sum + c.successful, 0)
     const overallRate = totalMeetings > 0 ? Math.round((totalSuccessful / totalMeetings) * 100) : 0
 
     return (
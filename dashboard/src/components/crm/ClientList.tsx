@@ -3,30 +3,15 @@ import Link from 'next/link'
 import { format } from 'date-fns'
 import { ArrowRight } from 'lucide-react'
 
-type Meeting = {
-    id: string
-    date: Date | string
-    isSuccessful: boolean
-}
-
 type Client = {
     id: string
     name: string
     company: string
     role?: string | null
-    meetings: Meeting[]
-}
-
-function getStreak(meetings: Meeting[]): number {
-    const sorted = [...meetings].sort(
-        (a, b) => new Date(b.date).getTime() - new Date(a.date).getTime()
-    )
-    let streak = 0
-    for (const m of sorted) {
-        if (m.isSuccessful) streak++
-        else break
-    }
-    return streak
+    meetings: number
+    successful: number
+    streak: number
+    lastMeeting: Date | string | null
 }
 
 function getInitials(name: string) {
@@ -58,18 +43,12 @@ export function ClientList({ clients }: { clients: Client[] }) {
     return (
         <div className="grid gap-4 sm:grid-cols-2 xl:grid-cols-3">
             {clients.map((client, i) => {
-                const streak = getStreak(client.meetings)
-                const successCount = client.meetings.filter((m) => m.isSuccessful).length
+                const streak = client.streak
                 const successRate =
-                    client.meetings.length > 0
-                        ? Math.round((successCount / client.meetings.length) * 100)
+                    client.meetings > 0
+                        ? Math.round((client.successful / client.meetings) * 100)
                         : 0
-                const lastMeeting =
-                    client.meetings.length > 0
-                        ? [...client.meetings].sort(
-                            (a, b) => new Date(b.date).getTime() - new Date(a.date).getTime()
-                        )[0]
-                        : null
+                const lastMeeting = client.lastMeeting
                 const gradient = AVATAR_GRADIENTS[i % AVATAR_GRADIENTS.length]
 
                 return (
@@ -117,7 +96,7 @@ export function ClientList({ clients }: { clients: Client[] }) {
                             >
                                 <div className="flex gap-4">
                                     <div>
-                                        <p className="text-lg font-bold text-white leading-none">{client.meetings.length}</p>
+                                        <p className="text-lg font-bold text-white leading-none">{client.meetings}</p>
                                         <p className="text-xs mt-0.5" style={{ color: 'var(--muted-foreground)' }}>Meetings</p>
                                     </div>
                                     <div>
@@ -127,7 +106,7 @@ export function ClientList({ clients }: { clients: Client[] }) {
                                     {lastMeeting && (
                                         <div>
                                             <p className="text-sm font-semibold text-white leading-tight">
-                                                {format(new Date(lastMeeting.date), 'MMM d')}
+                                                {format(new Date(lastMeeting), 'MMM d')}
                                             </p>
                                             <p className="text-xs mt-0.5" style={{ color: 'var(--muted-foreground)' }}>Last met</p>
                                         </div>
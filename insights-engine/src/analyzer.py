@@ -10,17 +10,27 @@ Usage:
 
 import json
 import sys
+import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import anthropic
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
-from shared.config import ANTHROPIC_API_KEY, CLAUDE_MODEL, CLAUDE_MAX_TOKENS
-
-sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "sync-engine" / "src"))
+from shared.config import (
+    ANTHROPIC_API_KEY, CLAUDE_MODEL, CLAUDE_MAX_TOKENS,
+    CLAUDE_CACHE_ENABLED, CLAUDE_CACHE_DIR, CLAUDE_CACHE_MAX_BYTES,
+    ANALYSIS_CHUNK_TOKENS, ANALYSIS_CHUNK_CONCURRENCY,
+)
+from shared import metrics
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "sync_engine" / "src"))
 import db_manager
-from timeline_builder import build_timeline, format_timeline_for_display
+from timeline_builder import get_timeline, format_timeline_for_display
+
+from chunking import chunk_timeline, estimate_tokens
+from response_cache import ResponseCache, cache_key
 
 
 SYSTEM_PROMPT = """You are a sales coaching AI for ADP's sales team. You analyze sales conversations
@@ -65,11 +75,132 @@ TIMELINE DATA:
 {timeline}"""
 
 
-def analyze_session(session_id: str) -> dict:
-    """Run Claude analysis on a completed session."""
+# Map step of chunked mode: same schema, but Claude only sees one part.
+CHUNK_PROMPT = """This is PART {part} of {parts} of a longer sales conversation timeline.
+Analyze only this part. Each entry shows what was said and the customer's
+real-time physiological response. Timestamps are offsets from the start of
+the whole conversation.
+
+Respond ONLY in valid JSON with this exact structure:
+{{
+  "overall_score": <0-100 engagement score for this part>,
+  "summary": "<2-3 sentence summary of this part>",
+  "key_moments": [
+    {{
+      "timestamp_ms": <UTC ms of the moment>,
+      "type": "<concern | positive | missed_opportunity>",
+      "what_happened": "<what was said and the physical reaction>",
+      "physiological_evidence": "<specific metrics that changed>",
+      "recommendation": "<what the seller should do differently>"
+    }}
+  ],
+  "coaching_tips": ["<specific, actionable tip>", "..."],
+  "unresolved_concerns": ["<customer concern raised in this part that wasn't addressed in it>", "..."]
+}}
+
+TIMELINE DATA (PART {part} OF {parts}):
+{timeline}"""
+
+
+# Reduce step of chunked mode: merge the per-part results into one analysis.
+REDUCE_PROMPT = """A long sales conversation was analyzed in {parts} consecutive parts.
+Below are the per-part analyses, in order. Merge them into ONE analysis of the
+whole conversation:
+- overall_score and summary describe the conversation as a whole
+- keep the most important key_moments (drop near-duplicates), in time order
+- merge coaching_tips, removing repeats
+- an unresolved_concern from an early part that a later part resolved is no longer unresolved
+
+Respond ONLY in valid JSON with this exact structure:
+{{
+  "overall_score": <0-100 engagement score>,
+  "summary": "<2-3 sentence summary of how the conversation went>",
+  "key_moments": [
+    {{
+      "timestamp_ms": <UTC ms of the moment>,
+      "type": "<concern | positive | missed_opportunity>",
+      "what_happened": "<what was said and the physical reaction>",
+      "physiological_evidence": "<specific metrics that changed>",
+      "recommendation": "<what the seller should do differently>"
+    }}
+  ],
+  "coaching_tips": ["<specific, actionable tip>", "..."],
+  "unresolved_concerns": ["<customer concern that wasn't addressed>", "..."]
+}}
+
+PER-PART ANALYSES:
+{partials}"""
+
 
-    # Build the merged timeline
-    timeline = build_timeline(session_id)
+response_cache = ResponseCache(CLAUDE_CACHE_DIR, CLAUDE_CACHE_MAX_BYTES)
+
+
+def analyze_session(
+    session_id: str,
+    use_cache: bool = CLAUDE_CACHE_ENABLED,
+    chunked: bool | None = None,
+    job_id: int | None = None,
+) -> dict:
+    """
+    Run Claude analysis on a completed session.
+
+    use_cache=False skips the response cache lookup and always calls Claude
+    (the fresh response still replaces the cached one).
+
+    chunked=None picks the mode by size: timelines over ANALYSIS_CHUNK_TOKENS
+    are analyzed in pieces and merged (map-reduce), shorter ones in one call.
+    Pass True/False to force a mode.
+
+    job_id is the analysis_jobs row this run belongs to (api-server workers).
+    The insights then replace any a crashed earlier attempt saved, and they,
+    the 'analyzed' status and the job's 'done' are committed together.
+    """
+    start = time.perf_counter()
+    result = {"error": "analysis raised"}
+    try:
+        result = _run_analysis(session_id, use_cache, chunked, job_id)
+        return result
+    finally:
+        # Latency + total Claude tokens for this analysis (shared/metrics.py)
+        metrics.analysis_finished(session_id, time.perf_counter() - start, "error" not in result)
+
+
+def _run_analysis(session_id: str, use_cache: bool, chunked: bool | None, job_id: int | None) -> dict:
+    prepared = load_for_analysis(session_id)
+    if "error" in prepared:
+        return prepared
+    session, timeline, formatted = prepared["session"], prepared["timeline"], prepared["formatted"]
+
+    if chunked is None:
+        chunked = needs_chunking(formatted)
+
+    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+    if chunked:
+        result = _analyze_chunked(client, session, timeline, use_cache)
+    else:
+        result = _ask_claude(client, session_id, use_cache, ANALYSIS_PROMPT, timeline=formatted)
+
+    if "error" in result:
+        return result
+
+    # Save insights and update session status (and the job) in one commit
+    with db_manager.transaction():
+        _save_insights(session_id, result, replace=job_id is not None)
+        db_manager.update_session_status(session_id, "analyzed")
+        if job_id is not None:
+            db_manager.finish_analysis_job(job_id, "done", overall_score=result.get("overall_score"))
+
+    return result
+
+
+# Label for Claude latency metrics
+PROMPT_NAMES = {ANALYSIS_PROMPT: "analysis", CHUNK_PROMPT: "chunk", REDUCE_PROMPT: "reduce"}
+
+
+def load_for_analysis(session_id: str) -> dict:
+    """The session, its merged timeline and the timeline formatted for Claude (or an error dict)."""
+    # Build the merged timeline (served from timeline_entries, merging only what changed)
+    timeline = get_timeline(session_id)
     if not timeline:
         return {"error": "No timeline data found for this session"}
 
@@ -80,23 +211,87 @@ def analyze_session(session_id: str) -> dict:
 
     # Format timeline for Claude
     formatted = format_timeline_for_display(timeline, session["start_time_ms"])
-
-    # Call Claude
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-
-    response = client.messages.create(
-        model=CLAUDE_MODEL,
-        max_tokens=CLAUDE_MAX_TOKENS,
-        system=SYSTEM_PROMPT,
-        messages=[{
-            "role": "user",
-            "content": ANALYSIS_PROMPT.format(timeline=formatted)
-        }]
+    return {"session": session, "timeline": timeline, "formatted": formatted}
+
+
+def needs_chunking(formatted: str) -> bool:
+    return estimate_tokens(formatted) > ANALYSIS_CHUNK_TOKENS
+
+
+def _analyze_chunked(client, session: dict, timeline: list[dict], use_cache: bool) -> dict:
+    """
+    Map: analyze speaker-turn-aligned chunks concurrently.
+    Reduce: one more call merges the partial results into the normal schema.
+    """
+    session_id = session["session_id"]
+    chunk_fields = chunk_prompt_fields(session, timeline)
+
+    def analyze_chunk(fields: dict) -> dict:
+        return _ask_claude(client, session_id, use_cache, CHUNK_PROMPT, **fields)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(ANALYSIS_CHUNK_CONCURRENCY, len(chunk_fields)))) as pool:
+        partials = list(pool.map(analyze_chunk, chunk_fields))
+
+    merged = merge_partials(partials)
+    if "partials" not in merged:
+        return merged       # an error, or a single chunk that needs no reduce
+    return _ask_claude(client, session_id, use_cache, REDUCE_PROMPT, **merged)
+
+
+def chunk_prompt_fields(session: dict, timeline: list[dict]) -> list[dict]:
+    """CHUNK_PROMPT fields for each chunk of the timeline."""
+    chunks = chunk_timeline(timeline, session["start_time_ms"], ANALYSIS_CHUNK_TOKENS)
+    return [
+        {
+            "part": i + 1,
+            "parts": len(chunks),
+            "timeline": format_timeline_for_display(chunk, session["start_time_ms"]),
+        }
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def merge_partials(partials: list[dict]) -> dict:
+    """
+    REDUCE_PROMPT fields for the chunk results. Returns the first chunk's
+    error instead if any chunk failed, and the lone result if there was
+    only one chunk.
+    """
+    for i, partial in enumerate(partials):
+        if "error" in partial:
+            return {**partial, "error": f"Part {i + 1}/{len(partials)}: {partial['error']}"}
+
+    if len(partials) == 1:
+        return partials[0]
+
+    merged = [{"part": i + 1, **partial} for i, partial in enumerate(partials)]
+    return {
+        "parts": len(partials),
+        "partials": json.dumps(merged, indent=2, ensure_ascii=False),
+    }
+
+
+def claude_request(template: str, **fields) -> tuple[str, dict]:
+    """Response cache key and messages.create() kwargs for `template.format(**fields)`."""
+    # Same prompts + inputs + model → same answer
+    key = cache_key(
+        SYSTEM_PROMPT, template, json.dumps(fields, sort_keys=True, ensure_ascii=False),
+        CLAUDE_MODEL, CLAUDE_MAX_TOKENS,
     )
+    request = {
+        "model": CLAUDE_MODEL,
+        "max_tokens": CLAUDE_MAX_TOKENS,
+        "system": SYSTEM_PROMPT,
+        "messages": [{
+            "role": "user",
+            "content": template.format(**fields)
+        }],
+    }
+    return key, request
 
-    # Parse Claude's JSON response
-    response_text = response.content[0].text
 
+def parse_response(response_text: str) -> dict:
+    """Claude's JSON answer as a dict, or an error dict if it doesn't parse."""
     # Strip markdown code fences if present
     if response_text.startswith("```"):
         response_text = response_text.split("\n", 1)[1]
@@ -104,55 +299,88 @@ def analyze_session(session_id: str) -> dict:
             response_text = response_text.rsplit("```", 1)[0]
 
     try:
-        result = json.loads(response_text.strip())
+        return json.loads(response_text.strip())
     except json.JSONDecodeError:
         return {"error": "Failed to parse Claude response", "raw": response_text}
 
-    # Save insights to database
-    _save_insights(session_id, result)
 
-    # Update session status
-    db_manager.update_session_status(session_id, "analyzed")
+def _ask_claude(client, session_id: str, use_cache: bool, template: str, **fields) -> dict:
+    """One Claude call with `template.format(**fields)`; returns the parsed JSON or an error dict."""
+    key, request = claude_request(template, **fields)
 
-    return result
+    # Reuse the answer if we've sent exactly this before
+    response_text = response_cache.get(key) if use_cache else None
+    if use_cache:
+        metrics.CLAUDE_CACHE.inc(result="miss" if response_text is None else "hit")
+    if response_text is not None:
+        return parse_response(response_text)
 
+    # Call Claude
+    start = time.perf_counter()
+    response = client.messages.create(**request)
+    metrics.claude_call(session_id, PROMPT_NAMES.get(template, "other"), time.perf_counter() - start,
+                        getattr(response, "usage", None))
+    response_text = response.content[0].text
 
-def _save_insights(session_id: str, result: dict):
-    """Save Claude's analysis results as insight rows in the database."""
+    # Parse Claude's JSON response; only responses that parsed are worth keeping
+    result = parse_response(response_text)
+    if "error" not in result:
+        response_cache.put(key, response_text, model=CLAUDE_MODEL, session_id=session_id)
+    return result
 
-    # Save summary
-    db_manager.insert_insight(
-        session_id=session_id,
-        insight_type="summary",
-        title=f"Score: {result.get('overall_score', '?')}/100",
-        body=result.get("summary", ""),
-        severity="positive" if result.get("overall_score", 0) >= 70 else "concern",
-    )
 
-    # Save key moments
-    for moment in result.get("key_moments", []):
-        db_manager.insert_insight(
-            session_id=session_id,
-            insight_type="risk" if moment["type"] == "concern" else "highlight",
-            title=moment.get("what_happened", "")[:100],
-            body=moment.get("recommendation", ""),
-            severity="concern" if moment["type"] == "concern" else "positive",
-            timestamp_ref_ms=moment.get("timestamp_ms"),
-        )
+def _save_insights(session_id: str, result: dict, replace: bool = False):
+    """
+    Save Claude's analysis results as insight rows in the database.
+    replace=True drops the session's earlier insights first (re-analysis).
+    """
+    # One transaction (one commit) for all insight rows
+    with db_manager.transaction():
+        if replace:
+            db_manager.delete_insights_for_session(session_id)
 
-    # Save coaching tips
-    for tip in result.get("coaching_tips", []):
+        # Save summary
         db_manager.insert_insight(
             session_id=session_id,
-            insight_type="coaching",
-            body=tip,
-            severity="neutral",
+            insight_type="summary",
+            title=f"Score: {result.get('overall_score', '?')}/100",
+            body=result.get("summary", ""),
+            severity="positive" if result.get("overall_score", 0) >= 70 else "concern",
         )
 
+        # Save key moments
+        for moment in result.get("key_moments", []):
+            db_manager.insert_insight(
+                session_id=session_id,
+                insight_type="risk" if moment["type"] == "concern" else "highlight",
+                title=moment.get("what_happened", "")[:100],
+                body=moment.get("recommendation", ""),
+                severity="concern" if moment["type"] == "concern" else "positive",
+                timestamp_ref_ms=moment.get("timestamp_ms"),
+            )
+
+        # Save coaching tips
+        for tip in result.get("coaching_tips", []):
+            db_manager.insert_insight(
+                session_id=session_id,
+                insight_type="coaching",
+                body=tip,
+                severity="neutral",
+            )
+
+        # Rollup for /analytics: picks up the score and any segments written since stop
+        db_manager.refresh_session_stats(session_id, analysis_score=result.get("overall_score"))
+
 
 def main():
     parser = argparse.ArgumentParser(description="SalesLens AI Insights Engine")
     parser.add_argument("--session-id", required=True, help="Session ID to analyze")
+    parser.add_argument("--no-cache", action="store_true", help="Always call Claude, ignoring cached responses")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--chunked", dest="chunked", action="store_true", default=None,
+                      help="Force map-reduce analysis over timeline chunks")
+    mode.add_argument("--single", dest="chunked", action="store_false",
+                      help="Force a single call with the whole timeline")
     args = parser.parse_args()
 
     if not ANTHROPIC_API_KEY:
@@ -160,7 +388,11 @@ def main():
         sys.exit(1)
 
     print(f"🧠 Analyzing session {args.session_id}...")
-    result = analyze_session(args.session_id)
+    result = analyze_session(
+        args.session_id,
+        use_cache=CLAUDE_CACHE_ENABLED and not args.no_cache,
+        chunked=args.chunked,
+    )
 
     if "error" in result:
         print(f"❌ {result['error']}")
@@ -171,6 +403,9 @@ def main():
         print(f"   Key moments: {len(result.get('key_moments', []))}")
         print(f"   Coaching tips: {len(result.get('coaching_tips', []))}")
 
+    stats = response_cache.stats()
+    print(f"   Response cache: {stats['hits']} hit(s), {stats['misses']} miss(es)")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,353 @@
+"""
+insights-engine/src/batch_analyze.py — Re-run Claude analysis over many sessions.
+
+analyzer.py handles one session per run, one blocking call at a time. After
+a prompt change we want to re-score weeks of sessions, so this runs the same
+analysis (same prompts, response cache, chunking and _save_insights) for
+every session matching a filter, on one asyncio loop:
+
+  - at most --concurrency Claude calls in flight (semaphore)
+  - token buckets for requests/min and estimated input tokens/min
+  - retries on 429 / 5xx / connection errors, exponential backoff with
+    full jitter (Retry-After is honored when the API sends it)
+  - progress is appended to a JSONL file as each session finishes, so an
+    interrupted run picks up where it stopped. The default file is named
+    after a hash of the prompts + model, so changing a prompt starts over.
+
+Re-analysis replaces the session's earlier insights.
+
+Usage:
+    python src/batch_analyze.py --status analyzed --since 2025-01-01 --until 2025-04-01
+    python src/batch_analyze.py --customer "Acme Corp" --concurrency 8 --rpm 100
+    python src/batch_analyze.py --status analyzed --base-url http://127.0.0.1:9000   # stub_claude_server.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import anthropic
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from shared.config import (
+    ANTHROPIC_API_KEY, CLAUDE_MODEL, CLAUDE_MAX_TOKENS, CLAUDE_CACHE_ENABLED, PROJECT_ROOT,
+    BATCH_CONCURRENCY, BATCH_REQUESTS_PER_MINUTE, BATCH_INPUT_TOKENS_PER_MINUTE, BATCH_MAX_RETRIES,
+)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "sync_engine" / "src"))
+import db_manager
+
+import analyzer
+from analyzer import ANALYSIS_PROMPT, CHUNK_PROMPT, REDUCE_PROMPT, SYSTEM_PROMPT
+from chunking import estimate_tokens
+from response_cache import cache_key
+
+PROGRESS_DIR = PROJECT_ROOT / "insights-engine" / "data" / "batch_runs"
+
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 60.0
+
+
+def prompt_version() -> str:
+    """Short hash of everything that changes the analysis output."""
+    prompts = "\n".join([ANALYSIS_PROMPT, CHUNK_PROMPT, REDUCE_PROMPT])
+    return cache_key(SYSTEM_PROMPT, prompts, "", CLAUDE_MODEL, CLAUDE_MAX_TOKENS)[:12]
+
+
+# ─── Rate Limiting ──────────────────────────────────────────
+
+class TokenBucket:
+    """Refills at `per_minute` units per minute, holds at most `capacity`."""
+
+    def __init__(self, per_minute: float, capacity: float | None = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0):
+        # A request bigger than the bucket can still go once the bucket is full.
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+
+
+def _is_retryable(e: Exception) -> bool:
+    if isinstance(e, anthropic.APIConnectionError):     # includes timeouts
+        return True
+    if isinstance(e, anthropic.APIStatusError):
+        return e.status_code in (408, 409, 429) or e.status_code >= 500
+    return False
+
+
+def _retry_after(e: Exception) -> float | None:
+    response = getattr(e, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+# ─── Progress ───────────────────────────────────────────────
+
+class ProgressLog:
+    """Append-only JSONL of finished sessions; sessions marked done are skipped on resume."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.done: set[str] = set()
+        if self.path.exists():
+            for line in self.path.read_text(encoding="utf-8").splitlines():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue        # torn last line from a killed run
+                if entry.get("status") == "done":
+                    self.done.add(entry["session_id"])
+
+    def record(self, session_id: str, status: str, seconds: float, **extra):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"session_id": session_id, "status": status, "seconds": round(seconds, 3), **extra}
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        if status == "done":
+            self.done.add(session_id)
+
+
+# ─── Batch Runner ───────────────────────────────────────────
+
+class BatchAnalyzer:
+    def __init__(
+        self,
+        client: anthropic.AsyncAnthropic,
+        concurrency: int,
+        requests_per_minute: float,
+        input_tokens_per_minute: float,
+        max_retries: int,
+        use_cache: bool,
+    ):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.requests = TokenBucket(requests_per_minute, capacity=max(1, concurrency))
+        self.input_tokens = TokenBucket(input_tokens_per_minute)
+        self.max_retries = max_retries
+        self.use_cache = use_cache
+
+        self.call_latencies: list[float] = []
+        self.retries = 0
+        self.cache_hits = 0
+
+    async def analyze(self, session_id: str) -> dict:
+        """Same steps as analyzer.analyze_session, with async Claude calls."""
+        prepared = await asyncio.to_thread(analyzer.load_for_analysis, session_id)
+        if "error" in prepared:
+            return prepared
+        session, timeline, formatted = prepared["session"], prepared["timeline"], prepared["formatted"]
+
+        if analyzer.needs_chunking(formatted):
+            chunk_fields = analyzer.chunk_prompt_fields(session, timeline)
+            partials = await asyncio.gather(*(
+                self.ask(session_id, CHUNK_PROMPT, **fields) for fields in chunk_fields
+            ))
+            result = analyzer.merge_partials(list(partials))
+            if "partials" in result:
+                result = await self.ask(session_id, REDUCE_PROMPT, **result)
+        else:
+            result = await self.ask(session_id, ANALYSIS_PROMPT, timeline=formatted)
+
+        if "error" in result:
+            return result
+
+        await asyncio.to_thread(self._save, session_id, result)
+        return result
+
+    @staticmethod
+    def _save(session_id: str, result: dict):
+        with db_manager.transaction():
+            analyzer._save_insights(session_id, result, replace=True)
+            db_manager.update_session_status(session_id, "analyzed")
+
+    async def ask(self, session_id: str, template: str, **fields) -> dict:
+        key, request = analyzer.claude_request(template, **fields)
+
+        if self.use_cache:
+            cached = await asyncio.to_thread(analyzer.response_cache.get, key)
+            if cached is not None:
+                self.cache_hits += 1
+                return analyzer.parse_response(cached)
+
+        response_text = await self._call(request)
+        result = analyzer.parse_response(response_text)
+        if "error" not in result:
+            await asyncio.to_thread(
+                analyzer.response_cache.put, key, response_text, model=CLAUDE_MODEL, session_id=session_id
+            )
+        return result
+
+    async def _call(self, request: dict) -> str:
+        tokens = estimate_tokens(request["system"] + request["messages"][0]["content"])
+        attempt = 0
+        while True:
+            async with self.semaphore:
+                await self.requests.acquire()
+                await self.input_tokens.acquire(tokens)
+                started = time.perf_counter()
+                try:
+                    response = await self.client.messages.create(**request)
+                except Exception as e:
+                    if attempt >= self.max_retries or not _is_retryable(e):
+                        raise
+                    error = e
+                else:
+                    self.call_latencies.append(time.perf_counter() - started)
+                    return response.content[0].text
+
+            # Back off outside the semaphore so other calls can use the slot.
+            delay = _retry_after(error)
+            if delay is None:
+                delay = random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+
+async def run_batch(batch: BatchAnalyzer, session_ids: list[str], progress: ProgressLog) -> dict:
+    counts = {"done": 0, "error": 0}
+
+    async def one(session_id: str):
+        started = time.perf_counter()
+        try:
+            result = await batch.analyze(session_id)
+        except Exception as e:
+            result = {"error": f"{type(e).__name__}: {e}"}
+        seconds = time.perf_counter() - started
+
+        if "error" in result:
+            counts["error"] += 1
+            progress.record(session_id, "error", seconds, error=result["error"])
+            print(f"❌ {session_id}: {result['error']}")
+        else:
+            counts["done"] += 1
+            progress.record(session_id, "done", seconds, overall_score=result.get("overall_score"))
+            print(f"✅ {session_id}: {result.get('overall_score', '?')}/100 ({seconds:.1f}s)")
+
+    # Sessions are all scheduled up front; the semaphore and buckets pace the calls.
+    try:
+        await asyncio.gather(*(one(sid) for sid in session_ids))
+    finally:
+        await batch.client.close()
+    return counts
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def print_report(batch: BatchAnalyzer, counts: dict, skipped: int, wall_seconds: float):
+    finished = counts["done"] + counts["error"]
+    print("\n📊 Batch report")
+    print(f"   Sessions: {counts['done']} done, {counts['error']} failed, {skipped} skipped (already done)")
+    print(f"   Wall time: {wall_seconds:.1f}s"
+          + (f" — {finished / wall_seconds * 60:.1f} sessions/min" if wall_seconds > 0 and finished else ""))
+    print(f"   Claude calls: {len(batch.call_latencies)}, retries: {batch.retries}, cache hits: {batch.cache_hits}")
+    if batch.call_latencies:
+        lat = sorted(batch.call_latencies)
+        print(f"   Call latency: p50 {_percentile(lat, 50):.2f}s, p95 {_percentile(lat, 95):.2f}s, "
+              f"max {lat[-1]:.2f}s, mean {sum(lat) / len(lat):.2f}s")
+
+
+def _parse_date_ms(value: str) -> int:
+    """YYYY-MM-DD or an ISO datetime (UTC unless it has an offset) → UTC ms."""
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SalesLens batch re-analysis")
+    parser.add_argument("--status", action="append",
+                        help="Only sessions with this status (repeatable; default: analyzed)")
+    parser.add_argument("--since", type=_parse_date_ms, help="Sessions started on/after this date (UTC)")
+    parser.add_argument("--until", type=_parse_date_ms, help="Sessions started before this date (UTC)")
+    parser.add_argument("--customer", help="Customer name (case-insensitive, same match as GET /sessions?customer=)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Max Claude calls in flight")
+    parser.add_argument("--rpm", type=float, default=BATCH_REQUESTS_PER_MINUTE, help="Max requests per minute")
+    parser.add_argument("--itpm", type=float, default=BATCH_INPUT_TOKENS_PER_MINUTE,
+                        help="Max estimated input tokens per minute")
+    parser.add_argument("--max-retries", type=int, default=BATCH_MAX_RETRIES)
+    parser.add_argument("--no-cache", action="store_true", help="Always call Claude, ignoring cached responses")
+    parser.add_argument("--progress", type=Path,
+                        help="Progress file (default: one per prompt version under insights-engine/data/batch_runs/)")
+    parser.add_argument("--fresh", action="store_true", help="Ignore earlier progress and redo every session")
+    parser.add_argument("--base-url", help="Anthropic API base URL (e.g. a local stub server)")
+    parser.add_argument("--dry-run", action="store_true", help="List matching sessions and exit")
+    args = parser.parse_args()
+
+    sessions = db_manager.find_sessions(
+        statuses=args.status or ["analyzed"],
+        since_ms=args.since,
+        until_ms=args.until,
+        customer=args.customer,
+    )
+    progress_path = args.progress or PROGRESS_DIR / f"{prompt_version()}.jsonl"
+    if args.fresh and progress_path.exists():
+        progress_path.unlink()
+    progress = ProgressLog(progress_path)
+
+    todo = [s["session_id"] for s in sessions if s["session_id"] not in progress.done]
+    skipped = len(sessions) - len(todo)
+    print(f"🧠 {len(sessions)} matching session(s), {len(todo)} to analyze, {skipped} already done")
+    print(f"   Progress: {progress_path}")
+
+    if args.dry_run:
+        for s in sessions:
+            mark = "✓" if s["session_id"] in progress.done else " "
+            print(f"   [{mark}] {s['session_id']}  {s['status']:<9}  {s.get('customer_name') or ''}")
+        return
+    if not todo:
+        return
+
+    if not ANTHROPIC_API_KEY and not args.base_url:
+        print("❌ ANTHROPIC_API_KEY not set. Check your .env file.")
+        sys.exit(1)
+
+    # Retries are ours (jittered, rate-limit aware), so the SDK's are off.
+    client = anthropic.AsyncAnthropic(
+        api_key=ANTHROPIC_API_KEY or "stub",
+        base_url=args.base_url,
+        max_retries=0,
+    )
+    batch = BatchAnalyzer(
+        client,
+        concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        input_tokens_per_minute=args.itpm,
+        max_retries=args.max_retries,
+        use_cache=CLAUDE_CACHE_ENABLED and not args.no_cache,
+    )
+
+    started = time.perf_counter()
+    counts = asyncio.run(run_batch(batch, todo, progress))
+    print_report(batch, counts, skipped, time.perf_counter() - started)
+    if counts["error"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
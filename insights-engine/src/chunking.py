@@ -0,0 +1,70 @@
+"""
+insights-engine/src/chunking.py — Split a long timeline into prompt-sized pieces.
+
+Used by analyzer.py's chunked (map-reduce) mode. Chunks always break between
+speaker turns (a run of consecutive segments by the same speaker), so no
+chunk starts halfway through someone's answer. A single turn that is larger
+than the budget on its own is the only thing split mid-turn, at segment
+boundaries.
+
+Token counts are estimated from the formatted text (~4 characters per
+token), which is close enough for budgeting and needs no tokenizer.
+"""
+
+from timeline_builder import format_timeline_for_display
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def speaker_turns(timeline: list[dict]) -> list[list[dict]]:
+    """Group consecutive entries by speaker."""
+    turns: list[list[dict]] = []
+    for entry in timeline:
+        if turns and turns[-1][-1]["speaker"] == entry["speaker"]:
+            turns[-1].append(entry)
+        else:
+            turns.append([entry])
+    return turns
+
+
+def chunk_timeline(timeline: list[dict], session_start_ms: int, max_tokens: int) -> list[list[dict]]:
+    """
+    Pack whole speaker turns into chunks whose formatted text stays under
+    max_tokens. Returns the chunks in timeline order.
+    """
+    def cost(entries: list[dict]) -> int:
+        # +2 for the blank line format_timeline_for_display puts between entries
+        return sum(estimate_tokens(format_timeline_for_display([e], session_start_ms)) + 2 for e in entries)
+
+    chunks: list[list[dict]] = []
+    current: list[dict] = []
+    current_tokens = 0
+
+    for turn in speaker_turns(timeline):
+        turn_tokens = cost(turn)
+
+        if current and current_tokens + turn_tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = [], 0
+
+        if turn_tokens <= max_tokens:
+            current.extend(turn)
+            current_tokens += turn_tokens
+            continue
+
+        # One turn bigger than a whole chunk: split it by segment.
+        for entry in turn:
+            entry_tokens = cost([entry])
+            if current and current_tokens + entry_tokens > max_tokens:
+                chunks.append(current)
+                current, current_tokens = [], 0
+            current.append(entry)
+            current_tokens += entry_tokens
+
+    if current:
+        chunks.append(current)
+    return chunks
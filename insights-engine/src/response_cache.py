@@ -0,0 +1,108 @@
+"""
+insights-engine/src/response_cache.py — On-disk cache of Claude responses.
+
+analyze_session sends the same prompt again whenever a session is re-run
+(crash recovery, a second stop call, prompt experiments on old sessions).
+The response only depends on what we send, so we key it by content:
+
+    sha256(system prompt, prompt template (ANALYSIS_PROMPT, ...),
+           prompt inputs (the formatted timeline, ...), model, max_tokens)
+
+Change any one of those and it's a different key, so there is nothing to
+invalidate by hand. Each entry is one `<key>.json` file in CLAUDE_CACHE_DIR.
+A hit bumps the file's mtime; when the directory grows past
+CLAUDE_CACHE_MAX_BYTES the least recently used files are deleted.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+def cache_key(system: str, template: str, inputs: str, model: str, max_tokens: int) -> str:
+    """Content hash of everything that decides Claude's answer."""
+    payload = json.dumps([system, template, inputs, model, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded LRU of response texts, one file per key."""
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)      # mark as recently used
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry["response"]
+
+    def put(self, key: str, response: str, **meta):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = {"response": response, "created_at_ms": int(time.time() * 1000), **meta}
+
+        # Write-then-rename so a reader never sees a half-written file.
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            log.exception("Could not write Claude response cache entry %s", key)
+            Path(tmp).unlink(missing_ok=True)
+            return
+
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for p in self.cache_dir.glob("*.json"):
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+
+            for _, size, p in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                p.unlink(missing_ok=True)
+                total -= size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
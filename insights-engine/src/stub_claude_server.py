@@ -0,0 +1,144 @@
+"""
+insights-engine/src/stub_claude_server.py — Local stand-in for the Anthropic Messages API.
+
+Answers POST /v1/messages with a well-formed Messages response whose text is
+an analysis in the JSON shape analyzer.py asks for, so batch_analyze.py (or
+analyzer.py) can run end to end without an API key or network. The score is
+derived from a hash of the prompt, so the same session gets the same answer.
+
+--latency adds a fixed delay per call (to see concurrency at work), and
+--rate-limit-every N answers every Nth request with a 429 + Retry-After, to
+exercise the retry path.
+
+Usage:
+    python src/stub_claude_server.py --port 9000 --latency 0.5 --rate-limit-every 5
+    python src/batch_analyze.py --status completed --base-url http://127.0.0.1:9000 --no-cache
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def stub_analysis(prompt: str) -> dict:
+    """A deterministic analysis for this prompt (same keys as ANALYSIS_PROMPT's schema)."""
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    score = 40 + digest[0] % 56
+    return {
+        "overall_score": score,
+        "summary": f"Stub analysis ({len(prompt)} prompt characters).",
+        "key_moments": [{
+            "timestamp_ms": None,
+            "type": "positive" if score >= 70 else "concern",
+            "what_happened": "Stub key moment",
+            "physiological_evidence": "n/a",
+            "recommendation": "Keep going",
+        }],
+        "coaching_tips": ["Stub coaching tip"],
+        "unresolved_concerns": [],
+    }
+
+
+class StubClaudeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_s: float = 0.0, rate_limit_every: int = 0):
+        super().__init__(address, _Handler)
+        self.latency_s = latency_s
+        self.rate_limit_every = rate_limit_every
+        self.requests = 0
+        self.rate_limited = 0
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def next_request(self) -> int:
+        with self._lock:
+            self.requests += 1
+            return next(self._counter)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep-alive, like the real API
+
+    def do_POST(self):
+        server: StubClaudeServer = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))) or b"{}")
+        if self.path.split("?")[0] != "/v1/messages":
+            return self._send(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+
+        n = server.next_request()
+        if server.rate_limit_every and n % server.rate_limit_every == 0:
+            with server._lock:
+                server.rate_limited += 1
+            return self._send(
+                429, {"type": "error", "error": {"type": "rate_limit_error", "message": "stub rate limit"}},
+                {"retry-after": "0.05"},
+            )
+
+        if server.latency_s:
+            time.sleep(server.latency_s)
+
+        prompt = "".join(
+            m["content"] if isinstance(m["content"], str) else json.dumps(m["content"])
+            for m in body.get("messages", [])
+        )
+        text = json.dumps(stub_analysis(prompt))
+        self._send(200, {
+            "id": f"msg_stub_{n}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "stub"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4},
+        })
+
+    def _send(self, status: int, payload: dict, headers: dict | None = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start(host: str = "127.0.0.1", port: int = 0, latency_s: float = 0.0, rate_limit_every: int = 0):
+    """Run a stub server on a background thread (port 0 = any free port). Call .shutdown() to stop."""
+    server = StubClaudeServer((host, port), latency_s, rate_limit_every)
+    threading.Thread(target=server.serve_forever, name="stub-claude", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Anthropic Messages API for local testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each answer")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every Nth request with a 429")
+    args = parser.parse_args()
+
+    server = StubClaudeServer((args.host, args.port), args.latency, args.rate_limit_every)
+    print(f"[stub-claude] listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Shared setup for the insights-engine tests: a scratch DB and response cache.
+
+shared.config reads DB_PATH / CLAUDE_CACHE_DIR once, at import time, so they
+are set here before any test module imports analyzer or db_manager.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+SCRATCH = Path(tempfile.mkdtemp(prefix="saleslens-insights-tests-"))
+os.environ.setdefault("DB_PATH", str(SCRATCH / "test.db"))
+os.environ.setdefault("CLAUDE_CACHE_DIR", str(SCRATCH / "claude_cache"))
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "sync_engine" / "src"))
+sys.path.insert(0, str(ROOT / "sync_engine" / "bench"))
+sys.path.insert(0, str(ROOT / "insights-engine" / "src"))
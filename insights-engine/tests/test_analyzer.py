@@ -0,0 +1,38 @@
+"""analyzer.analyze_session run as an analysis job, against the local stub Messages server."""
+
+import pytest
+
+import analyzer
+import db_manager
+import stub_claude_server
+from synth_data import generate
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = stub_claude_server.start()
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", server.url)
+    monkeypatch.setattr(analyzer, "ANTHROPIC_API_KEY", "stub")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_rerun_job_replaces_insights_and_finishes_job(stub):
+    """A job resumed after a crash must not save its insights a second time."""
+    (session_id,) = generate(db_manager.DB_PATH, [120], seed=5, prefix="job")
+    job = db_manager.enqueue_analysis_job(session_id)
+
+    first = analyzer.analyze_session(session_id, use_cache=False, job_id=job["id"])
+    insights = db_manager.get_insights_for_session(session_id)
+    assert "error" not in first
+    assert insights
+
+    # Same job picked up again (requeue_interrupted_analysis_jobs after a crash)
+    analyzer.analyze_session(session_id, use_cache=False, job_id=job["id"])
+    assert len(db_manager.get_insights_for_session(session_id)) == len(insights)
+
+    assert db_manager.get_session(session_id)["status"] == "analyzed"
+    (finished,) = db_manager.get_analysis_jobs_for_session(session_id)
+    assert finished["status"] == "done"
+    assert finished["overall_score"] == first["overall_score"]
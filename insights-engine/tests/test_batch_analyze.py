@@ -0,0 +1,41 @@
+"""Smoke test: batch_analyze against the local stub Messages server."""
+
+import asyncio
+import os
+
+import anthropic
+import pytest
+
+import db_manager
+import stub_claude_server
+from batch_analyze import BatchAnalyzer, ProgressLog, run_batch
+from synth_data import generate
+
+
+@pytest.fixture
+def stub():
+    server = stub_claude_server.start(rate_limit_every=3)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_batch_run_against_stub_server(stub, tmp_path):
+    session_ids = generate(os.environ["DB_PATH"], [120, 180, 240], seed=3, prefix="batch")
+    client = anthropic.AsyncAnthropic(api_key="stub", base_url=stub.url, max_retries=0)
+    batch = BatchAnalyzer(
+        client, concurrency=2, requests_per_minute=6000, input_tokens_per_minute=10_000_000,
+        max_retries=3, use_cache=False,
+    )
+    progress = ProgressLog(tmp_path / "progress.jsonl")
+
+    counts = asyncio.run(run_batch(batch, session_ids, progress))
+
+    assert counts == {"done": 3, "error": 0}
+    assert batch.retries == stub.rate_limited > 0
+    assert progress.done == set(session_ids)
+    assert ProgressLog(tmp_path / "progress.jsonl").done == set(session_ids)    # resumable
+    for session_id in session_ids:
+        assert db_manager.get_session(session_id)["status"] == "analyzed"
+        types = {i["insight_type"] for i in db_manager.get_insights_for_session(session_id)}
+        assert {"summary", "coaching"} <= types
@@ -45,43 +45,34 @@ const ROLE_MAP: Record<string, string> = {
     "Sarah Williams": "VP of Operations",
 }
 
-function getSlug(name: string) {
-    return name.toLowerCase().replace(/[^a-z0-9]+/g, "-")
-}
-
 // ─── Clients List Page Data ──────────────────────────────────────────────
 
+// GET /clients: one row per client, counts aggregated server-side
+export type API_ClientSummary = {
+    id: string
+    name: string
+    meetings: number
+    successful: number
+    streak: number
+    last_meeting_ms: number | null
+}
+
 export async function fetchClientsForList() {
     try {
-        const res = await fetch(`${API_BASE_URL}/sessions`, { cache: "no-store" })
-        if (!res.ok) throw new Error("Failed to fetch sessions")
-        const sessions: API_Session[] = await res.json()
-
-        const clientsMap = new Map<string, any>()
-
-        for (const s of sessions) {
-            const name = s.customer_name || "Unknown Client"
-            const id = getSlug(name)
-
-            if (!clientsMap.has(id)) {
-                clientsMap.set(id, {
-                    id,
-                    name,
-                    company: COMPANY_MAP[name] || "Unknown Company",
-                    role: ROLE_MAP[name] || null,
-                    meetings: []
-                })
-            }
-
-            const client = clientsMap.get(id)
-            client.meetings.push({
-                id: s.session_id,
-                date: new Date(s.start_time_ms),
-                isSuccessful: s.status === "analyzed" || s.status === "completed"
-            })
-        }
-
-        return Array.from(clientsMap.values())
+        const res = await fetch(`${API_BASE_URL}/clients`, { cache: "no-store" })
+        if (!res.ok) throw new Error("Failed to fetch clients")
+        const clients: API_ClientSummary[] = await res.json()
+
+        return clients.map((c) => ({
+            id: c.id,
+            name: c.name,
+            company: COMPANY_MAP[c.name] || "Unknown Company",
+            role: ROLE_MAP[c.name] || null,
+            meetings: c.meetings,
+            successful: c.successful,
+            streak: c.streak,
+            lastMeeting: c.last_meeting_ms != null ? new Date(c.last_meeting_ms) : null,
+        }))
     } catch (e) {
         console.error(e)
         return []
@@ -90,17 +81,27 @@ export async function fetchClientsForList() {
 
 // ─── Client Profile Data ──────────────────────────────────────────────
 
+export type API_ClientMeeting = API_Session & {
+    insights: API_Insight[]
+    transcript: { start_ms: number; end_ms: number; speaker: string; text: string }[]
+    emotions: { offset_ms: number; emotion_score: number | null; engagement: number | null }[]
+}
+
+export type API_Client = {
+    id: string
+    name: string
+    meetings: API_ClientMeeting[]
+}
+
 export async function fetchClientDetails(id: string) {
     try {
-        const res = await fetch(`${API_BASE_URL}/sessions`, { cache: "no-store", next: { revalidate: 0 } })
-        if (!res.ok) throw new Error("Failed to fetch sessions")
-        const allSessions: API_Session[] = await res.json()
-
-        // Filter sessions by slug ID
-        const clientSessions = allSessions.filter(s => getSlug(s.customer_name || "Unknown Client") === id)
-        if (clientSessions.length === 0) return null
+        // One round trip: meetings, insights, transcripts and emotion series
+        const res = await fetch(`${API_BASE_URL}/clients/${encodeURIComponent(id)}`, { cache: "no-store", next: { revalidate: 0 } })
+        if (res.status === 404) return null
+        if (!res.ok) throw new Error("Failed to fetch client")
+        const data: API_Client = await res.json()
 
-        const name = clientSessions[0].customer_name || "Unknown Client"
+        const name = data.name
 
         const client = {
             id,
@@ -110,47 +111,29 @@ export async function fetchClientDetails(id: string) {
             meetings: [] as any[]
         }
 
-        // Fetch details for each session concurrently
-        const meetingPromises = clientSessions.map(async (s) => {
-            const sid = s.session_id
+        client.meetings = data.meetings.map((s) => {
+            const insights = s.insights
 
-            let timeline: API_TranscriptSegment[] = []
-            let insights: API_Insight[] = []
-
-            // Try fetching timeline & insights (fail gracefully if not found)
-            try {
-                const tlRes = await fetch(`${API_BASE_URL}/sessions/${sid}/timeline`, { cache: "no-store" })
-                if (tlRes.ok) timeline = await tlRes.json()
-            } catch (e) { }
-
-            try {
-                const inRes = await fetch(`${API_BASE_URL}/sessions/${sid}/insights`, { cache: "no-store" })
-                if (inRes.ok) insights = await inRes.json()
-            } catch (e) { }
-
-            // Map timeline to transcripts and emotions
-            const transcripts = timeline.map((seg, i) => ({
+            const transcripts = s.transcript.map((seg, i) => ({
                 id: `seg-${i}`,
                 offsetMs: seg.start_ms - s.start_time_ms,
                 speaker: seg.speaker.charAt(0).toUpperCase() + seg.speaker.slice(1), // "seller" -> "Seller"
                 text: seg.text
             }))
 
-            const emotions = timeline
-                .filter(seg => seg.physiology)
-                .map((seg, i) => {
-                    const score = seg.physiology?.emotion_score || 0
-                    let label = "Neutral"
-                    if (score > 0.3) label = "Happiness"
-                    else if (score < -0.3) label = "Frustration"
-
-                    return {
-                        id: `emo-${i}`,
-                        offsetMs: seg.start_ms - s.start_time_ms,
-                        engagement: seg.physiology?.engagement || Math.random() * 0.4 + 0.4, // Fallback
-                        emotionLabel: label
-                    }
-                })
+            const emotions = s.emotions.map((point, i) => {
+                const score = point.emotion_score || 0
+                let label = "Neutral"
+                if (score > 0.3) label = "Happiness"
+                else if (score < -0.3) label = "Frustration"
+
+                return {
+                    id: `emo-${i}`,
+                    offsetMs: point.offset_ms,
+                    engagement: point.engagement ?? 0,
+                    emotionLabel: label
+                }
+            })
 
             // Extract summary and feedback from insights
             const summary = insights.find(i => i.insight_type === "summary")?.body || null
@@ -172,9 +155,7 @@ export async function fetchClientDetails(id: string) {
             }
         })
 
-        client.meetings = await Promise.all(meetingPromises)
-        client.meetings.sort((a, b) => b.date.getTime() - a.date.getTime())
-
+        // Already newest first from the API
         return client
     } catch (e) {
         console.error(e)
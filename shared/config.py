@@ -28,6 +28,16 @@ ELEVENLABS_STT_MODEL = "scribe_v2"               # Batch (post-call, has speaker
 ELEVENLABS_STT_REALTIME_MODEL = "scribe_v2_realtime"  # Realtime WebSocket (150ms latency)
 ELEVENLABS_STT_WS_URL = "wss://api.elevenlabs.io/v1/speech-to-text/realtime"
 ELEVENLABS_STT_SAMPLE_RATE = 16000
+REALTIME_MAX_BUFFER_S = 120     # Uncommitted audio kept for replay after a reconnect
+REALTIME_RECONNECT_MAX_S = 10   # Cap on the (jittered, exponential) reconnect delay
+REALTIME_FINAL_RETRIES = 5      # Reconnects without progress after capture ends, before giving up
+
+# Batch STT splits long recordings into chunks transcribed in parallel
+# (transcription/chunked_stt.py). Cuts land in the quietest spot near each target.
+STT_CHUNK_SECONDS = 300         # Target chunk length
+STT_SPLIT_SEARCH_S = 20         # How far from the target to look for a pause
+STT_CHUNK_OVERLAP_S = 10        # Extra audio sent on each side, used to line up speaker labels
+STT_MAX_PARALLEL = int(os.getenv("STT_MAX_PARALLEL", "4"))
 
 # ─── Presage Config ─────────────────────────────────────────
 PRESAGE_CAMERA_INDEX = 0        # Default webcam. Change if using external camera.
@@ -37,6 +47,43 @@ PRESAGE_METRICS_INTERVAL_MS = 1000  # How often Presage emits metrics (~1/sec)
 CLAUDE_MODEL = "claude-sonnet-4-5-20250514"
 CLAUDE_MAX_TOKENS = 4096
 
+# Responses are cached on disk by a hash of the prompts, timeline, model and
+# max_tokens, so re-running an unchanged session doesn't call Claude again.
+# Set CLAUDE_CACHE_ENABLED=0 (or pass --no-cache) to always call the API.
+CLAUDE_CACHE_ENABLED = os.getenv("CLAUDE_CACHE_ENABLED", "1") != "0"
+CLAUDE_CACHE_DIR = PROJECT_ROOT / os.getenv("CLAUDE_CACHE_DIR", "insights-engine/data/claude_cache")
+CLAUDE_CACHE_MAX_BYTES = 50 * 1024 * 1024   # Least recently used entries go first
+
+# Long sessions are analyzed map-reduce style: the timeline is cut into
+# chunks of about this many prompt tokens (on speaker-turn boundaries),
+# the chunks are analyzed in parallel, and one last call merges them.
+ANALYSIS_CHUNK_TOKENS = int(os.getenv("ANALYSIS_CHUNK_TOKENS", "12000"))
+ANALYSIS_CHUNK_CONCURRENCY = int(os.getenv("ANALYSIS_CHUNK_CONCURRENCY", "4"))  # Parallel chunk calls per session
+
+# insights-engine/src/batch_analyze.py (re-scoring many sessions at once).
+# Keep these under the account's Anthropic rate limits.
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))             # Claude calls in flight
+BATCH_REQUESTS_PER_MINUTE = int(os.getenv("BATCH_REQUESTS_PER_MINUTE", "50"))
+BATCH_INPUT_TOKENS_PER_MINUTE = int(os.getenv("BATCH_INPUT_TOKENS_PER_MINUTE", "400000"))
+BATCH_MAX_RETRIES = 5           # Per call, on 429 / 5xx / connection errors
+
 # ─── API Server ─────────────────────────────────────────────
 API_HOST = os.getenv("API_HOST", "127.0.0.1")
 API_PORT = int(os.getenv("API_PORT", "8000"))
+
+# ─── Metrics (GET /metrics) ─────────────────────────────────
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", "1000"))    # Slower requests are logged + counted
+# GET /debug/profile samples every thread's stack; off unless asked for.
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0") == "1"
+PROFILER_MAX_SECONDS = 60
+
+# ─── Live Feed (GET /sessions/{id}/live) ────────────────────
+# The server checks the DB once per interval for ALL viewers combined,
+# so more viewers doesn't mean more DB reads.
+LIVE_POLL_INTERVAL_MS = int(os.getenv("LIVE_POLL_INTERVAL_MS", "1000"))
+LIVE_MOOD_WINDOW_MS = 10_000    # mood_timeseries resolution kept up to date by physiology ingest
+
+# ─── Analysis Jobs ──────────────────────────────────────────
+# POST /sessions/{id}/stop queues analysis; this many worker threads run it.
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))
+ANALYSIS_MAX_ATTEMPTS = 3       # Jobs interrupted by a restart are retried up to this many times
@@ -0,0 +1,386 @@
+"""
+shared/metrics.py — In-process counters and histograms, exported in Prometheus text format.
+
+The api-server serves REGISTRY.render() at GET /metrics. Anything in the
+same process can record into it: db_manager and timeline_builder functions
+are wrapped by instrument_module(), and the analyzer records Claude
+latency and token counts.
+
+Per request, the time spent inside instrumented DB calls and inside the
+timeline merge (excluding its own DB calls) is also summed into a
+RequestTimings held in a contextvar. The api-server middleware starts one
+per request; FastAPI runs sync endpoints and streaming generators in worker
+threads with the request's context copied over, so calls made there still
+add to the right request.
+
+No prometheus_client dependency: the text format is simple, and the handful
+of metric types needed here are below.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+# Seconds. Covers a cached SQLite read (~1 ms) up to a long Claude call.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_str(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._series: dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = list(self._series.items())
+        for key, value in sorted(series):
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key: tuple, value) -> list[str]:
+        return [f"{self.name}{_label_str(self.labels, key)} {_fmt(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def _render_series(self, key: tuple, value) -> list[str]:
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            le = 'le="%s"' % _fmt(bound)
+            lines.append(f"{self.name}_bucket{_label_str(self.labels, key, le)} {cumulative}")
+        inf = 'le="+Inf"'
+        lines.append(f"{self.name}_bucket{_label_str(self.labels, key, inf)} {count}")
+        lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {_fmt(total)}")
+        lines.append(f"{self.name}_count{_label_str(self.labels, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            # Re-registering returns the existing metric (module reloads, repeated imports)
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, labels: tuple = ()) -> Counter:
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: tuple = ()) -> Gauge:
+        return self._add(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ─── Metrics ────────────────────────────────────────────────
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "saleslens_http_request_duration_seconds",
+    "Time from request start to the last body byte sent",
+    ("method", "route", "status"),
+)
+HTTP_PHASE_SECONDS = REGISTRY.histogram(
+    "saleslens_http_request_phase_seconds",
+    "Request time split into db (instrumented db_manager calls), timeline_merge "
+    "(timeline_builder excluding its DB calls) and other (serialization, framework)",
+    ("route", "phase"),
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge("saleslens_http_requests_in_flight", "Requests currently being served")
+SLOW_REQUESTS = REGISTRY.counter("saleslens_http_slow_requests_total", "Requests slower than SLOW_REQUEST_MS", ("route",))
+
+FUNCTION_SECONDS = REGISTRY.histogram(
+    "saleslens_function_duration_seconds",
+    "Time inside instrumented functions (db_manager queries, timeline merge)",
+    ("module", "function"),
+)
+FUNCTION_ROWS = REGISTRY.counter(
+    "saleslens_function_rows_total",
+    "Rows returned by instrumented functions (list length, or rows yielded)",
+    ("module", "function"),
+)
+FUNCTION_ERRORS = REGISTRY.counter(
+    "saleslens_function_errors_total", "Exceptions raised by instrumented functions", ("module", "function"),
+)
+
+CLAUDE_SECONDS = REGISTRY.histogram(
+    "saleslens_claude_request_duration_seconds", "Latency of one Claude messages.create call", ("prompt",),
+)
+CLAUDE_TOKENS = REGISTRY.counter(
+    "saleslens_claude_tokens_total", "Claude tokens, by direction (input/output)", ("direction",),
+)
+CLAUDE_CACHE = REGISTRY.counter(
+    "saleslens_claude_cache_requests_total", "Response cache lookups, by result (hit/miss)", ("result",),
+)
+ANALYSIS_SECONDS = REGISTRY.histogram(
+    "saleslens_analysis_duration_seconds", "Wall time of analyze_session, by outcome", ("status",),
+)
+ANALYSIS_TOKENS = REGISTRY.histogram(
+    "saleslens_analysis_tokens",
+    "Claude tokens used by one analysis (all its calls), by direction",
+    ("direction",),
+    buckets=(1_000, 5_000, 10_000, 25_000, 50_000, 100_000, 200_000, 500_000),
+)
+
+
+# ─── Per-request timings ────────────────────────────────────
+
+@dataclass
+class RequestTimings:
+    db: float = 0.0
+    timeline_merge: float = 0.0
+
+
+current_request: ContextVar[RequestTimings | None] = ContextVar("saleslens_request_timings", default=None)
+
+# Modules whose time (minus the DB calls inside them) counts as timeline_merge;
+# every other instrumented module counts as db.
+MERGE_PHASE_MODULES = {"timeline_builder"}
+
+# Instrumented calls active on this thread, per phase. Only the outermost
+# call of a phase adds to the request's total, so helpers calling helpers
+# aren't counted twice.
+_active = threading.local()
+
+
+def _enter(phase: str) -> bool:
+    depth = getattr(_active, phase, 0)
+    setattr(_active, phase, depth + 1)
+    return depth == 0
+
+
+def _leave(phase: str):
+    setattr(_active, phase, getattr(_active, phase) - 1)
+
+
+def _row_count(result) -> int | None:
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict):
+        return 1
+    return None
+
+
+def _timed(func, module: str):
+    name = func.__name__
+    phase = "timeline_merge" if module in MERGE_PHASE_MODULES else "db"
+
+    def add_to_request(timings: RequestTimings | None, outermost: bool, elapsed: float, db_before: float):
+        if timings is None or not outermost:
+            return
+        if phase == "db":
+            timings.db += elapsed
+        else:
+            timings.timeline_merge += max(0.0, elapsed - (timings.db - db_before))
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def gen_wrapper(*args, **kwargs):
+            # Only time spent producing rows counts, not the consumer's time between them.
+            # Each step may run on a different worker thread (streaming responses).
+            gen = func(*args, **kwargs)
+            elapsed, rows = 0.0, 0
+            try:
+                while True:
+                    timings = current_request.get()
+                    db_before = timings.db if timings else 0.0
+                    outermost = _enter(phase)
+                    start = time.perf_counter()
+                    try:
+                        item = next(gen)
+                    except StopIteration:
+                        return
+                    finally:
+                        step = time.perf_counter() - start
+                        _leave(phase)
+                        elapsed += step
+                        add_to_request(timings, outermost, step, db_before)
+                    rows += 1
+                    yield item
+            except Exception:
+                FUNCTION_ERRORS.inc(module=module, function=name)
+                raise
+            finally:
+                gen.close()
+                FUNCTION_SECONDS.observe(elapsed, module=module, function=name)
+                if rows:
+                    FUNCTION_ROWS.inc(rows, module=module, function=name)
+
+        gen_wrapper.__metrics_wrapped__ = True
+        return gen_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        timings = current_request.get()
+        db_before = timings.db if timings else 0.0
+        outermost = _enter(phase)
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            FUNCTION_ERRORS.inc(module=module, function=name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            _leave(phase)
+            FUNCTION_SECONDS.observe(elapsed, module=module, function=name)
+            add_to_request(timings, outermost, elapsed, db_before)
+
+        rows = _row_count(result)
+        if rows:
+            FUNCTION_ROWS.inc(rows, module=module, function=name)
+        return result
+
+    wrapper.__metrics_wrapped__ = True
+    return wrapper
+
+
+# Connection plumbing and context managers: not queries, and wrapping a
+# @contextmanager would hide it from `with`.
+_SKIP = {"reader", "streaming_reader", "transaction", "get_connection_manager", "close_connections"}
+
+
+def instrument_module(module, names=None) -> list[str]:
+    """
+    Replace the module's public functions (or just `names`) with timed
+    wrappers, in place, so callers going through `module.func` — including
+    the module's own internal calls — are measured. Idempotent.
+    Returns the names wrapped.
+    """
+    label = module.__name__.rsplit(".", 1)[-1]
+    if names is None:
+        names = [
+            n for n, obj in vars(module).items()
+            if inspect.isfunction(obj) and obj.__module__ == module.__name__
+            and not n.startswith("_") and n not in _SKIP
+        ]
+    wrapped = []
+    for n in names:
+        func = getattr(module, n)
+        if getattr(func, "__metrics_wrapped__", False):
+            continue
+        setattr(module, n, _timed(func, label))
+        wrapped.append(n)
+    return wrapped
+
+
+# ─── Claude ─────────────────────────────────────────────────
+# Token usage per analysis: each call adds to its session's tally, and
+# analysis_finished() turns the tally into one ANALYSIS_TOKENS observation.
+# Keyed by session id because a chunked analysis makes its calls from
+# several threads.
+
+_analysis_tokens: dict[str, list[int]] = {}
+_analysis_lock = threading.Lock()
+
+
+def claude_call(session_id: str, prompt: str, seconds: float, usage):
+    """Record one Claude call; `usage` is the response's usage object (or None)."""
+    CLAUDE_SECONDS.observe(seconds, prompt=prompt)
+    input_tokens = getattr(usage, "input_tokens", 0) or 0
+    output_tokens = getattr(usage, "output_tokens", 0) or 0
+    CLAUDE_TOKENS.inc(input_tokens, direction="input")
+    CLAUDE_TOKENS.inc(output_tokens, direction="output")
+    with _analysis_lock:
+        tally = _analysis_tokens.setdefault(session_id, [0, 0])
+        tally[0] += input_tokens
+        tally[1] += output_tokens
+
+
+def analysis_finished(session_id: str, seconds: float, ok: bool):
+    ANALYSIS_SECONDS.observe(seconds, status="ok" if ok else "error")
+    with _analysis_lock:
+        tally = _analysis_tokens.pop(session_id, None)
+    if tally and any(tally):
+        ANALYSIS_TOKENS.observe(tally[0], direction="input")
+        ANALYSIS_TOKENS.observe(tally[1], direction="output")
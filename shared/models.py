@@ -64,6 +64,27 @@ class PhysiologyEvent(BaseModel):
     raw_json: Optional[str] = None             # Full Presage output for debugging
 
 
+class PhysiologyBatch(BaseModel):
+    """
+    Written by: capture clients (POST /sessions/{id}/physiology:batch)
+    Read by: api-server
+
+    Column-oriented batch of PhysiologyEvent rows for one session: one
+    timestamp_ms array plus one array per field, all the same length.
+    Fields that weren't measured can be left out entirely; null entries
+    mean "no data" for that sample.
+    """
+    timestamp_ms: list[int]
+    heart_rate: Optional[list[Optional[float]]] = None
+    hrv: Optional[list[Optional[float]]] = None
+    breathing_rate: Optional[list[Optional[float]]] = None
+    phasic: Optional[list[Optional[float]]] = None
+    emotion_score: Optional[list[Optional[float]]] = None
+    engagement: Optional[list[Optional[float]]] = None
+    blink_rate: Optional[list[Optional[float]]] = None
+    is_talking: Optional[list[Optional[bool]]] = None
+
+
 class TranscriptSegment(BaseModel):
     """
     Written by: transcription (ElevenLabs)
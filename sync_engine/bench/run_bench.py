@@ -0,0 +1,222 @@
+"""
+sync_engine/bench/run_bench.py — Latency + peak-memory benchmarks for the sync-engine hot paths.
+
+Generates one synthetic session per size (synth_data.py, fixed seed) into a
+scratch DB, then times each case against each session:
+
+    apply_speaker_map      db_manager.apply_speaker_map_to_segments
+    remap_speakers         db_manager.set_speaker_map, swapping seller/customer each run
+    build_timeline         timeline_builder.build_timeline (full re-merge)
+    get_timeline_cold      timeline_builder.get_timeline after clear_timeline_entries
+    get_timeline_warm      timeline_builder.get_timeline, already materialized
+    mood_timeseries        db_manager.compute_and_write_mood_timeseries (10 s windows)
+    api_timeline           GET /sessions/{id}/timeline
+    api_timeline_window    GET /sessions/{id}/timeline?from_ms&to_ms (60 s)
+    api_physiology         GET /sessions/{id}/physiology
+    api_physiology_f32     GET /sessions/{id}/physiology as packed float32
+    api_transcript         GET /sessions/{id}/transcript
+
+Latency is the median (and min) of --repeat timed runs after one warm-up.
+Peak memory is measured in a separate run under tracemalloc (Python + NumPy
+allocations, not SQLite's page cache), so it doesn't skew the timings.
+
+Results can be saved as a named baseline and later runs compared against it;
+a case slower than the baseline by more than --threshold is flagged and the
+exit status is 1, so this can gate a CI job.
+
+Usage:
+    python sync_engine/bench/run_bench.py                          # 15m, 2h, 8h
+    python sync_engine/bench/run_bench.py --sizes 15m 2h --repeat 3
+    python sync_engine/bench/run_bench.py --save main
+    python sync_engine/bench/run_bench.py --compare main --threshold 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+BASELINE_DIR = BENCH_DIR / "baselines"
+SIZES = {"15m": 15 * 60, "2h": 2 * 3600, "8h": 8 * 3600}
+SEED = 1234
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark sync-engine hot paths on synthetic sessions")
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES))
+    parser.add_argument("--cases", nargs="+", help="Only run these cases (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (default: 5)")
+    parser.add_argument("--db", help="Scratch DB path (default: a new temp file)")
+    parser.add_argument("--save", metavar="NAME", help="Save results as baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="Compare against baselines/NAME.json")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Flag cases this much slower than the baseline (default: 0.2 = +20%%)")
+    return parser.parse_args()
+
+
+args = _parse_args()
+db_file = Path(args.db) if args.db else Path(tempfile.mkdtemp(prefix="saleslens-bench-")) / "bench.db"
+if db_file.exists():
+    raise SystemExit(f"{db_file} already exists; benchmarks need a fresh DB")
+
+# db_manager / the api-server read DB_PATH once, at import time.
+os.environ["DB_PATH"] = str(db_file.resolve())
+
+sys.path.insert(0, str(BENCH_DIR.parent.parent))
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+sys.path.insert(0, str(BENCH_DIR.parent.parent / "api-server"))
+sys.path.insert(0, str(BENCH_DIR))
+
+import db_manager
+import timeline_builder
+from synth_data import generate
+
+
+# ─── Cases ──────────────────────────────────────────────────
+# Each case: (setup, run). setup() runs before every measured call, untimed.
+
+def _cases(session: dict, client) -> dict:
+    sid = session["session_id"]
+    db = os.environ["DB_PATH"]
+    mid = (session["start_time_ms"] + session["end_time_ms"]) // 2
+    nothing = lambda: None
+    swapped = [False]
+
+    def remap():
+        swapped[0] = not swapped[0]
+        roles = ("customer", "seller") if swapped[0] else ("seller", "customer")
+        return db_manager.set_speaker_map(sid, {"spk_0": roles[0], "spk_1": roles[1]})
+
+    def get(path, **kwargs):
+        def run():
+            response = client.get(path, **kwargs)
+            response.raise_for_status()
+            return len(response.content)
+        return run
+
+    return {
+        "apply_speaker_map": (nothing, lambda: db_manager.apply_speaker_map_to_segments(db, sid)),
+        "remap_speakers": (nothing, remap),
+        "build_timeline": (nothing, lambda: timeline_builder.build_timeline(sid)),
+        "get_timeline_cold": (lambda: db_manager.clear_timeline_entries(sid),
+                              lambda: timeline_builder.get_timeline(sid)),
+        "get_timeline_warm": (nothing, lambda: timeline_builder.get_timeline(sid)),
+        "mood_timeseries": (nothing, lambda: db_manager.compute_and_write_mood_timeseries(db, sid, 10_000)),
+        "api_timeline": (nothing, get(f"/sessions/{sid}/timeline")),
+        "api_timeline_window": (nothing, get(f"/sessions/{sid}/timeline",
+                                             params={"from_ms": mid, "to_ms": mid + 60_000})),
+        "api_physiology": (nothing, get(f"/sessions/{sid}/physiology")),
+        "api_physiology_f32": (nothing, get(f"/sessions/{sid}/physiology",
+                                            headers={"Accept": "application/x-saleslens-physio-f32"})),
+        "api_transcript": (nothing, get(f"/sessions/{sid}/transcript")),
+    }
+
+
+def _measure(setup, run, repeat: int) -> dict:
+    setup()
+    run()                                   # warm-up: statement cache, page cache, imports
+
+    times = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    setup()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "min_ms": round(min(times) * 1000, 3),
+        "peak_mb": round(peak / 2**20, 3),
+    }
+
+
+# ─── Reporting ──────────────────────────────────────────────
+
+def _print_table(results: dict, baseline: dict | None, threshold: float) -> list[str]:
+    regressions = []
+    header = f"{'case':<22}{'size':>6}{'median ms':>12}{'min ms':>10}{'peak MB':>10}"
+    if baseline:
+        header += f"{'base ms':>10}{'Δ':>9}"
+    print(header)
+    print("─" * len(header))
+
+    for key, r in results.items():
+        case, size = key.split("@")
+        line = f"{case:<22}{size:>6}{r['median_ms']:>12.2f}{r['min_ms']:>10.2f}{r['peak_mb']:>10.2f}"
+        base = (baseline or {}).get(key)
+        if base:
+            change = r["median_ms"] / base["median_ms"] - 1 if base["median_ms"] else 0.0
+            flag = ""
+            if change > threshold:
+                flag = "  ⚠️"
+                regressions.append(key)
+            line += f"{base['median_ms']:>10.2f}{change:>+9.0%}{flag}"
+        print(line)
+    return regressions
+
+
+def main():
+    from fastapi.testclient import TestClient
+    from src.app import app
+
+    print(f"[bench] generating {', '.join(args.sizes)} sessions (seed {SEED}) into {db_file} ...")
+    start = time.perf_counter()
+    session_ids = generate(str(db_file), [SIZES[s] for s in args.sizes], seed=SEED, prefix="bench")
+    print(f"[bench] generated in {time.perf_counter() - start:.1f}s")
+
+    client = TestClient(app)                # no `with`: skip lifespan, no analysis workers
+    results = {}
+    for size, session_id in zip(args.sizes, session_ids):
+        session = db_manager.get_session(session_id)
+        for case, (setup, run) in _cases(session, client).items():
+            if args.cases and case not in args.cases:
+                continue
+            results[f"{case}@{size}"] = _measure(setup, run, args.repeat)
+            print(f"[bench] {case} @ {size}: {results[f'{case}@{size}']['median_ms']:.2f} ms")
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())["results"]
+
+    print()
+    regressions = _print_table(results, baseline, args.threshold)
+
+    if args.save:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        out = BASELINE_DIR / f"{args.save}.json"
+        out.write_text(json.dumps({
+            "created_at_ms": int(time.time() * 1000),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.platform(),
+            "repeat": args.repeat,
+            "seed": SEED,
+            "results": results,
+        }, indent=2) + "\n")
+        print(f"\n[bench] saved baseline {out}")
+
+    db_manager.close_connections()
+    if regressions:
+        print(f"\n[bench] {len(regressions)} case(s) slower than baseline by >{args.threshold:.0%}: "
+              + ", ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+sync_engine/bench/synth_data.py — Deterministic synthetic sessions for benchmarks and demos.
+
+Fills a SQLite file (created from schema.sql) with sessions that look like
+real recordings:
+
+  - physiology_events at 1 Hz: heart rate, HRV, breathing, phasic, emotion
+    and engagement as slow random walks within their real ranges, blink
+    rate, is_talking from the customer's turns, and a Presage-sized raw_json
+  - transcript_segments as alternating seller / customer turns of 1-4
+    utterances, utterance lengths log-normal around ~3.5 s (~2.5 words/s),
+    short pauses and the odd overlap; speaker is left 'unknown' and the
+    diarization label ("spk_0" / "spk_1") is in speaker_label and raw_json,
+    as after STT
+  - a speaker_map row per label, so apply_speaker_map_to_segments has work
+
+Same seed + same arguments = byte-for-byte the same rows.
+
+Usage:
+    python sync_engine/bench/synth_data.py --db /tmp/synth.db --sessions 20 --minutes 60
+    python sync_engine/bench/synth_data.py --db /tmp/synth.db --minutes 15 120 480 --seed 7
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+from init_db import init_db
+
+BASE_START_MS = 1_767_258_000_000       # 2026-01-01 09:00 UTC; session i starts i days later
+CUSTOMERS = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises"]
+WORDS = (
+    "we the pricing budget contract renewal onboarding integration security team timeline "
+    "deadline discount support migration data users seats license quarter approval legal "
+    "procurement pilot rollout dashboard report feature roadmap question concern great sure "
+    "think need want could would maybe actually really next week call follow up send"
+).split()
+SPEAKER_LABELS = ("spk_0", "spk_1")     # spk_0 = seller, spk_1 = customer
+
+
+def _random_walk(rng: np.random.Generator, n: int, start: float, step: float, lo: float, hi: float,
+                 pull: float = 0.01) -> np.ndarray:
+    """Mean-reverting walk (pulled toward `start`), clipped to [lo, hi]."""
+    out = np.empty(n)
+    x = start
+    noise = rng.normal(0.0, step, n)
+    for i in range(n):
+        x += noise[i] + pull * (start - x)
+        x = min(max(x, lo), hi)
+        out[i] = x
+    return out
+
+
+def _utterances(rng: np.random.Generator, duration_ms: int) -> list[tuple[int, int, int]]:
+    """(start_offset_ms, end_offset_ms, speaker_index) in time order, until duration_ms."""
+    out = []
+    t = int(rng.integers(500, 3000))
+    speaker = 0
+    while True:
+        for _ in range(int(rng.integers(1, 5))):
+            length = int(np.clip(rng.lognormal(np.log(3500), 0.6), 400, 30_000))
+            if t + length > duration_ms:
+                return out
+            out.append((t, t + length, speaker))
+            t += length + int(rng.integers(100, 600))
+        speaker = 1 - speaker
+        gap = int(rng.integers(200, 1500))
+        if rng.random() < 0.05:
+            gap = -int(rng.integers(200, 800))      # talking over each other
+        t = max(out[-1][0] + 1, out[-1][1] + gap)
+
+
+def generate_session(
+    conn: sqlite3.Connection,
+    session_id: str,
+    start_ms: int,
+    duration_s: int,
+    rng: np.random.Generator,
+    customer_name: str | None = None,
+):
+    """Insert one finished session (sessions + physiology + transcript + speaker_map)."""
+    n = int(duration_s)
+    end_ms = start_ms + n * 1000
+    conn.execute(
+        "INSERT INTO sessions(session_id, customer_name, start_time_ms, end_time_ms, status) "
+        "VALUES (?, ?, ?, ?, 'completed')",
+        (session_id, customer_name, start_ms, end_ms),
+    )
+
+    utterances = _utterances(rng, n * 1000)
+    talking = np.zeros(n, dtype=bool)
+    for seg_start, seg_end, speaker in utterances:
+        if speaker == 1:
+            talking[seg_start // 1000: seg_end // 1000 + 1] = True
+
+    timestamps = start_ms + np.arange(n, dtype=np.int64) * 1000 + rng.integers(0, 40, n)
+    heart_rate = _random_walk(rng, n, 74.0, 0.6, 50.0, 140.0)
+    hrv = _random_walk(rng, n, 45.0, 1.0, 10.0, 120.0)
+    breathing = _random_walk(rng, n, 14.0, 0.2, 6.0, 30.0)
+    phasic = _random_walk(rng, n, 0.0, 0.05, -2.0, 2.0)
+    emotion = np.tanh(_random_walk(rng, n, 0.1, 0.05, -3.0, 3.0))
+    engagement = 1.0 / (1.0 + np.exp(-_random_walk(rng, n, 0.5, 0.05, -4.0, 4.0)))
+    blink = np.clip(rng.normal(15.0, 4.0, n), 0.0, None)
+
+    rows = []
+    for i in range(n):
+        values = (round(heart_rate[i], 1), round(hrv[i], 1), round(breathing[i], 1), round(phasic[i], 3),
+                  round(emotion[i], 3), round(engagement[i], 3), round(blink[i], 1), int(talking[i]))
+        raw = json.dumps({
+            "hr": values[0], "hrv": values[1], "br": values[2], "phasic": values[3],
+            "emotion": values[4], "engagement": values[5], "blink": values[6], "talking": bool(values[7]),
+        })
+        rows.append((session_id, int(timestamps[i]), *values, raw))
+    conn.executemany(
+        """
+        INSERT INTO physiology_events(
+            session_id, timestamp_ms, heart_rate, hrv, breathing_rate, phasic,
+            emotion_score, engagement, blink_rate, is_talking, raw_json
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+
+    segments = []
+    for seg_start, seg_end, speaker in utterances:
+        words = max(1, round((seg_end - seg_start) / 400))
+        text = " ".join(rng.choice(WORDS, size=words)).capitalize() + "."
+        label = SPEAKER_LABELS[speaker]
+        segments.append((
+            session_id, start_ms + seg_start, start_ms + seg_end, text,
+            round(float(rng.uniform(0.8, 0.99)), 3),
+            json.dumps({"speaker_label": label, "text": text}),
+            label,
+        ))
+    conn.executemany(
+        """
+        INSERT INTO transcript_segments(
+            session_id, timestamp_start_ms, timestamp_end_ms, speaker, text, confidence, raw_json, speaker_label
+        ) VALUES (?, ?, ?, 'unknown', ?, ?, ?, ?)
+        """,
+        segments,
+    )
+
+    conn.executemany(
+        "INSERT INTO speaker_map(session_id, diar_label, role) VALUES (?, ?, ?)",
+        [(session_id, SPEAKER_LABELS[0], "seller"), (session_id, SPEAKER_LABELS[1], "customer")],
+    )
+
+
+def generate(db_path: str, durations_s: list[int], seed: int = 0, prefix: str = "synth") -> list[str]:
+    """
+    Create/extend db_path with one session per entry in durations_s.
+    Returns the session ids ("<prefix>-<i>"), in order.
+    """
+    init_db(db_path)
+    rng = np.random.default_rng(seed)
+    session_ids = []
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            for i, duration_s in enumerate(durations_s):
+                session_id = f"{prefix}-{i}"
+                generate_session(
+                    conn, session_id, BASE_START_MS + i * 86_400_000, duration_s, rng,
+                    customer_name=CUSTOMERS[i % len(CUSTOMERS)],
+                )
+                session_ids.append(session_id)
+    finally:
+        conn.close()
+    return session_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic SalesLens sessions")
+    parser.add_argument("--db", required=True, help="SQLite file to create or extend")
+    parser.add_argument("--minutes", type=float, nargs="+", default=[60],
+                        help="Session length(s) in minutes; one session per value (cycled with --sessions)")
+    parser.add_argument("--sessions", type=int, help="Number of sessions (default: one per --minutes value)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--prefix", default="synth", help="Session id prefix")
+    args = parser.parse_args()
+
+    count = args.sessions or len(args.minutes)
+    durations = [int(args.minutes[i % len(args.minutes)] * 60) for i in range(count)]
+    ids = generate(args.db, durations, seed=args.seed, prefix=args.prefix)
+    print(f"[ok] {len(ids)} session(s) written to {args.db}: {ids[0]} … {ids[-1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,160 +1,1538 @@
+import json
 import os
+import re
+import sys
 import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
-import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from shared.config import DB_PATH
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from physiology_windows import bucket_sums
+
+
+# ─────────────────────────────────────────────────────────────
+# Connections
+# ─────────────────────────────────────────────────────────────
+#
+# Opening a connection and re-issuing the PRAGMAs on every call costs more
+# than the queries themselves, so connections are opened once per DB file
+# and reused:
+#   - readers: one connection per thread (sqlite3 connections aren't shared)
+#   - writer:  one connection per DB file, serialized with a lock, since
+#              SQLite only allows one writer at a time anyway
+#
+# Every helper goes through `reader()` or `transaction()`:
+#
+#     with db_manager.transaction() as conn:
+#         conn.execute("UPDATE ...")
+#         conn.execute("INSERT ...")      # both commit together
+#
+# Helpers called inside an open transaction on the same thread join it
+# instead of committing on their own.
+
+STATEMENT_CACHE_SIZE = 256
+
+
+class ConnectionManager:
+    """Per-thread reader connections + one shared writer for a single DB file."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._readers: list[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._writer: sqlite3.Connection | None = None
+        self._writer_lock = threading.RLock()
+        self._writer_depth = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: we issue BEGIN/COMMIT ourselves in transaction()
+        conn = sqlite3.connect(
+            self.db_path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA busy_timeout=5000;")
+        return conn
+
+    def connect(self) -> sqlite3.Connection:
+        """A new, unpooled connection with the same settings. Caller closes it."""
+        return self._connect()
+
+    def reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+
+            # Nested use on the same thread joins the outer transaction.
+            if self._writer_depth:
+                self._writer_depth += 1
+                try:
+                    yield conn
+                finally:
+                    self._writer_depth -= 1
+                return
+
+            conn.execute("BEGIN IMMEDIATE")
+            self._writer_depth = 1
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute("COMMIT")
+            finally:
+                self._writer_depth = 0
+
+    def close(self):
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        self._local = threading.local()
+
+
+_managers: dict[str, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(db_path: str = DB_PATH) -> ConnectionManager:
+    """The shared ConnectionManager for a DB file (resolved via _normalize_db_path)."""
+    key = str(db_path)
+    manager = _managers.get(key)
+    if manager is None:
+        with _managers_lock:
+            resolved = _normalize_db_path(db_path)
+            manager = _managers.get(resolved)
+            if manager is None:
+                manager = _managers[resolved] = ConnectionManager(resolved)
+            _managers[key] = manager
+    return manager
+
+
+@contextmanager
+def reader(db_path: str = DB_PATH) -> Iterator[sqlite3.Connection]:
+    """This thread's read connection for db_path."""
+    yield get_connection_manager(db_path).reader()
+
+
+@contextmanager
+def streaming_reader(db_path: str = DB_PATH) -> Iterator[sqlite3.Connection]:
+    """
+    A dedicated read connection for a cursor that outlives one call (the
+    iter_* generators). Streaming responses resume generators on whatever
+    worker thread is free, so they can't hold this thread's pooled reader.
+    """
+    conn = get_connection_manager(db_path).connect()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def transaction(db_path: str = DB_PATH):
+    """Write transaction on the shared writer connection. Commits on exit, rolls back on error."""
+    return get_connection_manager(db_path).transaction()
+
+
+def close_connections():
+    """Close every pooled connection (app shutdown, tests)."""
+    with _managers_lock:
+        managers = set(_managers.values())
+        _managers.clear()
+    for manager in managers:
+        manager.close()
+
+
+SPEAKER_ROLES = ("seller", "customer")
+
+
+def upsert_speaker_map(db_path: str, session_id: str, seller_label: str, client_label: str):
+    """
+    Store diarization label -> role mapping in speaker_map.
+    seller_label/client_label are diarization labels like 'spk_0', 'spk_1'.
+    """
+    with transaction(db_path) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO speaker_map(session_id, diar_label, role) VALUES (?, ?, ?)",
+            [(session_id, seller_label, "seller"), (session_id, client_label, "customer")],
+        )
+
+
+def apply_speaker_map_to_segments(db_path: str, session_id: str) -> int:
+    """
+    Set transcript_segments.speaker from speaker_map, joined on the indexed
+    speaker_label column. Labels with no mapping go back to 'unknown';
+    segments without a label (realtime, no diarization) are left alone.
+    One UPDATE for the transcript and one for the materialized timeline,
+    whatever the session length. Returns the number of segments relabelled.
+    """
+    with transaction(db_path) as conn:
+        changed = conn.execute(
+            """
+            UPDATE transcript_segments
+            SET speaker = mapped.role
+            FROM (
+                SELECT t.id, COALESCE(m.role, 'unknown') AS role
+                FROM transcript_segments t
+                LEFT JOIN speaker_map m
+                  ON m.session_id = t.session_id AND m.diar_label = t.speaker_label
+                WHERE t.session_id = ? AND t.speaker_label IS NOT NULL
+            ) AS mapped
+            WHERE transcript_segments.id = mapped.id
+              AND transcript_segments.speaker <> mapped.role
+            """,
+            (session_id,),
+        ).rowcount
+        if changed:
+            _sync_timeline_speakers(conn, session_id)
+        return changed
+
+
+def _sync_timeline_speakers(conn: sqlite3.Connection, session_id: str):
+    """Carry re-mapped speakers over to the materialized timeline."""
+    conn.execute(
+        """
+        UPDATE timeline_entries
+        SET speaker = t.speaker
+        FROM transcript_segments t
+        WHERE t.id = timeline_entries.segment_id
+          AND timeline_entries.session_id = ?
+          AND timeline_entries.speaker IS NOT t.speaker
+        """,
+        (session_id,),
+    )
+
+
+def get_speaker_map(session_id: str, db_path: str = DB_PATH) -> list[dict]:
+    """
+    Every diarization label in the session with its segment count and mapped
+    role (None if unmapped). Counted from the (session_id, speaker_label)
+    index alone, so it's cheap even for long calls.
+    """
+    with reader(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT labels.speaker_label, labels.segments, m.role
+            FROM (
+                SELECT speaker_label, COUNT(*) AS segments
+                FROM transcript_segments
+                WHERE session_id = ? AND speaker_label IS NOT NULL
+                GROUP BY speaker_label
+            ) AS labels
+            LEFT JOIN speaker_map m
+              ON m.session_id = ? AND m.diar_label = labels.speaker_label
+            ORDER BY labels.speaker_label
+            """,
+            (session_id, session_id),
+        ).fetchall()
+    return [{"label": label, "segments": segments, "role": role} for label, segments, role in rows]
+
+
+def set_speaker_map(session_id: str, roles: dict[str, str], db_path: str = DB_PATH) -> int:
+    """
+    Replace a session's speaker map with roles ({diar_label: 'seller'|'customer'};
+    labels left out become unmapped) and re-map its transcript and timeline,
+    all in one transaction. The statement count doesn't depend on the number
+    of segments. session_stats is refreshed if the session already has a row,
+    since talk time per role changes. Returns the number of segments relabelled.
+    """
+    bad = sorted(role for role in set(roles.values()) if role not in SPEAKER_ROLES)
+    if bad:
+        raise ValueError(f"unknown speaker role(s): {', '.join(bad)}")
+
+    with transaction(db_path) as conn:
+        conn.execute("DELETE FROM speaker_map WHERE session_id = ?", (session_id,))
+        conn.executemany(
+            "INSERT INTO speaker_map(session_id, diar_label, role) VALUES (?, ?, ?)",
+            [(session_id, label, role) for label, role in roles.items()],
+        )
+        changed = apply_speaker_map_to_segments(db_path, session_id)
+        has_stats = conn.execute(
+            "SELECT 1 FROM session_stats WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if changed and has_stats:
+            refresh_session_stats(session_id, db_path=db_path)
+        return changed
+
+def _normalize_db_path(db_path: str) -> str:
+    if not db_path or not str(db_path).strip():
+        raise RuntimeError("db_path is empty")
+
+    p = Path(os.path.expandvars(os.path.expanduser(str(db_path).strip())))
+    if not p.is_absolute():
+        repo_root = Path(__file__).resolve().parents[2]
+        p = (repo_root / p).resolve()
+
+    p.parent.mkdir(parents=True, exist_ok=True)
+    return str(p)
+
+# ─────────────────────────────────────────────────────────────
+# Sessions + insights (api-server / insights-engine)
+# ─────────────────────────────────────────────────────────────
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def insert_session(db_path: str, session_id: str, start_time_ms: int, customer_name: str = None, notes: str = None):
+    """Insert a session row with a known id (capture modules). No-op if it already exists."""
+    with transaction(db_path) as conn:
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO sessions(session_id, customer_name, start_time_ms, notes)
+            VALUES (?, ?, ?, ?)
+            """,
+            (session_id, customer_name, int(start_time_ms), notes),
+        )
+
+
+def create_session(customer_name: str = None, notes: str = None, db_path: str = DB_PATH) -> str:
+    """Create a new recording session starting now. Returns the new session_id."""
+    session_id = uuid.uuid4().hex[:12]
+    insert_session(db_path, session_id, _now_ms(), customer_name=customer_name, notes=notes)
+    return session_id
+
+
+def get_session(session_id: str, db_path: str = DB_PATH) -> dict | None:
+    with reader(db_path) as conn:
+        row = conn.execute(
+            """
+            SELECT session_id, customer_name, start_time_ms, end_time_ms, status, notes, created_at
+            FROM sessions
+            WHERE session_id = ?
+            """,
+            (session_id,),
+        ).fetchone()
+        return dict(row) if row else None
+
+
+def get_session_version(session_id: str, db_path: str = DB_PATH) -> str | None:
+    """
+    Cheap token that changes whenever anything served for the session does:
+    status, end_time_ms, the newest physiology / transcript / insight ids,
+    the insight count (re-analysis deletes), and the speaker map (relabels
+    transcript rows in place). None if the session doesn't exist.
+    All from index lookups — no data rows are read.
+    """
+    with reader(db_path) as conn:
+        row = conn.execute(
+            """
+            SELECT status, end_time_ms,
+                   (SELECT MAX(id) FROM physiology_events WHERE session_id = s.session_id),
+                   (SELECT MAX(id) FROM transcript_segments WHERE session_id = s.session_id),
+                   (SELECT MAX(id) FROM insights WHERE session_id = s.session_id),
+                   (SELECT COUNT(*) FROM insights WHERE session_id = s.session_id),
+                   (SELECT group_concat(diar_label || '=' || role, ',') FROM speaker_map WHERE session_id = s.session_id)
+            FROM sessions s
+            WHERE session_id = ?
+            """,
+            (session_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        return "|".join("" if v is None else str(v) for v in row)
+
+
+SESSION_FIELDS = ("session_id", "customer_name", "start_time_ms", "end_time_ms", "status", "notes", "created_at")
+
+
+def list_sessions(
+    db_path: str = DB_PATH,
+    limit: int | None = None,
+    after: Tuple[int, str] | None = None,
+    statuses: list[str] | None = None,
+    customer: str | None = None,
+    since_ms: int | None = None,
+    until_ms: int | None = None,
+    fields: tuple[str, ...] = SESSION_FIELDS,
+) -> list[dict]:
+    """
+    Sessions, newest first (start_time_ms DESC, session_id DESC).
+
+    Keyset pagination: pass the (start_time_ms, session_id) of the last row
+    you got as `after` to get the next page. Filters: status in `statuses`,
+    customer_name equal to `customer` (case-insensitive),
+    since_ms <= start_time_ms < until_ms. `fields` picks the columns
+    (from SESSION_FIELDS), e.g. to leave out notes in list views.
+    """
+    unknown = set(fields) - set(SESSION_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown session field(s): {', '.join(sorted(unknown))}")
+
+    where, params = [], []
+    if after is not None:
+        where.append("(start_time_ms, session_id) < (?, ?)")
+        params.extend(after)
+    if statuses:
+        where.append(f"status IN ({', '.join('?' for _ in statuses)})")
+        params.extend(statuses)
+    if customer is not None:
+        where.append("customer_name = ? COLLATE NOCASE")
+        params.append(customer)
+    if since_ms is not None:
+        where.append("start_time_ms >= ?")
+        params.append(since_ms)
+    if until_ms is not None:
+        where.append("start_time_ms < ?")
+        params.append(until_ms)
+    if limit is not None:
+        params.append(limit)
+
+    with reader(db_path) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT {", ".join(fields)}
+            FROM sessions
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY start_time_ms DESC, session_id DESC
+            {"LIMIT ?" if limit is not None else ""}
+            """,
+            params,
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+def find_sessions(
+    statuses: list[str] | None = None,
+    since_ms: int | None = None,
+    until_ms: int | None = None,
+    customer: str | None = None,
+    db_path: str = DB_PATH,
+) -> list[dict]:
+    """
+    Every session matching the filters, newest first, without paging: the
+    same query and filter semantics as list_sessions (and GET /sessions).
+    """
+    return list_sessions(
+        db_path,
+        statuses=statuses,
+        customer=customer,
+        since_ms=since_ms,
+        until_ms=until_ms,
+        fields=("session_id", "customer_name", "start_time_ms", "end_time_ms", "status"),
+    )
+
+
+def stop_session(session_id: str, db_path: str = DB_PATH):
+    """Mark a recording as finished (end_time_ms = now, status = completed) and compute its session_stats."""
+    with transaction(db_path) as conn:
+        conn.execute(
+            "UPDATE sessions SET end_time_ms = ?, status = 'completed' WHERE session_id = ?",
+            (_now_ms(), session_id),
+        )
+        refresh_session_stats(session_id, db_path=db_path)
+
+
+def update_session_status(session_id: str, status: str, db_path: str = DB_PATH):
+    with transaction(db_path) as conn:
+        conn.execute(
+            "UPDATE sessions SET status = ? WHERE session_id = ?",
+            (status, session_id),
+        )
+
+
+def insert_insight(
+    session_id: str,
+    insight_type: str,
+    body: str,
+    title: str = None,
+    severity: str = "neutral",
+    timestamp_ref_ms: int = None,
+    db_path: str = DB_PATH,
+):
+    with transaction(db_path) as conn:
+        conn.execute(
+            """
+            INSERT INTO insights(session_id, insight_type, title, body, severity, timestamp_ref_ms)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (session_id, insight_type, title, body, severity, timestamp_ref_ms),
+        )
+
+
+def delete_insights_for_session(session_id: str, db_path: str = DB_PATH) -> int:
+    with transaction(db_path) as conn:
+        return conn.execute("DELETE FROM insights WHERE session_id = ?", (session_id,)).rowcount
+
+
+def get_insights_for_session(session_id: str, db_path: str = DB_PATH) -> list[dict]:
+    with reader(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT id, session_id, insight_type, title, body, severity, timestamp_ref_ms, created_at
+            FROM insights
+            WHERE session_id = ?
+            ORDER BY id ASC
+            """,
+            (session_id,),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+# ─────────────────────────────────────────────────────────────
+# Client profiles (GET /clients/{slug})
+# ─────────────────────────────────────────────────────────────
+# Everything for one customer in a handful of set-based queries, instead of
+# one /timeline + one /insights request per meeting. Session ids are passed
+# as a single JSON array parameter (json_each) so the SQL text stays the
+# same no matter how many meetings there are.
+
+def list_customer_names(db_path: str = DB_PATH) -> list[str | None]:
+    """Distinct customer_name values (NULL included), read off idx_sessions_customer_start."""
+    with reader(db_path) as conn:
+        rows = conn.execute(
+            "SELECT DISTINCT customer_name COLLATE NOCASE FROM sessions ORDER BY 1"
+        ).fetchall()
+        return [r[0] for r in rows]
+
+
+def get_sessions_for_customers(names: list[str | None], db_path: str = DB_PATH) -> list[dict]:
+    """Sessions whose customer_name is one of `names` (None matches NULL), newest first."""
+    exact = [n for n in names if n is not None]
+    with reader(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT session_id, customer_name, start_time_ms, end_time_ms, status, notes
+            FROM sessions
+            WHERE customer_name COLLATE NOCASE IN (SELECT value FROM json_each(?))
+               OR (? AND customer_name IS NULL)
+            ORDER BY start_time_ms DESC, session_id DESC
+            """,
+            (json.dumps(exact), None in names),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+def get_customer_summaries(groups: list[tuple[str | None, str]], db_path: str = DB_PATH) -> list[dict]:
+    """
+    Meeting counts per group of customers, most recently met first.
+    `groups` is (customer_name, group) pairs (None = sessions without a
+    customer; names match case-insensitively). Per group: meetings,
+    successful (analyzed/completed), streak (successful meetings in a row,
+    counting back from the newest) and last_meeting_ms.
+    """
+    with reader(db_path) as conn:
+        rows = conn.execute(
+            """
+            WITH names AS (
+                SELECT json_extract(value, '$[0]') AS name, json_extract(value, '$[1]') AS grp
+                FROM json_each(?)
+            ),
+            ranked AS (
+                SELECT n.grp, s.start_time_ms,
+                       s.status IN ('analyzed', 'completed') AS ok,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY n.grp ORDER BY s.start_time_ms DESC, s.session_id DESC
+                       ) AS rn
+                FROM sessions s
+                JOIN names n ON s.customer_name IS n.name COLLATE NOCASE
+            )
+            SELECT grp AS "group",
+                   COUNT(*) AS meetings,
+                   SUM(ok) AS successful,
+                   COALESCE(MIN(CASE WHEN NOT ok THEN rn END) - 1, COUNT(*)) AS streak,
+                   MAX(start_time_ms) AS last_meeting_ms
+            FROM ranked
+            GROUP BY grp
+            ORDER BY last_meeting_ms DESC, grp
+            """,
+            (json.dumps(groups),),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+def get_insights_for_sessions(session_ids: list[str], db_path: str = DB_PATH) -> list[dict]:
+    with reader(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT session_id, insight_type, title, body, severity, timestamp_ref_ms
+            FROM insights
+            WHERE session_id IN (SELECT value FROM json_each(?))
+            ORDER BY session_id, id
+            """,
+            (json.dumps(session_ids),),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+def get_transcripts_for_sessions(session_ids: list[str], db_path: str = DB_PATH) -> list[dict]:
+    with reader(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT session_id, timestamp_start_ms AS start_ms, timestamp_end_ms AS end_ms, speaker, text
+            FROM transcript_segments
+            WHERE session_id IN (SELECT value FROM json_each(?))
+            ORDER BY session_id, timestamp_start_ms, id
+            """,
+            (json.dumps(session_ids),),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+def get_emotion_series_for_sessions(session_ids: list[str], points: int, db_path: str = DB_PATH) -> list[dict]:
+    """
+    emotion_score / engagement averaged into about `points` equal buckets
+    per session (at least 1 s each). offset_ms is the bucket's first reading
+    relative to the session start.
+    """
+    with reader(db_path) as conn:
+        rows = conn.execute(
+            """
+            WITH spans AS (
+                SELECT s.session_id, s.start_time_ms,
+                       MAX(1000, (COALESCE(s.end_time_ms, MAX(p.timestamp_ms)) - s.start_time_ms) / ?) AS bucket_ms
+                FROM sessions s
+                JOIN physiology_events p ON p.session_id = s.session_id
+                WHERE s.session_id IN (SELECT value FROM json_each(?))
+                GROUP BY s.session_id
+            )
+            SELECT p.session_id,
+                   MIN(p.timestamp_ms) - sp.start_time_ms AS offset_ms,
+                   ROUND(AVG(p.emotion_score), 3) AS emotion_score,
+                   ROUND(AVG(p.engagement), 3) AS engagement
+            FROM spans sp
+            JOIN physiology_events p ON p.session_id = sp.session_id
+            GROUP BY p.session_id, (p.timestamp_ms - sp.start_time_ms) / sp.bucket_ms
+            ORDER BY p.session_id, offset_ms
+            """,
+            (max(1, points), json.dumps(session_ids)),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+# ─────────────────────────────────────────────────────────────
+# Session stats (rollups for GET /analytics)
+# ─────────────────────────────────────────────────────────────
+#
+# session_stats holds one row of per-session aggregates, computed from the
+# raw tables when a session stops and again when its analysis is saved.
+# get_analytics only ever reads session_stats (+ sessions for grouping).
+
+def refresh_session_stats(session_id: str, analysis_score: int = None, db_path: str = DB_PATH):
+    """
+    (Re)compute a session's session_stats row from its transcript and
+    physiology. analysis_score, if not given, keeps the stored value or
+    falls back to the latest finished analysis job.
+    """
+    with transaction(db_path) as conn:
+        conn.execute(
+            """
+            WITH talk AS (
+                SELECT COALESCE(SUM(CASE WHEN speaker = 'seller'
+                                         THEN timestamp_end_ms - timestamp_start_ms END), 0) AS seller_talk_ms,
+                       COALESCE(SUM(CASE WHEN speaker = 'customer'
+                                         THEN timestamp_end_ms - timestamp_start_ms END), 0) AS customer_talk_ms,
+                       COUNT(CASE WHEN speaker = 'seller' THEN 1 END) AS seller_segments,
+                       COUNT(CASE WHEN speaker = 'customer' THEN 1 END) AS customer_segments,
+                       COUNT(*) AS segment_count
+                FROM transcript_segments WHERE session_id = :sid
+            ),
+            physio AS (
+                SELECT COUNT(*) AS samples,
+                       AVG(engagement) AS engagement_mean, MIN(engagement) AS engagement_min,
+                       MAX(engagement) AS engagement_max,
+                       AVG(emotion_score) AS emotion_mean, MIN(emotion_score) AS emotion_min,
+                       MAX(emotion_score) AS emotion_max,
+                       AVG(heart_rate) AS heart_rate_mean, MAX(heart_rate) AS heart_rate_max
+                FROM physiology_events WHERE session_id = :sid
+            )
+            INSERT INTO session_stats(
+                session_id, duration_ms,
+                seller_talk_ms, customer_talk_ms, seller_segments, customer_segments, segment_count,
+                physiology_samples, engagement_mean, engagement_min, engagement_max,
+                emotion_mean, emotion_min, emotion_max,
+                heart_rate_mean, heart_rate_max, heart_rate_peak_ms,
+                analysis_score, computed_at_ms
+            )
+            SELECT s.session_id, s.end_time_ms - s.start_time_ms,
+                   t.seller_talk_ms, t.customer_talk_ms, t.seller_segments, t.customer_segments, t.segment_count,
+                   p.samples, p.engagement_mean, p.engagement_min, p.engagement_max,
+                   p.emotion_mean, p.emotion_min, p.emotion_max,
+                   p.heart_rate_mean, p.heart_rate_max,
+                   (SELECT timestamp_ms FROM physiology_events
+                    WHERE session_id = :sid AND heart_rate = p.heart_rate_max
+                    ORDER BY timestamp_ms LIMIT 1),
+                   COALESCE(:score, (SELECT overall_score FROM analysis_jobs
+                                     WHERE session_id = :sid AND status = 'done' AND overall_score IS NOT NULL
+                                     ORDER BY id DESC LIMIT 1)),
+                   :now
+            FROM sessions s, talk t, physio p
+            WHERE s.session_id = :sid
+            ON CONFLICT(session_id) DO UPDATE SET
+                duration_ms = excluded.duration_ms,
+                seller_talk_ms = excluded.seller_talk_ms,
+                customer_talk_ms = excluded.customer_talk_ms,
+                seller_segments = excluded.seller_segments,
+                customer_segments = excluded.customer_segments,
+                segment_count = excluded.segment_count,
+                physiology_samples = excluded.physiology_samples,
+                engagement_mean = excluded.engagement_mean,
+                engagement_min = excluded.engagement_min,
+                engagement_max = excluded.engagement_max,
+                emotion_mean = excluded.emotion_mean,
+                emotion_min = excluded.emotion_min,
+                emotion_max = excluded.emotion_max,
+                heart_rate_mean = excluded.heart_rate_mean,
+                heart_rate_max = excluded.heart_rate_max,
+                heart_rate_peak_ms = excluded.heart_rate_peak_ms,
+                analysis_score = COALESCE(:score, session_stats.analysis_score, excluded.analysis_score),
+                computed_at_ms = excluded.computed_at_ms
+            """,
+            {"sid": session_id, "score": analysis_score, "now": _now_ms()},
+        )
+
+
+def get_session_stats(session_id: str, db_path: str = DB_PATH) -> dict | None:
+    with reader(db_path) as conn:
+        row = conn.execute("SELECT * FROM session_stats WHERE session_id = ?", (session_id,)).fetchone()
+        return dict(row) if row else None
+
+
+def sessions_missing_stats(db_path: str = DB_PATH) -> list[str]:
+    """Finished sessions with no session_stats row yet (for backfills)."""
+    with reader(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT s.session_id FROM sessions s
+            LEFT JOIN session_stats st ON st.session_id = s.session_id
+            WHERE s.status != 'recording' AND st.session_id IS NULL
+            ORDER BY s.start_time_ms
+            """
+        ).fetchall()
+        return [r["session_id"] for r in rows]
+
+
+# Group keys for get_analytics. Periods are UTC calendar buckets of the
+# session's start time; a week is labelled by its Monday.
+_START_DATE = "s.start_time_ms / 1000, 'unixepoch'"
+ANALYTICS_GROUPS = {
+    "day": f"strftime('%Y-%m-%d', {_START_DATE})",
+    "week": f"date({_START_DATE}, 'weekday 0', '-6 days')",
+    "month": f"strftime('%Y-%m', {_START_DATE})",
+    "quarter": f"strftime('%Y', {_START_DATE}) || '-Q' || ((CAST(strftime('%m', {_START_DATE}) AS INTEGER) + 2) / 3)",
+    "year": f"strftime('%Y', {_START_DATE})",
+    "customer": "s.customer_name COLLATE NOCASE",      # same grouping as the customer filter
+}
+
+
+def get_analytics(
+    group_by: str = "month",
+    customer: str = None,
+    since_ms: int = None,
+    until_ms: int = None,
+    db_path: str = DB_PATH,
+) -> list[dict]:
+    """
+    session_stats aggregated per group (see ANALYTICS_GROUPS), ordered by
+    group. Means are means of the per-session means, so a long call
+    doesn't outweigh short ones. Filters: customer (case-insensitive) and
+    session start time, since_ms <= start_time_ms < until_ms.
+    """
+    if group_by not in ANALYTICS_GROUPS:
+        raise ValueError(f"unknown group_by: {group_by}")
+
+    where = ["1"]
+    params: list = []
+    if customer is not None:
+        where.append("s.customer_name = ? COLLATE NOCASE")
+        params.append(customer)
+    if since_ms is not None:
+        where.append("s.start_time_ms >= ?")
+        params.append(int(since_ms))
+    if until_ms is not None:
+        where.append("s.start_time_ms < ?")
+        params.append(int(until_ms))
+
+    with reader(db_path) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT {ANALYTICS_GROUPS[group_by]} AS "group",
+                   COUNT(*) AS sessions,
+                   SUM(st.duration_ms) AS total_duration_ms,
+                   SUM(st.seller_talk_ms) AS seller_talk_ms,
+                   SUM(st.customer_talk_ms) AS customer_talk_ms,
+                   ROUND(1.0 * SUM(st.seller_talk_ms)
+                         / NULLIF(SUM(st.seller_talk_ms + st.customer_talk_ms), 0), 3) AS seller_talk_ratio,
+                   SUM(st.segment_count) AS segments,
+                   ROUND(AVG(st.engagement_mean), 3) AS engagement_mean,
+                   ROUND(MIN(st.engagement_min), 3) AS engagement_min,
+                   ROUND(MAX(st.engagement_max), 3) AS engagement_max,
+                   ROUND(AVG(st.emotion_mean), 3) AS emotion_mean,
+                   ROUND(MIN(st.emotion_min), 3) AS emotion_min,
+                   ROUND(MAX(st.emotion_max), 3) AS emotion_max,
+                   ROUND(AVG(st.heart_rate_mean), 1) AS heart_rate_mean,
+                   MAX(st.heart_rate_max) AS heart_rate_max,
+                   ROUND(AVG(st.analysis_score), 1) AS analysis_score_mean,
+                   COUNT(st.analysis_score) AS analyzed_sessions
+            FROM session_stats st
+            JOIN sessions s ON s.session_id = st.session_id
+            WHERE {" AND ".join(where)}
+            GROUP BY 1
+            ORDER BY 1
+            """,
+            params,
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+# ─────────────────────────────────────────────────────────────
+# Transcript search (GET /search)
+# ─────────────────────────────────────────────────────────────
+#
+# transcript_fts (schema.sql) indexes transcript_segments.text and is kept
+# current by triggers. Queries go through fts_query(), so user input is
+# always treated as words, never as FTS5 syntax.
+
+SEARCH_SNIPPET_TOKENS = 16
+SEARCH_HIGHLIGHT = ("[", "]")
+
+
+def fts_query(text: str) -> str:
+    """
+    User search text -> FTS5 MATCH expression. Every word must match;
+    "quoted words" match as a phrase, and a trailing * matches a prefix
+    (pric* → price, pricing). Returns "" if there's nothing to search for.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+        tokens = re.findall(r"\w+", phrase or word)
+        if not tokens:
+            continue
+        term = '"' + " ".join(tokens) + '"'
+        if word.endswith("*"):
+            term += "*"
+        terms.append(term)
+    return " ".join(terms)
+
+
+def search_transcripts(
+    query: str,
+    customer: str = None,
+    since_ms: int = None,
+    until_ms: int = None,
+    limit: int = 20,
+    db_path: str = DB_PATH,
+) -> list[dict]:
+    """
+    Best-matching transcript segments (BM25) with a highlighted snippet,
+    optionally limited to one customer (case-insensitive) and to sessions
+    started in [since_ms, until_ms).
+    """
+    match = fts_query(query)
+    if not match:
+        return []
+
+    where = ["transcript_fts MATCH ?"]
+    params: list = [match]
+    if customer is not None:
+        where.append("s.customer_name = ? COLLATE NOCASE")
+        params.append(customer)
+    if since_ms is not None:
+        where.append("s.start_time_ms >= ?")
+        params.append(int(since_ms))
+    if until_ms is not None:
+        where.append("s.start_time_ms < ?")
+        params.append(int(until_ms))
+
+    open_mark, close_mark = SEARCH_HIGHLIGHT
+    with reader(db_path) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT t.id AS segment_id, t.session_id, s.customer_name, s.start_time_ms AS session_start_ms,
+                   t.speaker, t.timestamp_start_ms, t.timestamp_end_ms,
+                   snippet(transcript_fts, 0, ?, ?, '…', ?) AS snippet,
+                   bm25(transcript_fts) AS score
+            FROM transcript_fts
+            JOIN transcript_segments t ON t.id = transcript_fts.rowid
+            JOIN sessions s ON s.session_id = t.session_id
+            WHERE {" AND ".join(where)}
+            ORDER BY score ASC
+            LIMIT ?
+            """,
+            [open_mark, close_mark, SEARCH_SNIPPET_TOKENS, *params, int(limit)],
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+def rebuild_transcript_search(db_path: str = DB_PATH) -> int:
+    """Re-index every transcript segment (backfill for DBs that predate transcript_fts). Returns rows indexed."""
+    with transaction(db_path) as conn:
+        conn.execute("INSERT INTO transcript_fts(transcript_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO transcript_fts(transcript_fts) VALUES ('optimize')")
+        return conn.execute("SELECT COUNT(*) FROM transcript_segments").fetchone()[0]
+
+
+# ─────────────────────────────────────────────────────────────
+# Analysis jobs (api-server worker pool)
+# ─────────────────────────────────────────────────────────────
+
+_JOB_COLUMNS = """
+    id, session_id, status, attempts, error, overall_score,
+    created_at_ms, started_at_ms, finished_at_ms
+"""
+
+
+def enqueue_analysis_job(session_id: str, db_path: str = DB_PATH) -> dict:
+    """
+    Queue an analysis job for a session.
+    If the session already has a pending/running job, that job is returned instead.
+    """
+    with transaction(db_path) as conn:
+        row = conn.execute(
+            f"""
+            SELECT {_JOB_COLUMNS} FROM analysis_jobs
+            WHERE session_id = ? AND status IN ('pending', 'running')
+            ORDER BY id DESC LIMIT 1
+            """,
+            (session_id,),
+        ).fetchone()
+        if row:
+            return dict(row)
+
+        cur = conn.execute(
+            "INSERT INTO analysis_jobs(session_id, status, created_at_ms) VALUES (?, 'pending', ?)",
+            (session_id, _now_ms()),
+        )
+        row = conn.execute(
+            f"SELECT {_JOB_COLUMNS} FROM analysis_jobs WHERE id = ?",
+            (cur.lastrowid,),
+        ).fetchone()
+        return dict(row)
+
+
+def claim_next_analysis_job(db_path: str = DB_PATH) -> dict | None:
+    """Atomically move the oldest pending job to 'running' and return it (None if the queue is empty)."""
+    with transaction(db_path) as conn:
+        row = conn.execute(
+            "SELECT id FROM analysis_jobs WHERE status = 'pending' ORDER BY id LIMIT 1"
+        ).fetchone()
+        if not row:
+            return None
+
+        conn.execute(
+            """
+            UPDATE analysis_jobs
+            SET status = 'running', attempts = attempts + 1, started_at_ms = ?, error = NULL
+            WHERE id = ?
+            """,
+            (_now_ms(), row["id"]),
+        )
+        row = conn.execute(
+            f"SELECT {_JOB_COLUMNS} FROM analysis_jobs WHERE id = ?",
+            (row["id"],),
+        ).fetchone()
+        return dict(row)
+
+
+def finish_analysis_job(job_id: int, status: str, error: str = None, overall_score: int = None, db_path: str = DB_PATH):
+    """Record the outcome of a job ('done' or 'error')."""
+    with transaction(db_path) as conn:
+        conn.execute(
+            """
+            UPDATE analysis_jobs
+            SET status = ?, error = ?, overall_score = ?, finished_at_ms = ?
+            WHERE id = ?
+            """,
+            (status, error, overall_score, _now_ms(), job_id),
+        )
+
+
+def requeue_interrupted_analysis_jobs(max_attempts: int, db_path: str = DB_PATH) -> int:
+    """
+    Jobs left 'running' by a previous process never finished. Put them back in
+    the queue, or give up on them (and their session) after max_attempts.
+    Returns the number of jobs requeued.
+    """
+    with transaction(db_path) as conn:
+        conn.execute(
+            """
+            UPDATE sessions SET status = 'error'
+            WHERE session_id IN (
+                SELECT session_id FROM analysis_jobs
+                WHERE status = 'running' AND attempts >= ?
+            )
+            """,
+            (max_attempts,),
+        )
+        conn.execute(
+            """
+            UPDATE analysis_jobs
+            SET status = 'error', error = 'interrupted too many times', finished_at_ms = ?
+            WHERE status = 'running' AND attempts >= ?
+            """,
+            (_now_ms(), max_attempts),
+        )
+        cur = conn.execute(
+            "UPDATE analysis_jobs SET status = 'pending' WHERE status = 'running'"
+        )
+        return cur.rowcount
+
+
+def get_analysis_jobs_for_session(session_id: str, db_path: str = DB_PATH) -> list[dict]:
+    """
+    A session's jobs, newest first. Pending jobs also get `queue_position`
+    (how many pending jobs are ahead of them).
+    """
+    with reader(db_path) as conn:
+        rows = conn.execute(
+            f"""
+            SELECT {_JOB_COLUMNS},
+                   CASE WHEN status = 'pending' THEN (
+                       SELECT COUNT(*) FROM analysis_jobs AS ahead
+                       WHERE ahead.status = 'pending' AND ahead.id < analysis_jobs.id
+                   ) END AS queue_position
+            FROM analysis_jobs
+            WHERE session_id = ?
+            ORDER BY id DESC
+            """,
+            (session_id,),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+# ─────────────────────────────────────────────────────────────
+# Readers (timeline + api-server)
+# ─────────────────────────────────────────────────────────────
+
+# Every reader below takes an optional window: from_ms / to_ms (inclusive)
+# and a row limit. Physiology rows are points, so the window is a plain
+# range on idx_physio_session_time. Transcript segments (and the timeline
+# entries built from them) are intervals: any segment that overlaps the
+# window is returned, including ones that started before from_ms. Those
+# can only have started up to "longest segment in the session" earlier,
+# which idx_*_session_duration answers in one seek, so the read is still a
+# bounded range scan on the start-time index rather than a session scan.
+
+def _window_sql(
+    table: str,
+    start_col: str,
+    end_col: str | None,
+    session_id: str,
+    from_ms: int = None,
+    to_ms: int = None,
+    limit: int = None,
+) -> tuple[str, list, str]:
+    """WHERE and LIMIT clauses for a session time window, and their params."""
+    where = "session_id = ?"
+    params: list = [session_id]
+    if from_ms is not None:
+        if end_col is None:
+            where += f" AND {start_col} >= ?"
+            params.append(int(from_ms))
+        else:
+            where += (
+                f" AND {start_col} >= ? - (SELECT COALESCE(MAX({end_col} - {start_col}), 0)"
+                f" FROM {table} WHERE session_id = ?)"
+                f" AND {end_col} >= ?"
+            )
+            params += [int(from_ms), session_id, int(from_ms)]
+    if to_ms is not None:
+        where += f" AND {start_col} <= ?"
+        params.append(int(to_ms))
 
+    tail = ""
+    if limit is not None:
+        tail = " LIMIT ?"
+        params.append(int(limit))
+    return where, params, tail
 
-def upsert_speaker_map(db_path: str, session_id: str, seller_label: str, client_label: str):
+
+_TRANSCRIPT_SQL = """
+    SELECT id, session_id, timestamp_start_ms, timestamp_end_ms,
+           speaker, text, confidence, raw_json
+    FROM transcript_segments
+    WHERE {where}
+    ORDER BY timestamp_start_ms ASC, id ASC{tail}
+"""
+
+_PHYSIOLOGY_SQL = """
+    SELECT id, session_id, timestamp_ms,
+           heart_rate, hrv, breathing_rate, phasic,
+           emotion_score, engagement, blink_rate, is_talking, raw_json
+    FROM physiology_events
+    WHERE {where}
+    ORDER BY timestamp_ms ASC, id ASC{tail}
+"""
+
+
+def _transcript_query(session_id: str, from_ms: int, to_ms: int, limit: int) -> tuple[str, list]:
+    where, params, tail = _window_sql(
+        "transcript_segments", "timestamp_start_ms", "timestamp_end_ms", session_id, from_ms, to_ms, limit
+    )
+    return _TRANSCRIPT_SQL.format(where=where, tail=tail), params
+
+
+def _physiology_query(session_id: str, from_ms: int, to_ms: int, limit: int) -> tuple[str, list]:
+    where, params, tail = _window_sql("physiology_events", "timestamp_ms", None, session_id, from_ms, to_ms, limit)
+    return _PHYSIOLOGY_SQL.format(where=where, tail=tail), params
+
+
+def get_transcript_for_session(
+    session_id: str,
+    db_path: str = DB_PATH,
+    from_ms: int = None,
+    to_ms: int = None,
+    limit: int = None,
+) -> list[dict]:
     """
-    Store diarization label -> role mapping in speaker_map.
-    seller_label/client_label are diarization labels like 'spk_0', 'spk_1'.
+    Transcript segments for a session, ordered by start time: all of them,
+    or those overlapping [from_ms, to_ms] (first `limit`).
+    Served straight off idx_transcript_session_time.
     """
-    db_path = _normalize_db_path(db_path)
-    conn = sqlite3.connect(db_path)
-    try:
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA busy_timeout=5000;")
+    sql, params = _transcript_query(session_id, from_ms, to_ms, limit)
+    with reader(db_path) as conn:
+        rows = conn.execute(sql, params).fetchall()
+        return [dict(r) for r in rows]
+
+
+def iter_transcript_for_session(
+    session_id: str,
+    db_path: str = DB_PATH,
+    from_ms: int = None,
+    to_ms: int = None,
+    limit: int = None,
+) -> Iterator[dict]:
+    """Same rows as get_transcript_for_session, yielded one at a time from the cursor."""
+    sql, params = _transcript_query(session_id, from_ms, to_ms, limit)
+    with streaming_reader(db_path) as conn:
+        for row in conn.execute(sql, params):
+            yield dict(row)
 
-        conn.execute(
-            "INSERT OR REPLACE INTO speaker_map(session_id, diar_label, role) VALUES (?, ?, 'seller')",
-            (session_id, seller_label),
-        )
-        conn.execute(
-            "INSERT OR REPLACE INTO speaker_map(session_id, diar_label, role) VALUES (?, ?, 'customer')",
-            (session_id, client_label),
-        )
-        conn.commit()
-    finally:
-        conn.close()
 
-def apply_speaker_map_to_segments(db_path: str, session_id: str):
+def get_physiology_for_session(
+    session_id: str,
+    db_path: str = DB_PATH,
+    from_ms: int = None,
+    to_ms: int = None,
+    limit: int = None,
+) -> list[dict]:
     """
-    Update transcript_segments.speaker using the diarization label stored in raw_json.
-    We expect raw_json to contain {"speaker_label": "..."}.
+    Physiology events for a session, ordered by timestamp: all of them, or
+    those with from_ms <= timestamp_ms <= to_ms (first `limit`).
+    Served straight off idx_physio_session_time.
     """
-    db_path = _normalize_db_path(db_path)
-    conn = sqlite3.connect(db_path)
-    try:
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA busy_timeout=5000;")
+    sql, params = _physiology_query(session_id, from_ms, to_ms, limit)
+    with reader(db_path) as conn:
+        rows = conn.execute(sql, params).fetchall()
+        return [dict(r) for r in rows]
 
-        # SQLite json_extract works only if JSON1 extension is enabled (common, but not guaranteed).
-        # We'll implement a safe Python fallback if JSON1 isn't present.
-        try:
-            conn.execute(
-                """
-                UPDATE transcript_segments
-                SET speaker = (
-                    SELECT role
-                    FROM speaker_map
-                    WHERE speaker_map.session_id = transcript_segments.session_id
-                      AND speaker_map.diar_label = json_extract(transcript_segments.raw_json, '$.speaker_label')
-                )
-                WHERE session_id = ?
-                """,
+
+def iter_physiology_for_session(
+    session_id: str,
+    db_path: str = DB_PATH,
+    from_ms: int = None,
+    to_ms: int = None,
+    limit: int = None,
+) -> Iterator[dict]:
+    """Same rows as get_physiology_for_session, yielded one at a time from the cursor."""
+    sql, params = _physiology_query(session_id, from_ms, to_ms, limit)
+    with streaming_reader(db_path) as conn:
+        for row in conn.execute(sql, params):
+            yield dict(row)
+
+
+# ─────────────────────────────────────────────────────────────
+# Live feed (api-server /sessions/{id}/live)
+# ─────────────────────────────────────────────────────────────
+
+class ChangeDetector:
+    """
+    Cheap "did anyone commit?" check via PRAGMA data_version.
+
+    data_version only moves when ANOTHER connection commits, so this keeps
+    its own connection. One check is a few microseconds and touches no tables.
+    """
+
+    def __init__(self, db_path: str = DB_PATH):
+        self._conn = get_connection_manager(db_path).connect()
+        self._version = None
+
+    def changed(self) -> bool:
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        changed = version != self._version
+        self._version = version
+        return changed
+
+    def close(self):
+        self._conn.close()
+
+
+# event name -> (table, columns) pushed by the live feed
+LIVE_TABLES = {
+    "physiology": (
+        "physiology_events",
+        "id, timestamp_ms, heart_rate, hrv, breathing_rate, phasic, "
+        "emotion_score, engagement, blink_rate, is_talking",
+    ),
+    "transcript": (
+        "transcript_segments",
+        "id, timestamp_start_ms, timestamp_end_ms, speaker, text, confidence",
+    ),
+    "mood": (
+        "mood_timeseries",
+        "id, subject_role, window_start_ms, window_end_ms, mood_score, engagement, "
+        "blink_rate, is_talking_pct, sample_count, source",
+    ),
+}
+
+
+def get_live_watermarks(session_id: str, db_path: str = DB_PATH) -> dict:
+    """Current max row id per live table for a session (0 if empty)."""
+    with reader(db_path) as conn:
+        return {
+            event: conn.execute(
+                f"SELECT COALESCE(MAX(id), 0) FROM {table} WHERE session_id = ?",
                 (session_id,),
-            )
-            conn.commit()
-            return
-        except sqlite3.OperationalError:
-            # JSON1 not available; do Python-based update
+            ).fetchone()[0]
+            for event, (table, _) in LIVE_TABLES.items()
+        }
+
+
+def get_live_rows_after(session_id: str, after: dict, events=None, db_path: str = DB_PATH) -> dict:
+    """Rows with id > after[event] for each live table (or just `events`), oldest first."""
+    out = {}
+    with reader(db_path) as conn:
+        for event in events or LIVE_TABLES:
+            table, columns = LIVE_TABLES[event]
             rows = conn.execute(
-                "SELECT id, raw_json FROM transcript_segments WHERE session_id = ?",
-                (session_id,),
+                f"SELECT {columns} FROM {table} WHERE session_id = ? AND id > ? ORDER BY id",
+                (session_id, after.get(event, 0)),
             ).fetchall()
+            out[event] = [dict(r) for r in rows]
+    return out
 
-            mapping = dict(conn.execute(
-                "SELECT diar_label, role FROM speaker_map WHERE session_id = ?",
-                (session_id,),
-            ).fetchall())
 
-            updates = []
-            for seg_id, raw_json_str in rows:
-                if not raw_json_str:
-                    continue
-                try:
-                    payload = json.loads(raw_json_str)
-                except Exception:
-                    continue
-                diar = payload.get("speaker_label")
-                role = mapping.get(diar)
-                if role:
-                    updates.append((role, seg_id))
-
-            conn.executemany("UPDATE transcript_segments SET speaker = ? WHERE id = ?", updates)
-            conn.commit()
-    finally:
-        conn.close()
-def _normalize_db_path(db_path: str) -> str:
-    if not db_path or not str(db_path).strip():
-        raise RuntimeError("db_path is empty")
+# Columns that can be loaded as float arrays. Anything else is rejected,
+# since the names are interpolated into the SELECT.
+PHYSIOLOGY_COLUMNS = (
+    "heart_rate", "hrv", "breathing_rate", "phasic",
+    "emotion_score", "engagement", "blink_rate", "is_talking",
+)
 
-    p = Path(os.path.expandvars(os.path.expanduser(str(db_path).strip())))
-    if not p.is_absolute():
-        repo_root = Path(__file__).resolve().parents[2]
-        p = (repo_root / p).resolve()
 
-    p.parent.mkdir(parents=True, exist_ok=True)
-    return str(p)
+def _read_physiology_columns(
+    conn: sqlite3.Connection,
+    session_id: str,
+    fields,
+    start_ms: int = None,
+    end_ms: int = None,
+    limit: int = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    unknown = [f for f in fields if f not in PHYSIOLOGY_COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown physiology field(s): {', '.join(unknown)}")
 
-def insert_transcript_segments(db_path: str, segments):
-    db_path = _normalize_db_path(db_path)
+    where = "session_id = ?"
+    params = [session_id]
+    if start_ms is not None:
+        where += " AND timestamp_ms >= ?"
+        params.append(int(start_ms))
+    if end_ms is not None:
+        where += " AND timestamp_ms <= ?"
+        params.append(int(end_ms))
+    tail = ""
+    if limit is not None:
+        tail = " LIMIT ?"
+        params.append(int(limit))
 
-    conn = sqlite3.connect(db_path)
-    try:
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA busy_timeout=5000;")
+    rows = conn.execute(
+        f"""
+        SELECT timestamp_ms, {", ".join(fields)}
+        FROM physiology_events
+        WHERE {where}
+        ORDER BY timestamp_ms ASC, id ASC{tail}
+        """,
+        params,
+    ).fetchall()
 
-        rows = []
-        for s in segments:
-            raw = {
-                "speaker_label": s.get("speaker_label"),
-                "start_ms": s.get("start_ms"),
-                "end_ms": s.get("end_ms"),
-            }
-            rows.append((
-                s["session_id"],
-                int(s["start_ms"]),
-                int(s["end_ms"]),
-                "unknown",
-                s["text"],
-                None,
-                json.dumps(raw, ensure_ascii=False),
-            ))
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, len(fields)))
 
-        conn.executemany(
+    # One conversion for the whole result set; NULL -> NaN.
+    table = np.array(rows, dtype=np.float64)
+    return table[:, 0].astype(np.int64), table[:, 1:]
+
+
+def get_physiology_columns(
+    session_id: str,
+    fields=PHYSIOLOGY_COLUMNS,
+    db_path: str = DB_PATH,
+    start_ms: int = None,
+    end_ms: int = None,
+    limit: int = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Columnar read of a session's physiology_events, optionally limited to
+    start_ms <= timestamp_ms <= end_ms (first `limit` rows).
+
+    Returns (timestamps, values): timestamps is int64[n] sorted ascending,
+    values is float64[n, len(fields)] with NULL stored as NaN.
+    """
+    with reader(db_path) as conn:
+        return _read_physiology_columns(conn, session_id, list(fields), start_ms, end_ms, limit)
+
+
+# ─────────────────────────────────────────────────────────────
+# Materialized timeline (timeline_entries + timeline_watermarks)
+# ─────────────────────────────────────────────────────────────
+
+TIMELINE_PHYSIOLOGY_COLUMNS = ("heart_rate", "hrv", "breathing_rate", "phasic", "emotion_score", "engagement")
+
+
+def get_timeline_watermark(session_id: str, db_path: str = DB_PATH) -> dict:
+    """{last_transcript_id, last_physiology_id, finalized} — zeros if never refreshed."""
+    with reader(db_path) as conn:
+        row = conn.execute(
             """
-            INSERT INTO transcript_segments(
-              session_id, timestamp_start_ms, timestamp_end_ms,
-              speaker, text, confidence, raw_json
+            SELECT last_transcript_id, last_physiology_id, finalized
+            FROM timeline_watermarks WHERE session_id = ?
+            """,
+            (session_id,),
+        ).fetchone()
+    if not row:
+        return {"last_transcript_id": 0, "last_physiology_id": 0, "finalized": False}
+    return {
+        "last_transcript_id": row["last_transcript_id"],
+        "last_physiology_id": row["last_physiology_id"],
+        "finalized": bool(row["finalized"]),
+    }
+
+
+def get_max_row_ids(session_id: str, db_path: str = DB_PATH) -> tuple[int, int]:
+    """(MAX(id) of transcript_segments, MAX(id) of physiology_events) for a session; index lookups."""
+    with reader(db_path) as conn:
+        row = conn.execute(
+            """
+            SELECT (SELECT COALESCE(MAX(id), 0) FROM transcript_segments WHERE session_id = ?),
+                   (SELECT COALESCE(MAX(id), 0) FROM physiology_events WHERE session_id = ?)
+            """,
+            (session_id, session_id),
+        ).fetchone()
+    return row[0], row[1]
+
+
+def get_transcript_after_id(session_id: str, after_id: int, db_path: str = DB_PATH) -> list[dict]:
+    """Transcript segments with id > after_id, ordered by start time."""
+    with reader(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT id, timestamp_start_ms, timestamp_end_ms, speaker, text
+            FROM transcript_segments
+            WHERE session_id = ? AND id > ?
+            ORDER BY timestamp_start_ms ASC, id ASC
+            """,
+            (session_id, after_id),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+def get_physiology_span_after_id(session_id: str, after_id: int, db_path: str = DB_PATH) -> dict | None:
+    """
+    {max_id, min_ts, max_ts} of physiology rows with id > after_id,
+    or None if nothing new arrived.
+    """
+    with reader(db_path) as conn:
+        row = conn.execute(
+            """
+            SELECT MAX(id) AS max_id, MIN(timestamp_ms) AS min_ts, MAX(timestamp_ms) AS max_ts
+            FROM physiology_events
+            WHERE session_id = ? AND id > ?
+            """,
+            (session_id, after_id),
+        ).fetchone()
+    if row["max_id"] is None:
+        return None
+    return dict(row)
+
+
+def get_transcript_overlapping(session_id: str, from_ms: int, to_ms: int, db_path: str = DB_PATH) -> list[dict]:
+    """Transcript segments whose [start, end] window intersects [from_ms, to_ms]."""
+    with reader(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT id, timestamp_start_ms, timestamp_end_ms, speaker, text
+            FROM transcript_segments
+            WHERE session_id = ? AND timestamp_end_ms >= ? AND timestamp_start_ms <= ?
+            ORDER BY timestamp_start_ms ASC, id ASC
+            """,
+            (session_id, int(from_ms), int(to_ms)),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+def upsert_timeline_entries(
+    session_id: str,
+    entries: list[dict],
+    last_transcript_id: int,
+    last_physiology_id: int,
+    finalized: bool = False,
+    db_path: str = DB_PATH,
+):
+    """
+    Write (or overwrite) timeline entries and advance the session's watermark
+    in one transaction. Each entry needs segment_id + the build_timeline fields.
+    The watermark never moves backwards.
+    """
+    with transaction(db_path) as conn:
+        conn.executemany(
+            f"""
+            INSERT OR REPLACE INTO timeline_entries(
+              segment_id, session_id, start_ms, end_ms, speaker, text,
+              {", ".join(TIMELINE_PHYSIOLOGY_COLUMNS)}
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            VALUES (?, ?, ?, ?, ?, ?, {", ".join("?" for _ in TIMELINE_PHYSIOLOGY_COLUMNS)})
             """,
-            rows,
+            [
+                (
+                    e["segment_id"], session_id, e["start_ms"], e["end_ms"], e["speaker"], e["text"],
+                    *(e["physiology"].get(f) for f in TIMELINE_PHYSIOLOGY_COLUMNS),
+                )
+                for e in entries
+            ],
+        )
+        conn.execute(
+            """
+            INSERT INTO timeline_watermarks(session_id, last_transcript_id, last_physiology_id, finalized)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+              last_transcript_id = MAX(last_transcript_id, excluded.last_transcript_id),
+              last_physiology_id = MAX(last_physiology_id, excluded.last_physiology_id),
+              finalized = excluded.finalized
+            """,
+            (session_id, last_transcript_id, last_physiology_id, int(finalized)),
         )
-        conn.commit()
-    finally:
-        conn.close()
 
-def insert_transcript_segments(db_path: str, segments):
+
+def clear_timeline_entries(session_id: str, db_path: str = DB_PATH):
+    """Drop a session's materialized timeline and watermark (forces a full rebuild)."""
+    with transaction(db_path) as conn:
+        conn.execute("DELETE FROM timeline_entries WHERE session_id = ?", (session_id,))
+        conn.execute("DELETE FROM timeline_watermarks WHERE session_id = ?", (session_id,))
+
+
+_TIMELINE_ENTRIES_SQL = f"""
+    SELECT start_ms, end_ms, speaker, text, {", ".join(TIMELINE_PHYSIOLOGY_COLUMNS)}
+    FROM timeline_entries
+    WHERE {{where}}
+    ORDER BY start_ms ASC, segment_id ASC{{tail}}
+"""
+
+
+def _timeline_entries_query(session_id: str, from_ms: int, to_ms: int, limit: int) -> tuple[str, list]:
+    where, params, tail = _window_sql("timeline_entries", "start_ms", "end_ms", session_id, from_ms, to_ms, limit)
+    return _TIMELINE_ENTRIES_SQL.format(where=where, tail=tail), params
+
+
+def _timeline_entry(row: sqlite3.Row) -> dict:
+    return {
+        "start_ms": row["start_ms"],
+        "end_ms": row["end_ms"],
+        "speaker": row["speaker"],
+        "text": row["text"],
+        "physiology": {f: row[f] for f in TIMELINE_PHYSIOLOGY_COLUMNS},
+    }
+
+
+def get_timeline_entries(
+    session_id: str,
+    db_path: str = DB_PATH,
+    from_ms: int = None,
+    to_ms: int = None,
+    limit: int = None,
+) -> list[dict]:
     """
-    Matches schema.sql transcript_segments table:
-      session_id
-      timestamp_start_ms
-      timestamp_end_ms
-      speaker  (seller/customer/unknown)
-      text
-      confidence
-      raw_json
-    Your transcription segments currently contain speaker_label; we'll store speaker='unknown'
-    and keep the diarization label inside raw_json so you don't lose info.
-    """
-    db_path = _normalize_db_path(db_path)
-    conn = sqlite3.connect(db_path)
-    try:
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA busy_timeout=5000;")
+    The materialized timeline, same shape as timeline_builder.build_timeline;
+    optionally only entries overlapping [from_ms, to_ms] (first `limit`).
+    """
+    sql, params = _timeline_entries_query(session_id, from_ms, to_ms, limit)
+    with reader(db_path) as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [_timeline_entry(r) for r in rows]
+
+
+def iter_timeline_entries(
+    session_id: str,
+    db_path: str = DB_PATH,
+    from_ms: int = None,
+    to_ms: int = None,
+    limit: int = None,
+) -> Iterator[dict]:
+    """Same as get_timeline_entries, yielded one entry at a time from the cursor."""
+    sql, params = _timeline_entries_query(session_id, from_ms, to_ms, limit)
+    with streaming_reader(db_path) as conn:
+        for row in conn.execute(sql, params):
+            yield _timeline_entry(row)
 
+
+def _as_list(values) -> list:
+    """NumPy arrays -> lists of Python scalars (sqlite3 can't bind np.int64 / np.bool_)."""
+    return values.tolist() if isinstance(values, np.ndarray) else values
+
+
+def insert_physiology_batch(session_id: str, timestamps, columns: Dict[str, list], db_path: str = DB_PATH) -> int:
+    """
+    Bulk insert of column-oriented physiology: `timestamps` plus one list per
+    field in `columns` (missing fields are stored as NULL). Lists or NumPy
+    arrays. All rows go in with one executemany in one transaction.
+    Returns the row count.
+    """
+    unknown = set(columns) - set(PHYSIOLOGY_COLUMNS)
+    if unknown:
+        raise ValueError(f"unknown physiology field(s): {', '.join(sorted(unknown))}")
+
+    n = len(timestamps)
+    timestamps = _as_list(timestamps)
+    values = []
+    for field in PHYSIOLOGY_COLUMNS:
+        column = columns.get(field)
+        values.append([None] * n if column is None else _as_list(column))
+    if any(len(v) != n for v in values):
+        raise ValueError("all physiology columns must have the same length as timestamps")
+
+    with transaction(db_path) as conn:
+        conn.executemany(
+            f"""
+            INSERT INTO physiology_events(session_id, timestamp_ms, {", ".join(PHYSIOLOGY_COLUMNS)})
+            VALUES (?, ?, {", ".join("?" for _ in PHYSIOLOGY_COLUMNS)})
+            """,
+            zip([session_id] * n, timestamps, *values),
+        )
+    return n
+
+def insert_transcript_segments(db_path: str, segments):
+    """
+    Bulk-insert STT segments ({session_id, start_ms, end_ms, text, speaker_label}).
+    speaker starts as 'unknown'; the diarization label goes in the indexed
+    speaker_label column (and raw_json), and apply_speaker_map_to_segments
+    turns it into seller/customer once speaker_map is filled in.
+    """
+    with transaction(db_path) as conn:
         rows = []
         for s in segments:
             raw = {
@@ -166,53 +1544,154 @@ def insert_transcript_segments(db_path: str, segments):
                 s["session_id"],
                 int(s["start_ms"]),
                 int(s["end_ms"]),
-                "unknown",           # schema speaker is seller/customer/unknown
+                "unknown",
                 s["text"],
-                None,                # confidence (optional)
-                str(raw),            # raw_json (cheap debugging, can be json.dumps if you want)
+                None,
+                json.dumps(raw, ensure_ascii=False),
+                s.get("speaker_label"),
             ))
 
         conn.executemany(
             """
             INSERT INTO transcript_segments(
               session_id, timestamp_start_ms, timestamp_end_ms,
-              speaker, text, confidence, raw_json
+              speaker, text, confidence, raw_json, speaker_label
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """,
             rows,
         )
-        conn.commit()
-    finally:
-        conn.close()
-
-def upsert_speaker_map(*args, **kwargs):
-    """
-    Your current schema.sql does NOT have speaker_map or speaker_label/speaker_role columns.
-    So this function cannot work unless you extend the schema.
-
-    For now, keep it as a no-op so the pipeline doesn't crash.
-    """
-    return
 
 # ─────────────────────────────────────────────────────────────
 # Analytics helpers (Gemini outputs + mood_timeseries)
 # ─────────────────────────────────────────────────────────────
 
-import json
-from typing import Any, Dict, Optional, List, Tuple
+MOOD_FIELDS = ["emotion_score", "engagement", "blink_rate", "is_talking"]
+
+
+def _window_sizes(window_ms) -> List[int]:
+    """window_ms may be one resolution or several."""
+    if isinstance(window_ms, int):
+        return [window_ms]
+    return [int(w) for w in window_ms]
+
+
+def _mood_bucket_sums(timestamps: np.ndarray, values: np.ndarray, window_ms: int):
+    # is_talking only counts when it's exactly 1; NULL/0 don't
+    talking = (values[:, 3:4] == 1.0).astype(np.float64)
+    return bucket_sums(timestamps, np.hstack([values[:, :3], talking]), window_ms)
+
+
+def _write_mood_windows(
+    conn: sqlite3.Connection,
+    session_id: str,
+    subject_role: str,
+    source: str,
+    window_ms: int,
+    buckets,
+    accumulate: bool,
+    replace_rows: bool = True,
+) -> int:
+    """
+    Fold bucket sums into mood_window_sums (adding to what's there when
+    accumulate=True, replacing otherwise), then rewrite the mood_timeseries
+    rows for just those windows from the running sums. replace_rows=False
+    only inserts, leaving any existing rows for those windows in place.
+    """
+    window_starts, sums, counts, n = buckets
+    if not len(window_starts):
+        return 0
+
+    key = (session_id, subject_role, source, window_ms)
+    combine = "{col} + excluded.{col}" if accumulate else "excluded.{col}"
+    sum_cols = [
+        "sum_mood", "count_mood", "sum_engagement", "count_engagement",
+        "sum_blink_rate", "count_blink_rate", "talk_count", "sample_count",
+    ]
+    conn.executemany(
+        f"""
+        INSERT INTO mood_window_sums(
+          session_id, subject_role, source, window_ms, window_start_ms, {", ".join(sum_cols)}
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(session_id, subject_role, source, window_ms, window_start_ms) DO UPDATE SET
+          {", ".join(f"{c} = " + combine.format(col=c) for c in sum_cols)}
+        """,
+        [
+            (
+                *key, int(window_starts[k]),
+                float(sums[k, 0]), int(counts[k, 0]),
+                float(sums[k, 1]), int(counts[k, 1]),
+                float(sums[k, 2]), int(counts[k, 2]),
+                int(sums[k, 3]), int(n[k]),
+            )
+            for k in range(len(window_starts))
+        ],
+    )
+
+    touched = [(*key, int(w)) for w in window_starts.tolist()]
+    if replace_rows:
+        conn.executemany(
+            """
+            DELETE FROM mood_timeseries
+            WHERE session_id = ? AND subject_role = ? AND source = ?
+              AND window_end_ms - window_start_ms = ? AND window_start_ms = ?
+            """,
+            touched,
+        )
+    conn.executemany(
+        """
+        INSERT INTO mood_timeseries(
+          session_id, subject_role, window_start_ms, window_end_ms,
+          mood_score, engagement, blink_rate, is_talking_pct,
+          sample_count, source
+        )
+        SELECT
+          session_id, subject_role, window_start_ms, window_start_ms + window_ms,
+          CASE WHEN count_mood THEN sum_mood / count_mood END,
+          CASE WHEN count_engagement THEN sum_engagement / count_engagement END,
+          CASE WHEN count_blink_rate THEN sum_blink_rate / count_blink_rate END,
+          CASE WHEN sample_count THEN CAST(talk_count AS REAL) / sample_count ELSE 0.0 END,
+          sample_count, source
+        FROM mood_window_sums
+        WHERE session_id = ? AND subject_role = ? AND source = ? AND window_ms = ? AND window_start_ms = ?
+        """,
+        touched,
+    )
+    return len(touched)
+
+
+def _set_mood_watermark(conn, session_id, subject_role, source, window_ms, last_physiology_id):
+    conn.execute(
+        """
+        INSERT INTO mood_watermarks(session_id, subject_role, source, window_ms, last_physiology_id)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(session_id, subject_role, source, window_ms) DO UPDATE SET
+          last_physiology_id = excluded.last_physiology_id
+        """,
+        (session_id, subject_role, source, window_ms, last_physiology_id),
+    )
 
 
 def compute_and_write_mood_timeseries(
     db_path: str,
     session_id: str,
-    window_ms: int = 10_000,
+    window_ms: int | List[int] = 10_000,
     subject_role: str = "customer",
     source: str = "presage",
     delete_existing: bool = True,
 ) -> int:
     """
-    Reads physiology_events for a session and writes aggregated rows to mood_timeseries.
+    Full rebuild: reads every physiology_events row for a session and writes
+    aggregated rows to mood_timeseries (one set per window_ms resolution).
+    Use this for backfills; live refreshes should call update_mood_timeseries.
+
+    Also resets the running sums + watermark, so update_mood_timeseries can
+    carry on incrementally from here.
+
+    delete_existing=True replaces the session's rows at each resolution.
+    delete_existing=False leaves existing mood_timeseries rows untouched
+    (same ids) and appends the rebuilt ones next to them, as it always has.
 
     physiology_events expected columns:
       - session_id
@@ -222,101 +1701,103 @@ def compute_and_write_mood_timeseries(
       - blink_rate (REAL)
       - is_talking (BOOLEAN-ish)
     """
-    db_path = _normalize_db_path(db_path)
+    with transaction(db_path) as conn:
+        timestamps, values = _read_physiology_columns(conn, session_id, MOOD_FIELDS)
 
-    conn = sqlite3.connect(db_path)
-    try:
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA busy_timeout=5000;")
-
-        rows: List[Tuple[int, Optional[float], Optional[float], Optional[float], Optional[int]]] = conn.execute(
-            """
-            SELECT timestamp_ms, emotion_score, engagement, blink_rate, is_talking
-            FROM physiology_events
-            WHERE session_id = ?
-            ORDER BY timestamp_ms ASC
-            """,
+        # BEGIN IMMEDIATE keeps other writers out, so this matches what we just read
+        last_id = conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM physiology_events WHERE session_id = ?",
             (session_id,),
-        ).fetchall()
-
-        if not rows:
-            return 0
+        ).fetchone()[0]
 
-        # bucket samples into fixed windows using integer division
-        buckets: Dict[int, Dict[str, Any]] = {}
-        for ts, emo, eng, br, talking in rows:
-            window_start = (int(ts) // window_ms) * window_ms
-            agg = buckets.get(window_start)
-            if agg is None:
-                agg = buckets[window_start] = {
-                    "sum_emo": 0.0,
-                    "sum_eng": 0.0,
-                    "sum_br": 0.0,
-                    "talk_count": 0,
-                    "count_emo": 0,
-                    "count_eng": 0,
-                    "count_br": 0,
-                    "n": 0,
-                }
-
-            agg["n"] += 1
-            if emo is not None:
-                agg["sum_emo"] += float(emo)
-                agg["count_emo"] += 1
-            if eng is not None:
-                agg["sum_eng"] += float(eng)
-                agg["count_eng"] += 1
-            if br is not None:
-                agg["sum_br"] += float(br)
-                agg["count_br"] += 1
-            if talking is not None and int(talking) == 1:
-                agg["talk_count"] += 1
-
-        if delete_existing:
+        written = 0
+        for size in _window_sizes(window_ms):
+            if delete_existing:
+                conn.execute(
+                    """
+                    DELETE FROM mood_timeseries
+                    WHERE session_id = ? AND subject_role = ? AND source = ?
+                      AND window_end_ms - window_start_ms = ?
+                    """,
+                    (session_id, subject_role, source, size),
+                )
             conn.execute(
-                "DELETE FROM mood_timeseries WHERE session_id = ? AND subject_role = ? AND source = ?",
-                (session_id, subject_role, source),
+                """
+                DELETE FROM mood_window_sums
+                WHERE session_id = ? AND subject_role = ? AND source = ? AND window_ms = ?
+                """,
+                (session_id, subject_role, source, size),
             )
 
-        out_rows = []
-        for window_start in sorted(buckets.keys()):
-            agg = buckets[window_start]
-            window_end = window_start + window_ms
+            if len(timestamps):
+                written += _write_mood_windows(
+                    conn, session_id, subject_role, source, size,
+                    _mood_bucket_sums(timestamps, values, size),
+                    accumulate=False,
+                    replace_rows=delete_existing,
+                )
+            _set_mood_watermark(conn, session_id, subject_role, source, size, last_id)
+
+        return written
 
-            mood_score = (agg["sum_emo"] / agg["count_emo"]) if agg["count_emo"] else None
-            engagement = (agg["sum_eng"] / agg["count_eng"]) if agg["count_eng"] else None
-            blink_rate = (agg["sum_br"] / agg["count_br"]) if agg["count_br"] else None
-            is_talking_pct = (agg["talk_count"] / agg["n"]) if agg["n"] else 0.0
 
-            out_rows.append((
-                session_id,
-                subject_role,
-                int(window_start),
-                int(window_end),
-                mood_score,
-                engagement,
-                blink_rate,
-                is_talking_pct,
-                int(agg["n"]),
-                source,
-            ))
+def update_mood_timeseries(
+    db_path: str,
+    session_id: str,
+    window_ms: int | List[int] = 10_000,
+    subject_role: str = "customer",
+    source: str = "presage",
+) -> int:
+    """
+    Incremental refresh: folds only physiology_events newer than each
+    resolution's watermark into the running window sums and rewrites just
+    the windows they land in (normally the open trailing window).
+    Returns the number of mood_timeseries rows rewritten.
+    """
+    sizes = _window_sizes(window_ms)
 
-        conn.executemany(
-            """
-            INSERT INTO mood_timeseries(
-              session_id, subject_role, window_start_ms, window_end_ms,
-              mood_score, engagement, blink_rate, is_talking_pct,
-              sample_count, source
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    with transaction(db_path) as conn:
+        watermarks = {}
+        for size in sizes:
+            row = conn.execute(
+                """
+                SELECT last_physiology_id FROM mood_watermarks
+                WHERE session_id = ? AND subject_role = ? AND source = ? AND window_ms = ?
+                """,
+                (session_id, subject_role, source, size),
+            ).fetchone()
+            watermarks[size] = row[0] if row else 0
+
+        rows = conn.execute(
+            f"""
+            SELECT id, timestamp_ms, {", ".join(MOOD_FIELDS)}
+            FROM physiology_events
+            WHERE session_id = ? AND id > ?
+            ORDER BY timestamp_ms ASC, id ASC
             """,
-            out_rows,
-        )
-        conn.commit()
-        return len(out_rows)
+            (session_id, min(watermarks.values())),
+        ).fetchall()
+        if not rows:
+            return 0
 
-    finally:
-        conn.close()
+        table = np.array(rows, dtype=np.float64)
+        ids = table[:, 0].astype(np.int64)
+        timestamps = table[:, 1].astype(np.int64)
+        values = table[:, 2:]
+        last_id = int(ids.max())
+
+        written = 0
+        for size in sizes:
+            fresh = ids > watermarks[size]
+            if fresh.any():
+                written += _write_mood_windows(
+                    conn, session_id, subject_role, source, size,
+                    _mood_bucket_sums(timestamps[fresh], values[fresh], size),
+                    accumulate=True,
+                )
+            _set_mood_watermark(conn, session_id, subject_role, source, size, last_id)
+
+        return written
 
 
 def insert_gemini_output(
@@ -339,13 +1820,7 @@ def insert_gemini_output(
     Writes Gemini output (summary + optional metrics) into gemini_outputs.
     raw_json should be the full Gemini response dict.
     """
-    db_path = _normalize_db_path(db_path)
-
-    conn = sqlite3.connect(db_path)
-    try:
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA busy_timeout=5000;")
-
+    with transaction(db_path) as conn:
         conn.execute(
             """
             INSERT INTO gemini_outputs(
@@ -371,6 +1846,3 @@ def insert_gemini_output(
                 json.dumps(raw_json, ensure_ascii=False),
             ),
         )
-        conn.commit()
-    finally:
-        conn.close()
\ No newline at end of file
@@ -106,19 +106,77 @@ WHERE s.who = 'seller'
 ORDER BY m.session_id, m.bucket;
 """
 
+import ast
+import json
 import sqlite3
 from pathlib import Path
 
+# Columns added to schema.sql after the first DBs were created.
+# CREATE TABLE IF NOT EXISTS won't touch an existing table, so add them here.
+COLUMN_MIGRATIONS = [
+    ("physiology_events", "heart_rate", "REAL"),
+    ("physiology_events", "hrv", "REAL"),
+    ("physiology_events", "breathing_rate", "REAL"),
+    ("physiology_events", "phasic", "REAL"),
+    ("transcript_segments", "speaker_label", "TEXT"),
+]
+
+
+def _backfill_speaker_labels(conn: sqlite3.Connection):
+    """
+    Copy the diarization label out of raw_json into the new speaker_label
+    column. Older rows were written with str(dict) instead of JSON; those are
+    parsed as Python literals and their raw_json rewritten as real JSON.
+    """
+    conn.execute(
+        """
+        UPDATE transcript_segments
+        SET speaker_label = json_extract(raw_json, '$.speaker_label')
+        WHERE speaker_label IS NULL AND json_valid(raw_json)
+        """
+    )
+    rows = conn.execute(
+        "SELECT id, raw_json FROM transcript_segments "
+        "WHERE raw_json LIKE '{%' AND NOT json_valid(raw_json)"
+    ).fetchall()
+    updates = []
+    for seg_id, raw in rows:
+        try:
+            payload = ast.literal_eval(raw)
+        except (ValueError, SyntaxError):
+            continue
+        if isinstance(payload, dict):
+            updates.append((payload.get("speaker_label"), json.dumps(payload, ensure_ascii=False), seg_id))
+    conn.executemany("UPDATE transcript_segments SET speaker_label = ?, raw_json = ? WHERE id = ?", updates)
+
+
+# Run once, right after the column they fill is added
+COLUMN_BACKFILLS = {
+    ("transcript_segments", "speaker_label"): _backfill_speaker_labels,
+}
+
+
+def _apply_column_migrations(conn: sqlite3.Connection):
+    for table, column, decl in COLUMN_MIGRATIONS:
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if existing and column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+            backfill = COLUMN_BACKFILLS.get((table, column))
+            if backfill:
+                backfill(conn)
+
+
 def init_db(db_path: str):
     db_path = Path(db_path).expanduser().resolve()
     db_path.parent.mkdir(parents=True, exist_ok=True)
 
-    schema_path = Path(__file__).resolve().parent / "src" / "schema.sql"
+    schema_path = Path(__file__).resolve().parent / "schema.sql"
     if not schema_path.exists():
         raise SystemExit(f"schema.sql not found at: {schema_path}")
 
     conn = sqlite3.connect(str(db_path))
     try:
+        _apply_column_migrations(conn)
         with open(schema_path, "r", encoding="utf-8") as f:
             conn.executescript(f.read())
         conn.commit()
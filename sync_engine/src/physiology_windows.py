@@ -0,0 +1,109 @@
+"""
+sync-engine/src/physiology_windows.py — Vectorized window means over physiology columns.
+
+The timeline (one window per transcript segment) and mood_timeseries (fixed
+window_ms buckets) both boil down to "sum and count the non-NULL readings
+between two timestamps". Instead of looping over row dicts, we work on the
+columnar arrays from db_manager.get_physiology_columns:
+
+    timestamps: int64[n]              sorted ascending
+    values:     float64[n, n_fields]  NULL stored as NaN
+
+Window boundaries are found with np.searchsorted and the per-window sums with
+np.add.reduceat, so the cost is a couple of passes over the arrays no matter
+how many windows there are.
+"""
+
+import numpy as np
+
+
+def window_sums(values: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    NaN-aware sums and counts of values[lo[i]:hi[i]] for every window i.
+
+    Windows may overlap or be empty (lo == hi). Returns (sums, counts),
+    both shaped (n_windows, n_fields).
+    """
+    n_windows = len(lo)
+    n_fields = values.shape[1]
+    if n_windows == 0:
+        return np.zeros((0, n_fields)), np.zeros((0, n_fields), dtype=np.int64)
+
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+
+    # reduceat needs every index < len(array): pad with a zero row so hi == n is valid.
+    filled = np.vstack([filled, np.zeros((1, n_fields))])
+    present = np.vstack([present, np.zeros((1, n_fields), dtype=bool)]).astype(np.int64)
+
+    # Interleave [lo0, hi0, lo1, hi1, ...]; the even slots are our windows,
+    # the odd slots (hi_i -> lo_i+1) are thrown away.
+    bounds = np.empty(2 * n_windows, dtype=np.intp)
+    bounds[0::2] = lo
+    bounds[1::2] = hi
+
+    sums = np.add.reduceat(filled, bounds, axis=0)[0::2]
+    counts = np.add.reduceat(present, bounds, axis=0)[0::2]
+
+    # reduceat returns array[lo] (not 0) for empty windows.
+    empty = np.asarray(hi) <= np.asarray(lo)
+    sums[empty] = 0.0
+    counts[empty] = 0
+    return sums, counts
+
+
+def window_means(
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    starts_ms: np.ndarray,
+    ends_ms: np.ndarray,
+) -> np.ndarray:
+    """
+    Mean of each column over readings with start <= timestamp <= end.
+
+    Both bounds are inclusive (same as the timeline merge). Windows with no
+    non-NULL reading for a field come back as NaN.
+    """
+    lo = np.searchsorted(timestamps, starts_ms, side="left")
+    hi = np.searchsorted(timestamps, ends_ms, side="right")
+    hi = np.maximum(hi, lo)
+
+    sums, counts = window_sums(values, lo, hi)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def bucket_sums(
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    window_ms: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Group readings into fixed [k*window_ms, (k+1)*window_ms) buckets.
+
+    Only buckets that contain at least one reading are returned.
+    Returns (window_starts, sums, counts, n_rows).
+    """
+    if len(timestamps) == 0:
+        n_fields = values.shape[1]
+        return (
+            np.zeros(0, dtype=np.int64),
+            np.zeros((0, n_fields)),
+            np.zeros((0, n_fields), dtype=np.int64),
+            np.zeros(0, dtype=np.int64),
+        )
+
+    window_starts_all = (timestamps // window_ms) * window_ms
+    # timestamps are sorted, so each bucket is one contiguous run
+    window_starts, lo = np.unique(window_starts_all, return_index=True)
+    hi = np.append(lo[1:], len(timestamps))
+
+    sums, counts = window_sums(values, lo, hi)
+    return window_starts, sums, counts, hi - lo
+
+
+def to_rounded(value: float, ndigits: int = 2):
+    """NaN -> None, otherwise Python round() on a plain float."""
+    if np.isnan(value):
+        return None
+    return round(float(value), ndigits)
@@ -42,6 +42,10 @@ CREATE TABLE IF NOT EXISTS physiology_events (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
     session_id      TEXT NOT NULL REFERENCES sessions(session_id),
     timestamp_ms    INTEGER NOT NULL,   -- UTC millis — THE SYNC KEY
+    heart_rate      REAL,               -- BPM
+    hrv             REAL,               -- Heart rate variability (ms)
+    breathing_rate  REAL,               -- Breaths per minute
+    phasic          REAL,               -- Relative blood pressure trend
     emotion_score   REAL,               -- -1.0 to 1.0
     engagement      REAL,               -- 0.0 to 1.0
     blink_rate      REAL,               -- Blinks per minute
@@ -62,7 +66,8 @@ CREATE TABLE IF NOT EXISTS transcript_segments (
                        CHECK(speaker IN ('seller','customer','unknown')),
     text               TEXT NOT NULL,
     confidence         REAL,
-    raw_json           TEXT
+    raw_json           TEXT,
+    speaker_label      TEXT               -- diarization label ("spk_0"); NULL if none
 );
 
 -- ─── AI Insights (from Claude) ─────────────────────────────
@@ -82,6 +87,51 @@ CREATE TABLE IF NOT EXISTS insights (
     created_at       DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
+-- ─── Analysis Jobs (background Claude analysis) ────────────
+-- Written by: api-server (enqueue on stop, worker pool updates)
+-- Persisted so pending work survives an api-server restart.
+
+CREATE TABLE IF NOT EXISTS analysis_jobs (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id     TEXT NOT NULL REFERENCES sessions(session_id),
+    status         TEXT NOT NULL DEFAULT 'pending'
+                   CHECK(status IN ('pending','running','done','error')),
+    attempts       INTEGER NOT NULL DEFAULT 0,
+    error          TEXT,
+    overall_score  INTEGER,           -- Copied from the analysis result
+    created_at_ms  INTEGER NOT NULL,
+    started_at_ms  INTEGER,
+    finished_at_ms INTEGER
+);
+
+-- ─── Timeline Entries (materialized merge) ─────────────────
+-- Written by: sync-engine/src/timeline_builder.py (refresh_timeline)
+-- One row per transcript segment with its averaged physiology, so
+-- serving a timeline is one indexed range read instead of a re-merge.
+
+CREATE TABLE IF NOT EXISTS timeline_entries (
+    segment_id     INTEGER PRIMARY KEY REFERENCES transcript_segments(id),
+    session_id     TEXT NOT NULL REFERENCES sessions(session_id),
+    start_ms       INTEGER NOT NULL,
+    end_ms         INTEGER NOT NULL,
+    speaker        TEXT NOT NULL,
+    text           TEXT NOT NULL,
+    heart_rate     REAL,
+    hrv            REAL,
+    breathing_rate REAL,
+    phasic         REAL,
+    emotion_score  REAL,
+    engagement     REAL
+);
+
+-- How far timeline_entries has caught up, per session.
+CREATE TABLE IF NOT EXISTS timeline_watermarks (
+    session_id         TEXT PRIMARY KEY REFERENCES sessions(session_id),
+    last_transcript_id INTEGER NOT NULL DEFAULT 0,  -- max transcript_segments.id merged
+    last_physiology_id INTEGER NOT NULL DEFAULT 0,  -- max physiology_events.id merged
+    finalized          BOOLEAN NOT NULL DEFAULT 0   -- refreshed after the session stopped
+);
+
 -- ─── Indexes for fast timeline queries ─────────────────────
 -- These are CRITICAL for the sync-engine's merge performance.
 
@@ -91,9 +141,44 @@ CREATE INDEX IF NOT EXISTS idx_physio_session_time
 CREATE INDEX IF NOT EXISTS idx_transcript_session_time
     ON transcript_segments(session_id, timestamp_start_ms);
 
+-- Finds segments still open at a given time (late physiology, range reads)
+CREATE INDEX IF NOT EXISTS idx_transcript_session_end
+    ON transcript_segments(session_id, timestamp_end_ms);
+
+-- Longest segment per session in one seek (MAX uses the index). Bounds how far
+-- before from_ms a time-range read has to look for segments straddling it.
+CREATE INDEX IF NOT EXISTS idx_transcript_session_duration
+    ON transcript_segments(session_id, (timestamp_end_ms - timestamp_start_ms));
+
+-- apply_speaker_map_to_segments joins speaker_map on (session_id, speaker_label)
+CREATE INDEX IF NOT EXISTS idx_transcript_session_label
+    ON transcript_segments(session_id, speaker_label);
+
+CREATE INDEX IF NOT EXISTS idx_timeline_session_time
+    ON timeline_entries(session_id, start_ms);
+
+CREATE INDEX IF NOT EXISTS idx_timeline_session_duration
+    ON timeline_entries(session_id, (end_ms - start_ms));
+
 CREATE INDEX IF NOT EXISTS idx_insights_session
     ON insights(session_id);
 
+-- GET /sessions: newest-first keyset pages, optionally filtered by status or customer
+CREATE INDEX IF NOT EXISTS idx_sessions_start
+    ON sessions(start_time_ms, session_id);
+
+CREATE INDEX IF NOT EXISTS idx_sessions_status_start
+    ON sessions(status, start_time_ms, session_id);
+
+CREATE INDEX IF NOT EXISTS idx_sessions_customer_start
+    ON sessions(customer_name COLLATE NOCASE, start_time_ms, session_id);
+
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status
+    ON analysis_jobs(status, id);
+
+CREATE INDEX IF NOT EXISTS idx_analysis_jobs_session
+    ON analysis_jobs(session_id);
+
 -- ─── Speaker Map (diarization label -> role) ─────────────────
 -- Written by: transcription (heuristic mapping) or UI (manual fix)
 -- Allows mapping diarized speakers (e.g., "spk_0") to app roles.
@@ -108,6 +193,60 @@ CREATE TABLE IF NOT EXISTS speaker_map (
 CREATE INDEX IF NOT EXISTS idx_speaker_map_session
     ON speaker_map(session_id);
 
+-- ─── Session Stats (rollups for GET /analytics) ────────────
+-- Written by: db_manager.refresh_session_stats, when a session stops and
+-- again when its analysis is saved (which adds analysis_score).
+-- One row per finished session, so cross-session summaries aggregate a
+-- few thousand rows instead of re-reading raw events.
+
+CREATE TABLE IF NOT EXISTS session_stats (
+    session_id          TEXT PRIMARY KEY REFERENCES sessions(session_id),
+    duration_ms         INTEGER,
+    seller_talk_ms      INTEGER NOT NULL DEFAULT 0,  -- sum of segment lengths
+    customer_talk_ms    INTEGER NOT NULL DEFAULT 0,
+    seller_segments     INTEGER NOT NULL DEFAULT 0,
+    customer_segments   INTEGER NOT NULL DEFAULT 0,
+    segment_count       INTEGER NOT NULL DEFAULT 0,  -- incl. 'unknown' speaker
+    physiology_samples  INTEGER NOT NULL DEFAULT 0,
+    engagement_mean     REAL,
+    engagement_min      REAL,
+    engagement_max      REAL,
+    emotion_mean        REAL,
+    emotion_min         REAL,
+    emotion_max         REAL,
+    heart_rate_mean     REAL,
+    heart_rate_max      REAL,
+    heart_rate_peak_ms  INTEGER,                     -- when heart_rate_max was reached (UTC ms)
+    analysis_score      INTEGER,                     -- overall_score of the latest analysis
+    computed_at_ms      INTEGER NOT NULL
+);
+
+-- ─── Transcript Search (GET /search) ────────────────────────
+-- External-content FTS5 index over transcript_segments.text: the text is
+-- stored once (in transcript_segments) and the triggers keep the index in
+-- step with every insert / delete / text edit. Databases created before
+-- this table existed need one backfill: python src/search_backfill.py
+
+CREATE VIRTUAL TABLE IF NOT EXISTS transcript_fts USING fts5(
+    text,
+    content='transcript_segments',
+    content_rowid='id',
+    tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS transcript_fts_insert AFTER INSERT ON transcript_segments BEGIN
+    INSERT INTO transcript_fts(rowid, text) VALUES (new.id, new.text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS transcript_fts_delete AFTER DELETE ON transcript_segments BEGIN
+    INSERT INTO transcript_fts(transcript_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+
+-- Only text edits touch the index (speaker remaps don't).
+CREATE TRIGGER IF NOT EXISTS transcript_fts_update AFTER UPDATE OF text ON transcript_segments BEGIN
+    INSERT INTO transcript_fts(transcript_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO transcript_fts(rowid, text) VALUES (new.id, new.text);
+END;
 
 -- ───────────────────────────────────────────────────────────
 -- Gemini outputs (AI summaries)
@@ -165,6 +304,38 @@ CREATE TABLE IF NOT EXISTS mood_timeseries (
 CREATE INDEX IF NOT EXISTS idx_mood_timeseries_session_time
   ON mood_timeseries(session_id, window_start_ms);
 
+-- Running sums behind each mood_timeseries window, so new physiology can be
+-- folded in without re-reading the whole session. One row per window per
+-- resolution (window_ms); several resolutions can be kept side by side.
+CREATE TABLE IF NOT EXISTS mood_window_sums (
+  session_id       TEXT NOT NULL REFERENCES sessions(session_id),
+  subject_role     TEXT NOT NULL,
+  source           TEXT NOT NULL,
+  window_ms        INTEGER NOT NULL,
+  window_start_ms  INTEGER NOT NULL,
+
+  sum_mood         REAL NOT NULL DEFAULT 0,
+  count_mood       INTEGER NOT NULL DEFAULT 0,
+  sum_engagement   REAL NOT NULL DEFAULT 0,
+  count_engagement INTEGER NOT NULL DEFAULT 0,
+  sum_blink_rate   REAL NOT NULL DEFAULT 0,
+  count_blink_rate INTEGER NOT NULL DEFAULT 0,
+  talk_count       INTEGER NOT NULL DEFAULT 0,
+  sample_count     INTEGER NOT NULL DEFAULT 0,
+
+  PRIMARY KEY (session_id, subject_role, source, window_ms, window_start_ms)
+);
+
+-- Last physiology_events.id folded into mood_window_sums, per resolution.
+CREATE TABLE IF NOT EXISTS mood_watermarks (
+  session_id         TEXT NOT NULL REFERENCES sessions(session_id),
+  subject_role       TEXT NOT NULL,
+  source             TEXT NOT NULL,
+  window_ms          INTEGER NOT NULL,
+  last_physiology_id INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (session_id, subject_role, source, window_ms)
+);
+
 SELECT window_start_ms, mood_score, engagement
 FROM mood_timeseries
 WHERE session_id = ? AND subject_role = 'customer'
@@ -0,0 +1,31 @@
+# sync_engine/src/search_backfill.py
+# Builds the transcript search index (transcript_fts) from existing transcript_segments.
+# New segments are indexed by triggers; run this once on DBs created before
+# transcript_fts existed, or any time the index looks out of date.
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from shared.config import DB_PATH
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import db_manager
+from init_db import init_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the transcript full-text search index")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite file (default: DB_PATH)")
+    args = parser.parse_args()
+
+    init_db(args.db)        # creates transcript_fts + triggers if this DB predates them
+    start = time.perf_counter()
+    count = db_manager.rebuild_transcript_search(args.db)
+    print(f"[ok] indexed {count} transcript segment(s) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
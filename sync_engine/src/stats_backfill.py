@@ -0,0 +1,40 @@
+# sync_engine/src/stats_backfill.py
+# Computes session_stats for finished sessions that don't have a row yet
+# (sessions stopped before session_stats existed). New sessions get theirs
+# from stop_session / the analyzer; --all recomputes every finished session.
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from shared.config import DB_PATH
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import db_manager
+from init_db import init_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill per-session analytics rollups")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite file (default: DB_PATH)")
+    parser.add_argument("--all", action="store_true", help="Recompute every finished session, not just missing ones")
+    args = parser.parse_args()
+
+    init_db(args.db)        # creates session_stats if this DB predates it
+    if args.all:
+        session_ids = [s["session_id"] for s in db_manager.find_sessions(
+            statuses=["completed", "analyzing", "analyzed", "error"], db_path=args.db,
+        )]
+    else:
+        session_ids = db_manager.sessions_missing_stats(args.db)
+
+    start = time.perf_counter()
+    for session_id in session_ids:
+        db_manager.refresh_session_stats(session_id, db_path=args.db)
+    print(f"[ok] computed stats for {len(session_ids)} session(s) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
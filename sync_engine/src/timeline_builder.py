@@ -5,10 +5,12 @@ THIS IS THE CORE SYNC LOGIC. It answers the question:
 "What was the customer's body doing when they said X?"
 
 HOW IT WORKS:
-1. Get all transcript segments for a session (ordered by time)
-2. For each segment, find all physiology readings in the same time window
-3. Average the physiology values across that window
-4. Return a merged timeline: [{text, speaker, physiology}, ...]
+1. Read all transcript segments for a session (ordered by start time)
+2. Read all physiology readings for the session (ordered by timestamp)
+3. Find each segment's window in the (sorted) physiology timestamps
+   without another DB query
+4. Average the physiology values across that window (vectorized, NaN-aware)
+5. Return a merged timeline: [{text, speaker, physiology}, ...]
 
 EXAMPLE OUTPUT:
     {
@@ -29,9 +31,14 @@ EXAMPLE OUTPUT:
 import sys
 from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
-from sync_engine_path import *
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
 import db_manager
+from physiology_windows import window_means, to_rounded
+
+
+PHYSIOLOGY_FIELDS = ["heart_rate", "hrv", "breathing_rate", "phasic", "emotion_score", "engagement"]
 
 
 def build_timeline(session_id: str) -> list[dict]:
@@ -40,55 +47,129 @@ def build_timeline(session_id: str) -> list[dict]:
 
     Returns a list of entries, each combining a transcript segment
     with the averaged physiology data from the same time window.
+
+    One ordered read of each table. Physiology comes back as columns
+    (see physiology_windows.py), so every segment's window mean is
+    computed in one vectorized pass — overlapping segments included.
+
+    This always recomputes everything; get_timeline() serves the
+    materialized copy and only merges what changed.
     """
     segments = db_manager.get_transcript_for_session(session_id)
 
     if not segments:
         return []
 
-    timeline = []
+    return [_public_entry(e) for e in _merge_segments(session_id, segments)]
+
 
-    for seg in segments:
-        start_ms = seg["timestamp_start_ms"]
-        end_ms = seg["timestamp_end_ms"]
+def _merge_segments(session_id: str, segments: list[dict]) -> list[dict]:
+    """Merge the given segments with the physiology inside their windows (adds segment_id)."""
+    starts = np.array([seg["timestamp_start_ms"] for seg in segments], dtype=np.int64)
+    ends = np.array([seg["timestamp_end_ms"] for seg in segments], dtype=np.int64)
 
-        # Find physiology readings that overlap this transcript segment
-        physio_readings = db_manager.get_physiology_in_range(session_id, start_ms, end_ms)
+    # Only the physiology spanned by these segments is read.
+    timestamps, values = db_manager.get_physiology_columns(
+        session_id, PHYSIOLOGY_FIELDS, start_ms=int(starts.min()), end_ms=int(ends.max())
+    )
+    means = window_means(timestamps, values, starts, ends)
 
-        # Average the physiology values across the window
-        physiology = _average_physiology(physio_readings)
+    timeline = []
 
+    for seg, row in zip(segments, means.tolist()):
         timeline.append({
-            "start_ms": start_ms,
-            "end_ms": end_ms,
+            "segment_id": seg["id"],
+            "start_ms": seg["timestamp_start_ms"],
+            "end_ms": seg["timestamp_end_ms"],
             "speaker": seg["speaker"],
             "text": seg["text"],
-            "physiology": physiology
+            "physiology": {
+                field: to_rounded(value) for field, value in zip(PHYSIOLOGY_FIELDS, row)
+            },
         })
 
     return timeline
 
 
-def _average_physiology(readings: list[dict]) -> dict:
-    """Average physiology readings across a time window."""
-    if not readings:
-        return {
-            "heart_rate": None,
-            "hrv": None,
-            "breathing_rate": None,
-            "phasic": None,
-            "emotion_score": None,
-            "engagement": None,
-        }
-
-    fields = ["heart_rate", "hrv", "breathing_rate", "phasic", "emotion_score", "engagement"]
-    result = {}
+def _public_entry(entry: dict) -> dict:
+    return {k: v for k, v in entry.items() if k != "segment_id"}
 
-    for field in fields:
-        values = [r[field] for r in readings if r.get(field) is not None]
-        result[field] = round(sum(values) / len(values), 2) if values else None
 
-    return result
+def refresh_timeline(session_id: str, session: dict | None = None) -> int:
+    """
+    Bring timeline_entries up to date for a session. Returns the number of
+    entries (re)written.
+
+    Uses the per-session watermark (last transcript / physiology row ids):
+      - segments with id > last_transcript_id are merged for the first time
+      - physiology with id > last_physiology_id only touches the segments
+        whose windows overlap it, and only those are recomputed
+    Rows can still arrive after the session stops (batch transcription
+    writes then), so every call checks. Once finalized, if neither of the
+    session's tables has grown past the watermark (two MAX(id) lookups)
+    nothing else is read.
+    """
+    watermark = db_manager.get_timeline_watermark(session_id)
+    if watermark["finalized"]:
+        max_transcript_id, max_physiology_id = db_manager.get_max_row_ids(session_id)
+        if (max_transcript_id <= watermark["last_transcript_id"]
+                and max_physiology_id <= watermark["last_physiology_id"]):
+            return 0
+
+    session = session or db_manager.get_session(session_id)
+    finalized = bool(session) and session["status"] != "recording"
+
+    new_segments = db_manager.get_transcript_after_id(session_id, watermark["last_transcript_id"])
+    physio_span = db_manager.get_physiology_span_after_id(session_id, watermark["last_physiology_id"])
+    if not new_segments and not physio_span and watermark["finalized"] == finalized:
+        return 0
+
+    to_merge = {seg["id"]: seg for seg in new_segments}
+    if physio_span:
+        for seg in db_manager.get_transcript_overlapping(
+            session_id, physio_span["min_ts"], physio_span["max_ts"]
+        ):
+            to_merge.setdefault(seg["id"], seg)
+
+    # Only from the after-id read: a segment committed since then may have
+    # come back from get_transcript_overlapping, but one that didn't would
+    # be skipped for good if the watermark moved past it.
+    last_transcript_id = max([watermark["last_transcript_id"], *(seg["id"] for seg in new_segments)])
+    last_physiology_id = physio_span["max_id"] if physio_span else watermark["last_physiology_id"]
+
+    entries = _merge_segments(session_id, list(to_merge.values())) if to_merge else []
+    db_manager.upsert_timeline_entries(
+        session_id, entries, last_transcript_id, last_physiology_id, finalized=finalized
+    )
+    return len(entries)
+
+
+def get_timeline(
+    session_id: str,
+    session: dict | None = None,
+    from_ms: int | None = None,
+    to_ms: int | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """
+    The merged timeline, served from timeline_entries after an incremental
+    refresh. Same output as build_timeline(); from_ms/to_ms/limit return
+    only the entries overlapping that window.
+    """
+    refresh_timeline(session_id, session)
+    return db_manager.get_timeline_entries(session_id, from_ms=from_ms, to_ms=to_ms, limit=limit)
+
+
+def iter_timeline(
+    session_id: str,
+    session: dict | None = None,
+    from_ms: int | None = None,
+    to_ms: int | None = None,
+    limit: int | None = None,
+):
+    """Generator version of get_timeline: refreshes, then yields entries straight from the cursor."""
+    refresh_timeline(session_id, session)
+    yield from db_manager.iter_timeline_entries(session_id, from_ms=from_ms, to_ms=to_ms, limit=limit)
 
 
 def format_timeline_for_display(timeline: list[dict], session_start_ms: int) -> str:
@@ -0,0 +1,19 @@
+"""
+Shared setup for the sync_engine tests: import paths and a scratch DB.
+
+shared.config reads DB_PATH once, at import time, so it is set here before
+any test module imports db_manager / timeline_builder.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+SCRATCH = Path(tempfile.mkdtemp(prefix="saleslens-sync-tests-"))
+os.environ.setdefault("DB_PATH", str(SCRATCH / "test.db"))
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "sync_engine" / "src"))
+sys.path.insert(0, str(ROOT / "sync_engine" / "bench"))
@@ -0,0 +1,186 @@
+"""db_manager: write transactions, keyset paging, transcript search and incremental mood windows."""
+
+import numpy as np
+import pytest
+
+import db_manager
+from init_db import init_db
+
+WINDOWS = [10_000, 20_000]
+MOOD_COLUMNS = (
+    "window_start_ms, window_end_ms, mood_score, engagement, blink_rate, is_talking_pct, sample_count"
+)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db_path = str(tmp_path / "db.sqlite")
+    init_db(db_path)
+    yield db_path
+    db_manager.close_connections()
+
+
+def _session_ids(db_path):
+    with db_manager.reader(db_path) as conn:
+        return [r[0] for r in conn.execute("SELECT session_id FROM sessions ORDER BY session_id")]
+
+
+# ─── transaction() ──────────────────────────────────────────
+
+def test_nested_transaction_commits_with_the_outer_one(db):
+    with db_manager.transaction(db):
+        db_manager.insert_session(db, "outer", 0)
+        with db_manager.transaction(db):
+            db_manager.insert_session(db, "inner", 0)
+        # The inner block joined ours, so nothing is visible to other connections yet
+        assert _session_ids(db) == []
+
+    assert _session_ids(db) == ["inner", "outer"]
+
+
+def test_error_in_nested_transaction_rolls_back_everything(db):
+    with pytest.raises(RuntimeError):
+        with db_manager.transaction(db):
+            db_manager.insert_session(db, "outer", 0)
+            with db_manager.transaction(db):
+                db_manager.insert_session(db, "inner", 0)
+                raise RuntimeError("boom")
+
+    assert _session_ids(db) == []
+    # The writer is usable again afterwards
+    db_manager.insert_session(db, "after", 0)
+    assert _session_ids(db) == ["after"]
+
+
+# ─── list_sessions keyset paging ────────────────────────────
+
+def _page_through(db_path, limit, **filters):
+    pages, after = [], None
+    while True:
+        page = db_manager.list_sessions(db_path, limit=limit, after=after, **filters)
+        if not page:
+            return pages
+        pages.append([s["session_id"] for s in page])
+        after = (page[-1]["start_time_ms"], page[-1]["session_id"])
+
+
+def test_paging_with_tied_start_times_neither_skips_nor_repeats(db):
+    # Five sessions share one start time, so pages break in the middle of the tie
+    for i in range(5):
+        db_manager.insert_session(db, f"tie-{i}", 1_000)
+    db_manager.insert_session(db, "newest", 2_000)
+    db_manager.insert_session(db, "oldest", 500)
+
+    everything = [s["session_id"] for s in db_manager.list_sessions(db)]
+    assert everything == ["newest", "tie-4", "tie-3", "tie-2", "tie-1", "tie-0", "oldest"]
+    assert _page_through(db, 2) == [everything[0:2], everything[2:4], everything[4:6], everything[6:]]
+    assert _page_through(db, 7) == [everything]
+
+
+def test_paging_applies_filters_on_every_page(db):
+    for i in range(6):
+        db_manager.insert_session(db, f"s-{i}", 1_000 * i, customer_name="Acme" if i % 2 else "Globex")
+
+    pages = _page_through(db, 2, customer="acme", since_ms=1_000, until_ms=5_000)
+    assert pages == [["s-3", "s-1"]]
+
+
+# ─── transcript search ──────────────────────────────────────
+
+@pytest.mark.parametrize("text, expected", [
+    ("pricing", '"pricing"'),
+    ("pric*", '"pric"*'),
+    ('"next quarter" budget', '"next quarter" "budget"'),
+    ("price OR discount", '"price" "OR" "discount"'),
+    ("NEAR(price", '"NEAR price"'),
+    ("-discount", '"discount"'),
+    ("text:price", '"text price"'),
+    ('"unbalanced quote', '"unbalanced" "quote"'),
+    ("don't", '"don t"'),
+    ("* ( ) :", ""),
+    ("", ""),
+])
+def test_fts_query_quotes_every_term(text, expected):
+    assert db_manager.fts_query(text) == expected
+
+
+def _add_segments(db_path, session_id, texts):
+    db_manager.insert_session(db_path, session_id, 1_000, customer_name="Acme")
+    db_manager.insert_transcript_segments(db_path, [
+        {"session_id": session_id, "start_ms": 1_000 * i, "end_ms": 1_000 * i + 900, "text": text, "speaker_label": "0"}
+        for i, text in enumerate(texts)
+    ])
+
+
+@pytest.mark.parametrize("query", [
+    '"price', "-price", "^price", "price)", "price:", "+price", "{price}", "price*",
+])
+def test_search_treats_fts_syntax_as_plain_words(db, query):
+    _add_segments(db, "search", ["the price is too high", "let's talk about the discount"])
+
+    hits = db_manager.search_transcripts(query, db_path=db)
+    assert [h["timestamp_start_ms"] for h in hits] == [0]
+
+
+def test_search_keywords_are_searched_for_not_applied(db):
+    _add_segments(db, "search", ["price or discount", "price and discount", "near the price"])
+
+    assert [h["timestamp_start_ms"] for h in db_manager.search_transcripts("price OR", db_path=db)] == [0]
+    assert [h["timestamp_start_ms"] for h in db_manager.search_transcripts("AND discount", db_path=db)] == [1_000]
+    assert [h["timestamp_start_ms"] for h in db_manager.search_transcripts("NEAR(price", db_path=db)] == []
+
+
+def test_search_matches_prefixes_and_phrases(db):
+    _add_segments(db, "search", ["our pricing changed", "the price is fine", "fine price"])
+
+    assert len(db_manager.search_transcripts("pric*", db_path=db)) == 3
+    assert [h["timestamp_start_ms"] for h in db_manager.search_transcripts('"price is"', db_path=db)] == [1_000]
+    assert db_manager.search_transcripts("* :", db_path=db) == []
+
+
+# ─── mood_timeseries ────────────────────────────────────────
+
+def _mood_rows(db_path, session_id):
+    with db_manager.reader(db_path) as conn:
+        return [tuple(r) for r in conn.execute(
+            f"""
+            SELECT {MOOD_COLUMNS} FROM mood_timeseries WHERE session_id = ?
+            ORDER BY window_end_ms - window_start_ms, window_start_ms
+            """,
+            (session_id,),
+        )]
+
+
+def _physiology(rng, start_ms, end_ms):
+    timestamps = np.arange(start_ms, end_ms, 250, dtype=np.int64)
+    n = len(timestamps)
+    return timestamps, {
+        "emotion_score": rng.uniform(-1, 1, n).round(3),
+        "engagement": rng.uniform(0, 1, n).round(3),
+        "blink_rate": rng.uniform(5, 30, n).round(3),
+        "is_talking": rng.integers(0, 2, n),
+    }
+
+
+def test_incremental_mood_matches_full_rebuild_with_late_physiology(db):
+    rng = np.random.default_rng(3)
+    db_manager.insert_session(db, "mood", 0)
+
+    # Arrives in order, a few seconds at a time, refreshing after each batch ...
+    for start in range(0, 90_000, 6_000):
+        timestamps, columns = _physiology(rng, start, start + 6_000)
+        keep = (timestamps < 20_000) | (timestamps >= 35_000)
+        db_manager.insert_physiology_batch("mood", timestamps[keep], {k: v[keep] for k, v in columns.items()}, db_path=db)
+        db_manager.update_mood_timeseries(db, "mood", WINDOWS)
+    # ... then a late upload fills a gap in windows that were already written
+    timestamps, columns = _physiology(rng, 20_000, 35_000)
+    db_manager.insert_physiology_batch("mood", timestamps, columns, db_path=db)
+    db_manager.update_mood_timeseries(db, "mood", WINDOWS)
+
+    incremental = _mood_rows(db, "mood")
+    db_manager.compute_and_write_mood_timeseries(db, "mood", WINDOWS)
+    rebuilt = _mood_rows(db, "mood")
+
+    assert len(incremental) == len(rebuilt) == 9 + 5
+    for got, want in zip(incremental, rebuilt):
+        assert got == pytest.approx(want)
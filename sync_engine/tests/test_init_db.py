@@ -0,0 +1,43 @@
+"""init_db: column migrations on a DB created before speaker_label existed."""
+
+import json
+import sqlite3
+
+from init_db import init_db
+
+
+def _pre_speaker_label_db(db_path: str):
+    """A current DB with transcript_segments rolled back to the old shape."""
+    init_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP INDEX idx_transcript_session_label")
+        conn.execute("ALTER TABLE transcript_segments DROP COLUMN speaker_label")
+        conn.execute("INSERT INTO sessions(session_id, start_time_ms) VALUES ('old', 0)")
+        conn.executemany(
+            "INSERT INTO transcript_segments(session_id, timestamp_start_ms, timestamp_end_ms, text, raw_json) "
+            "VALUES ('old', ?, ?, ?, ?)",
+            [
+                (0, 900, "json", json.dumps({"speaker_label": "spk_0", "text": "json"})),
+                (1_000, 1_900, "repr", str({"speaker_label": "spk_1", "text": "it's repr", "confidence": None})),
+                (2_000, 2_900, "none", None),
+                (3_000, 3_900, "junk", "{not python either"),
+            ],
+        )
+
+
+def test_speaker_label_is_backfilled_from_json_and_str_dict(tmp_path):
+    db_path = str(tmp_path / "old.db")
+    _pre_speaker_label_db(db_path)
+
+    init_db(db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT text, speaker_label, raw_json FROM transcript_segments ORDER BY timestamp_start_ms"
+        ).fetchall()
+    assert [(text, label) for text, label, _ in rows] == [
+        ("json", "spk_0"), ("repr", "spk_1"), ("none", None), ("junk", None),
+    ]
+    # str(dict) rows are rewritten as JSON; anything unparseable is left as it was
+    assert json.loads(rows[1][2]) == {"speaker_label": "spk_1", "text": "it's repr", "confidence": None}
+    assert rows[3][2] == "{not python either"
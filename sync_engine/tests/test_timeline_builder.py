@@ -0,0 +1,56 @@
+"""timeline_builder: incremental refresh of timeline_entries against a full rebuild."""
+
+import db_manager
+import timeline_builder
+from synth_data import generate
+
+
+def _no_reads(*args, **kwargs):
+    raise AssertionError("refresh_timeline read rows for an up-to-date session")
+
+
+def test_finalized_session_skips_reads_when_other_sessions_grow(monkeypatch):
+    old, other = generate(db_manager.DB_PATH, [60, 60], seed=11, prefix="early-exit")
+    timeline_builder.refresh_timeline(old)
+
+    # Rows for another session push the table-wide MAX(id) past old's watermark.
+    db_manager.insert_physiology_batch(other, [10**13], {"heart_rate": [80.0]})
+    db_manager.insert_transcript_segments(db_manager.DB_PATH, [{
+        "session_id": other, "start_ms": 10**13, "end_ms": 10**13 + 500, "text": "later", "speaker_label": "0",
+    }])
+
+    monkeypatch.setattr(db_manager, "get_session", _no_reads)
+    monkeypatch.setattr(db_manager, "get_transcript_after_id", _no_reads)
+    monkeypatch.setattr(db_manager, "get_physiology_span_after_id", _no_reads)
+    assert timeline_builder.refresh_timeline(old) == 0
+
+
+def test_segments_written_after_stop_are_materialized():
+    (session_id,) = generate(db_manager.DB_PATH, [60], seed=12, prefix="late-segment")
+    session = db_manager.get_session(session_id)
+    before = timeline_builder.get_timeline(session_id)
+
+    db_manager.insert_transcript_segments(db_manager.DB_PATH, [{
+        "session_id": session_id, "start_ms": session["start_time_ms"] + 30_000,
+        "end_ms": session["start_time_ms"] + 31_000, "text": "batch pass", "speaker_label": "1",
+    }])
+
+    after = timeline_builder.get_timeline(session_id)
+    assert len(after) == len(before) + 1
+    assert after == timeline_builder.build_timeline(session_id)
+
+
+def test_late_physiology_matches_full_rebuild():
+    (session_id,) = generate(db_manager.DB_PATH, [90], seed=13, prefix="late-physiology")
+    start_ms = db_manager.get_session(session_id)["start_time_ms"]
+    before = timeline_builder.get_timeline(session_id)
+
+    # A delayed upload for the middle of the call, older than rows already materialized
+    timestamps = [start_ms + 20_000 + 250 * i for i in range(40)]
+    db_manager.insert_physiology_batch(session_id, timestamps, {
+        "heart_rate": [95.0] * 40, "emotion_score": [-0.5] * 40, "engagement": [0.2] * 40,
+    })
+
+    after = timeline_builder.get_timeline(session_id)
+    assert after != before
+    assert after == timeline_builder.build_timeline(session_id)
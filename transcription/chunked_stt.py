@@ -0,0 +1,306 @@
+"""
+transcription/chunked_stt.py — Transcribe a long WAV in parallel chunks.
+
+Uploading one multi-hour call.wav and waiting for a single response is slow
+and all-or-nothing. Instead:
+
+  1. The WAV is memory-mapped (np.memmap), never read into RAM as a whole.
+  2. Split points are placed every STT_CHUNK_SECONDS, each nudged to the
+     quietest 50 ms frame within ±STT_SPLIT_SEARCH_S so we cut in a pause,
+     not mid-word. Only those search windows are actually read.
+  3. Each chunk, plus STT_CHUNK_OVERLAP_S of audio on both sides, is encoded
+     to an in-memory WAV and sent to the STT client. At most STT_MAX_PARALLEL
+     chunks are in flight (and in memory) at once.
+  4. Segments are shifted by their chunk's offset. A segment is kept by the
+     chunk whose core [split, next split) contains its midpoint, so the
+     overlap isn't transcribed twice.
+  5. Diarization labels are per request ("speaker_0" in chunk 3 need not be
+     "speaker_0" in chunk 4). Labels are matched across neighbouring chunks
+     by how long they talk at the same time in the shared overlap, and
+     renumbered globally in order of first appearance.
+
+The STT client is anything with `transcribe(wav_bytes) -> list[dict]`
+returning {"speaker", "text", "start", "end"} (seconds from chunk start),
+so tests can pass a local fake instead of ElevenLabsSTT.
+"""
+
+import io
+import os
+import struct
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from typing import Protocol
+
+import numpy as np
+
+FRAME_MS = 50       # Energy is measured per frame of this length when looking for a split point
+
+
+class STTClient(Protocol):
+    def transcribe(self, wav_bytes: bytes) -> list[dict]:
+        """Segments as {"speaker", "text", "start", "end"}; times in seconds from the start of wav_bytes."""
+        ...
+
+
+class ElevenLabsSTT:
+    """STTClient backed by ElevenLabs batch speech-to-text (with diarization)."""
+
+    def __init__(self, client, model_id: str = "scribe_v2"):
+        self.client = client
+        self.model_id = model_id
+
+    def transcribe(self, wav_bytes: bytes) -> list[dict]:
+        result = self.client.speech_to_text.convert(
+            file=io.BytesIO(wav_bytes),
+            model_id=self.model_id,
+            diarize=True,
+        )
+        return _segments_from_result(result)
+
+
+def _get(obj, name, default=None):
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def _segments_from_result(result) -> list[dict]:
+    """Normalize an ElevenLabs response to segments: use `segments` if present, else group `words` by speaker."""
+    segments = _get(result, "segments")
+    if segments:
+        return [
+            {
+                "speaker": _get(seg, "speaker") or "unknown",
+                "text": (_get(seg, "text") or "").strip(),
+                "start": float(_get(seg, "start") or 0.0),
+                "end": float(_get(seg, "end") or _get(seg, "start") or 0.0),
+            }
+            for seg in segments
+        ]
+
+    out: list[dict] = []
+    for word in _get(result, "words") or []:
+        if _get(word, "type", "word") != "word":
+            continue
+        speaker = _get(word, "speaker_id") or "unknown"
+        if out and out[-1]["speaker"] == speaker:
+            out[-1]["text"] += " " + _get(word, "text", "").strip()
+            out[-1]["end"] = float(_get(word, "end") or out[-1]["end"])
+        else:
+            out.append({
+                "speaker": speaker,
+                "text": _get(word, "text", "").strip(),
+                "start": float(_get(word, "start") or 0.0),
+                "end": float(_get(word, "end") or 0.0),
+            })
+    if out:
+        return out
+
+    text = (_get(result, "text") or "").strip()
+    return [{"speaker": "unknown", "text": text, "start": 0.0, "end": 0.0}] if text else []
+
+
+# ─── Audio ──────────────────────────────────────────────────
+
+def open_wav_memmap(path: str) -> tuple[np.memmap, int]:
+    """16-bit PCM WAV as a read-only (frames, channels) memmap, plus its sample rate."""
+    with open(path, "rb") as f:
+        riff, riff_size, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"{path} is not a WAV file")
+
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(size - 16 + (size & 1), 1)
+            elif chunk_id == b"data":
+                data_offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), 1)
+
+    if fmt is None:
+        raise ValueError(f"{path} has no fmt chunk")
+    audio_format, channels, sample_rate, _, _, bits = fmt
+    if audio_format != 1 or bits != 16:
+        raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+
+    # The recorder rewrites the header about once a second, so if it was
+    # killed the file runs past what the header says. A RIFF size that stops
+    # short of the end of the file means the header is stale: take all the
+    # audio on disk. Otherwise the header is complete and data may be
+    # followed by other chunks, so its size is the one to trust.
+    file_size = os.path.getsize(path)
+    available = (file_size - data_offset) // (2 * channels)
+    header_stale = riff_size + 8 < file_size
+    frames = available if header_stale or not size else min(available, size // (2 * channels))
+    samples = np.memmap(path, dtype="<i2", mode="r", offset=data_offset, shape=(frames, channels))
+    return samples, sample_rate
+
+
+def find_split_points(
+    samples: np.ndarray,
+    sample_rate: int,
+    chunk_seconds: float,
+    search_seconds: float,
+) -> list[int]:
+    """
+    Frame indices to cut at, roughly every chunk_seconds, each moved to the
+    lowest-energy FRAME_MS frame within ±search_seconds of its target.
+    """
+    n = len(samples)
+    step = int(chunk_seconds * sample_rate)
+    search = int(search_seconds * sample_rate)
+    frame = max(1, int(FRAME_MS * sample_rate / 1000))
+
+    splits: list[int] = []
+    target = step
+    while target < n - step // 4:       # don't leave a tiny last chunk
+        lo = max(target - search, (splits[-1] if splits else 0) + frame)
+        hi = min(target + search, n)
+        window = samples[lo:hi].astype(np.float32)          # only this window is paged in
+        usable = (len(window) // frame) * frame
+        if usable == 0:
+            splits.append(target)
+        else:
+            energy = np.square(window[:usable]).reshape(-1, frame * samples.shape[1]).mean(axis=1)
+            splits.append(lo + int(np.argmin(energy)) * frame + frame // 2)
+        target = splits[-1] + step
+    return splits
+
+
+def _wav_bytes(samples: np.ndarray, sample_rate: int) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(samples.shape[1])
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(np.ascontiguousarray(samples, dtype="<i2").tobytes())
+    return buf.getvalue()
+
+
+# ─── Stitching ──────────────────────────────────────────────
+
+def _match_labels(prev: list[dict], cur: list[dict], lo_ms: int, hi_ms: int) -> dict[str, str]:
+    """
+    Map cur's labels to prev's (already global) labels by how many ms they
+    speak at the same time inside [lo_ms, hi_ms). Greedy, longest overlap first.
+    """
+    overlap: dict[tuple[str, str], int] = {}
+    for a in prev:
+        for b in cur:
+            start = max(a["start_ms"], b["start_ms"], lo_ms)
+            end = min(a["end_ms"], b["end_ms"], hi_ms)
+            if end > start:
+                key = (b["speaker"], a["speaker"])
+                overlap[key] = overlap.get(key, 0) + end - start
+
+    mapping: dict[str, str] = {}
+    for (local, global_label), _ in sorted(overlap.items(), key=lambda kv: -kv[1]):
+        if local not in mapping and global_label not in mapping.values():
+            mapping[local] = global_label
+    return mapping
+
+
+def stitch_chunks(chunks: list[dict]) -> list[dict]:
+    """
+    chunks: [{"core": (start_ms, end_ms), "span": (start_ms, end_ms), "segments": [...]}, ...]
+    in order, with segment times already absolute. Returns the kept segments
+    with global "speaker_N" labels (numbered by first appearance).
+    """
+    out: list[dict] = []
+    next_id = 0
+    prev_all: list[dict] = []       # previous chunk's segments, relabelled (incl. overlap)
+
+    for i, chunk in enumerate(chunks):
+        segments = chunk["segments"]
+        mapping: dict[str, str] = {}
+        if i > 0:
+            lo = chunk["span"][0]
+            hi = chunks[i - 1]["span"][1]
+            mapping = _match_labels(prev_all, segments, lo, hi)
+
+        relabelled = []
+        for seg in sorted(segments, key=lambda s: s["start_ms"]):
+            label = seg["speaker"]
+            if label == "unknown":
+                global_label = "unknown"
+            elif label in mapping:
+                global_label = mapping[label]
+            else:
+                global_label = mapping[label] = f"speaker_{next_id}"
+                next_id += 1
+            relabelled.append({**seg, "speaker": global_label})
+
+        core_start, core_end = chunk["core"]
+        for seg in relabelled:
+            mid = (seg["start_ms"] + seg["end_ms"]) // 2
+            if core_start <= mid < core_end:
+                out.append(seg)
+        prev_all = relabelled
+
+    return out
+
+
+# ─── Entry Point ────────────────────────────────────────────
+
+def transcribe_wav(
+    path: str,
+    stt: STTClient,
+    chunk_seconds: float,
+    overlap_seconds: float,
+    search_seconds: float,
+    max_parallel: int,
+) -> list[dict]:
+    """
+    Transcribe `path` chunk by chunk. Returns segments
+    {"speaker_label", "text", "start_ms", "end_ms"} with times from the
+    start of the file, in order.
+    """
+    samples, sample_rate = open_wav_memmap(path)
+    n = len(samples)
+    if n == 0:
+        return []
+
+    bounds = [0, *find_split_points(samples, sample_rate, chunk_seconds, search_seconds), n]
+    overlap = int(overlap_seconds * sample_rate)
+    to_ms = lambda frames: int(round(frames * 1000 / sample_rate))
+
+    def run(i: int) -> dict:
+        start, end = bounds[i], bounds[i + 1]
+        span_start, span_end = max(0, start - overlap), min(n, end + overlap)
+        # Encoded inside the worker, so only max_parallel chunks are in memory at once.
+        segments = stt.transcribe(_wav_bytes(samples[span_start:span_end], sample_rate))
+        offset_ms = to_ms(span_start)
+        return {
+            "core": (to_ms(start), to_ms(end) if i < len(bounds) - 2 else float("inf")),
+            "span": (offset_ms, to_ms(span_end)),
+            "segments": [
+                {
+                    "speaker": seg.get("speaker") or "unknown",
+                    "text": (seg.get("text") or "").strip(),
+                    "start_ms": offset_ms + int(round(seg["start"] * 1000)),
+                    "end_ms": offset_ms + int(round(seg["end"] * 1000)),
+                }
+                for seg in segments
+            ],
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as pool:
+        chunks = list(pool.map(run, range(len(bounds) - 1)))
+
+    return [
+        {
+            "speaker_label": seg["speaker"],
+            "text": seg["text"],
+            "start_ms": seg["start_ms"],
+            "end_ms": seg["end_ms"],
+        }
+        for seg in stitch_chunks(chunks)
+        if seg["text"]
+    ]
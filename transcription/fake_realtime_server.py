@@ -0,0 +1,121 @@
+"""
+transcription/fake_realtime_server.py — Local stand-in for the ElevenLabs realtime STT WebSocket.
+
+Speaks the same messages realtime_transcriber.py uses, without an API key or
+network. It "transcribes" by energy: each stretch of sound followed by
+300 ms of quiet becomes one committed_transcript_with_timestamps, with one
+word per 250 ms. Timestamps are seconds from the start of the connection's
+audio, same as the real service.
+
+--drop-after closes every connection after that many seconds of received
+audio, to exercise reconnect + replay.
+
+Usage:
+    python fake_realtime_server.py --port 8765
+    python realtime_transcriber.py --session-id test --url ws://127.0.0.1:8765 --synthetic 30
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+
+import numpy as np
+import websockets
+
+FRAME_MS = 50
+SILENCE_TO_COMMIT_MS = 300
+WORD_MS = 250
+ENERGY_THRESHOLD = 1e5      # mean square of int16 samples
+
+
+class FakeSession:
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self.frame = int(sample_rate * FRAME_MS / 1000)
+        self.pending = np.zeros(0, dtype=np.int16)
+        self.frames_seen = 0            # analysis frames processed so far
+        self.speech_start: int | None = None
+        self.last_loud: int | None = None
+        self.utterances = 0
+
+    @property
+    def seconds_received(self) -> float:
+        return (self.frames_seen * self.frame + len(self.pending)) / self.sample_rate
+
+    def feed(self, pcm: bytes) -> list[dict]:
+        self.pending = np.concatenate([self.pending, np.frombuffer(pcm, dtype="<i2")])
+        out = []
+        while len(self.pending) >= self.frame:
+            chunk, self.pending = self.pending[:self.frame], self.pending[self.frame:]
+            loud = np.mean(chunk.astype(np.float64) ** 2) > ENERGY_THRESHOLD
+            i = self.frames_seen
+            self.frames_seen += 1
+            if loud:
+                if self.speech_start is None:
+                    self.speech_start = i
+                self.last_loud = i
+            elif self.speech_start is not None and (i - self.last_loud) * FRAME_MS >= SILENCE_TO_COMMIT_MS:
+                out.append(self._commit())
+        return out
+
+    def flush(self) -> dict:
+        if self.speech_start is not None:
+            return self._commit()
+        return {"message_type": "committed_transcript_with_timestamps", "text": "", "words": []}
+
+    def _commit(self) -> dict:
+        start_s = self.speech_start * FRAME_MS / 1000
+        end_s = (self.last_loud + 1) * FRAME_MS / 1000
+        self.speech_start = self.last_loud = None
+        self.utterances += 1
+
+        words = []
+        t = start_s
+        while t < end_s:
+            words.append({"text": f"w{len(words) + 1}", "start": round(t, 3),
+                          "end": round(min(t + WORD_MS / 1000, end_s), 3), "type": "word"})
+            t += WORD_MS / 1000
+        return {
+            "message_type": "committed_transcript_with_timestamps",
+            "text": f"utterance at {start_s:.2f}s",
+            "words": words,
+        }
+
+
+async def handle(ws, drop_after: float | None, sample_rate: int):
+    session = FakeSession(sample_rate)
+    await ws.send(json.dumps({"message_type": "session_started"}))
+    async for raw in ws:
+        msg = json.loads(raw)
+        if msg.get("message_type") != "input_audio_chunk":
+            continue
+        for commit in session.feed(base64.b64decode(msg.get("audio_base_64") or "")):
+            await ws.send(json.dumps(commit))
+        if msg.get("commit"):
+            await ws.send(json.dumps(session.flush()))
+        if drop_after is not None and session.seconds_received >= drop_after:
+            await ws.close(code=1011, reason="fake drop")
+            return
+
+
+async def serve(host: str, port: int, drop_after: float | None, sample_rate: int):
+    # A dropped connection still has the client's audio queued ahead of its close
+    # reply; don't sit out the default close timeout waiting to read it.
+    async with websockets.serve(lambda ws: handle(ws, drop_after, sample_rate), host, port, close_timeout=0.2):
+        print(f"[fake-stt] listening on ws://{host}:{port}")
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake ElevenLabs realtime STT server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--drop-after", type=float, help="Close each connection after this many seconds of audio")
+    parser.add_argument("--sample-rate", type=int, default=16000)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port, args.drop_after, args.sample_rate))
+
+
+if __name__ == "__main__":
+    main()
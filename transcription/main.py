@@ -2,6 +2,7 @@ import os, json, time, sys
 from dotenv import load_dotenv
 from elevenlabs.client import ElevenLabs
 from recordings.audio import record_wav
+from chunked_stt import ElevenLabsSTT, transcribe_wav
 
 # NEW: DB helpers (create transcription/db_writer.py from earlier message)
 # Add repo root to Python path so "sync_engine" imports work
@@ -13,6 +14,7 @@ from sync_engine.src.db_manager import (
     upsert_speaker_map,
     apply_speaker_map_to_segments,compute_and_write_mood_timeseries, insert_gemini_output
 )
+from shared.config import STT_CHUNK_SECONDS, STT_CHUNK_OVERLAP_S, STT_SPLIT_SEARCH_S, STT_MAX_PARALLEL
 
 def to_ms(seconds: float) -> int:
     return int(round(float(seconds) * 1000))
@@ -48,47 +50,20 @@ def main():
     wav_path = "call.wav"
     record_wav(wav_path, seconds=record_seconds, sample_rate=16000, channels=1)
 
-    # 3) STT (Batch) with diarization
+    # 3) STT (Batch) with diarization, in parallel chunks split at pauses
     client = ElevenLabs(api_key=api_key)
-    print("[stt] Sending audio to ElevenLabs (scribe_v2, diarize=True)...")
-    with open(wav_path, "rb") as f:
-        result = client.speech_to_text.convert(
-            file=f,
-            model_id="scribe_v2",
-            diarize=True,
-        )
-
-    segments = getattr(result, "segments", None) or (result.get("segments") if isinstance(result, dict) else None)
-
-    # 4) Build rows
-    segments_out = []
-    if segments:
-        for seg in segments:
-            speaker_label = getattr(seg, "speaker", None) or (seg.get("speaker") if isinstance(seg, dict) else "unknown")
-            text = getattr(seg, "text", None) or (seg.get("text") if isinstance(seg, dict) else "")
-            start_s = getattr(seg, "start", None) or (seg.get("start") if isinstance(seg, dict) else 0.0)
-            end_s = getattr(seg, "end", None) or (seg.get("end") if isinstance(seg, dict) else start_s)
-
-            row = {
-                "session_id": session_id,
-                "speaker_label": speaker_label,
-                "text": (text or "").strip(),
-                "start_ms": to_ms(start_s),
-                "end_ms": to_ms(end_s),
-            }
-            # skip empty text rows
-            if row["text"]:
-                segments_out.append(row)
-    else:
-        # fallback: whole transcript as one segment
-        text = getattr(result, "text", None) or (result.get("text") if isinstance(result, dict) else "")
-        segments_out = [{
-            "session_id": session_id,
-            "speaker_label": "unknown",
-            "text": str(text).strip(),
-            "start_ms": 0,
-            "end_ms": 0,
-        }]
+    print(f"[stt] Sending audio to ElevenLabs (scribe_v2, diarize=True) in ~{STT_CHUNK_SECONDS}s chunks...")
+    segments = transcribe_wav(
+        wav_path,
+        stt=ElevenLabsSTT(client, model_id="scribe_v2"),
+        chunk_seconds=STT_CHUNK_SECONDS,
+        overlap_seconds=STT_CHUNK_OVERLAP_S,
+        search_seconds=STT_SPLIT_SEARCH_S,
+        max_parallel=STT_MAX_PARALLEL,
+    )
+
+    # 4) Build rows (offsets are already stitched across chunks)
+    segments_out = [{"session_id": session_id, **seg} for seg in segments]
 
     # 5) Write jsonl file (handy for debugging / demo)
     with open(out_file, "w", encoding="utf-8") as w:
@@ -118,12 +93,6 @@ def main():
         if len(seen) >= 2:
             break
 
-    if len(seen) >= 2:
-        seller_label, client_label = seen[0], seen[1]
-        upsert_speaker_map(db_path, session_id, seller_label=seller_label, client_label=client_label)
-        print(f"[map] seller={seller_label} client={client_label} (speaker_map + transcript_segments updated)")
-    else:
-        print("[map] Not enough distinct speakers found to map seller/client (ok for now)")
     if len(seen) >= 2:
         seller_label, client_label = seen[0], seen[1]
         upsert_speaker_map(db_path, session_id, seller_label=seller_label, client_label=client_label)
@@ -0,0 +1,418 @@
+"""
+transcription/realtime_transcriber.py — Live transcription over the ElevenLabs realtime WebSocket.
+
+Microphone blocks are streamed to ELEVENLABS_STT_WS_URL as they're captured.
+Every committed transcript is written to transcript_segments right away
+(one db_manager transaction per batch of commits), so the dashboard's live
+feed shows speech about a second after it's said.
+
+Audio is never dropped on a reconnect. Every block is kept in a buffer
+until a committed transcript covers it. When the socket drops, capture
+keeps filling the buffer, and the new connection replays everything
+uncommitted first. Commit timestamps are relative to the start of *that*
+connection's audio, so each connection remembers which sample it started
+at to turn them back into UTC ms. The buffer is capped at
+REALTIME_MAX_BUFFER_S. Past that, the oldest audio is dropped with a
+warning, so memory stays bounded during a long outage.
+
+A connection only ends cleanly once every buffered block is committed;
+otherwise it counts as lost and the rest is replayed on a new one. While
+capturing, that goes on for as long as it takes. After capture has ended,
+REALTIME_FINAL_RETRIES reconnects in a row that commit nothing end the run,
+and the command exits non-zero with the uncommitted audio reported.
+
+Committed segments whose insert fails (locked DB, disk error) are retried
+with backoff; their audio has already left the buffer. If the DB stays
+unwritable, capture stops, the unsaved text is logged and the command exits
+non-zero.
+
+Realtime has no diarization, so rows are written with speaker 'unknown'.
+
+Usage:
+    python realtime_transcriber.py --session-id abc123
+    python realtime_transcriber.py --session-id abc123 --url ws://127.0.0.1:8765 --synthetic 30
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from typing import Iterable
+from urllib.parse import urlencode
+
+import numpy as np
+import websockets
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+from shared.config import (
+    DB_PATH, ELEVENLABS_API_KEY, ELEVENLABS_STT_REALTIME_MODEL, ELEVENLABS_STT_WS_URL,
+    ELEVENLABS_STT_SAMPLE_RATE, REALTIME_MAX_BUFFER_S, REALTIME_RECONNECT_MAX_S, REALTIME_FINAL_RETRIES,
+)
+from sync_engine.src import db_manager
+from recordings.audio import sounddevice_source, synthetic_source
+
+log = logging.getLogger(__name__)
+
+COMMIT_WAIT_S = 5.0         # At the end, how long to wait for the last committed transcript
+WRITE_RETRIES = 5           # Failed inserts of committed segments retried this many times...
+WRITE_RETRY_S = 0.5         # ...after this delay, doubled per attempt
+SILENCE_RMS = 200           # Blocks below this RMS (int16) count as silence at the end of the audio
+
+
+class AudioBuffer:
+    """
+    Captured audio not yet covered by a committed transcript, as
+    (first_frame, pcm_bytes) blocks. Written by the capture thread, read by
+    the sender; frame numbers count from the start of the recording.
+    """
+
+    def __init__(self, sample_rate: int, channels: int, max_seconds: float):
+        self.sample_rate = sample_rate
+        self._frame_bytes = 2 * channels
+        self._max_frames = int(max_seconds * sample_rate)
+        self._blocks: list[tuple[int, bytes]] = []
+        self._next_frame = 0
+        self._sent_frame = 0        # audio before this has been sent at least once
+        self._lock = threading.Lock()
+        self.finished = False
+        self.dropped_frames = 0
+
+    @property
+    def end_frame(self) -> int:
+        return self._next_frame
+
+    def append(self, block: np.ndarray):
+        data = np.asarray(block, dtype="<i2").tobytes()
+        with self._lock:
+            self._blocks.append((self._next_frame, data))
+            self._next_frame += len(data) // self._frame_bytes
+            while self._blocks and self._next_frame - self._blocks[0][0] > self._max_frames:
+                start, dropped = self._blocks.pop(0)
+                end = start + len(dropped) // self._frame_bytes
+                # Only audio that never reached the server is actually lost.
+                self.dropped_frames += max(0, end - max(start, self._sent_frame))
+
+    def mark_sent(self, frame: int):
+        with self._lock:
+            self._sent_frame = max(self._sent_frame, frame)
+
+    def blocks_from(self, frame: int) -> list[tuple[int, bytes]]:
+        """Retained blocks starting at or after `frame`."""
+        with self._lock:
+            return [b for b in self._blocks if b[0] >= frame]
+
+    def first_frame(self) -> int:
+        with self._lock:
+            return self._blocks[0][0] if self._blocks else self._next_frame
+
+    @property
+    def uncommitted_frames(self) -> int:
+        return self.end_frame - self.first_frame()
+
+    def is_silent(self, rms: float) -> bool:
+        """True if every retained block is quieter than `rms`."""
+        with self._lock:
+            blocks = list(self._blocks)
+        return all(
+            np.sqrt(np.mean(np.frombuffer(data, dtype="<i2").astype(np.float64) ** 2)) < rms
+            for _, data in blocks
+        )
+
+    def commit_upto(self, frame: int):
+        """Forget blocks that end at or before `frame` (their audio has been transcribed)."""
+        with self._lock:
+            while self._blocks:
+                start, data = self._blocks[0]
+                if start + len(data) // self._frame_bytes > frame:
+                    break
+                self._blocks.pop(0)
+
+
+class RealtimeTranscriber:
+    def __init__(
+        self,
+        session_id: str,
+        source: Iterable[np.ndarray],
+        url: str = ELEVENLABS_STT_WS_URL,
+        api_key: str = ELEVENLABS_API_KEY,
+        sample_rate: int = ELEVENLABS_STT_SAMPLE_RATE,
+        db_path: str = DB_PATH,
+        stop: threading.Event | None = None,
+    ):
+        self.session_id = session_id
+        self.source = source
+        self.url = url
+        self.api_key = api_key
+        self.sample_rate = sample_rate
+        self.db_path = db_path
+        self.buffer = AudioBuffer(sample_rate, 1, REALTIME_MAX_BUFFER_S)
+        self.start_ms: int | None = None            # UTC ms of the first captured sample
+        self.segments_written = 0
+        self.reconnects = 0
+        self.write_error: Exception | None = None   # set once committed segments could not be saved
+        self.unwritten: list[dict] = []             # committed segments not in the DB (after write_error)
+        self._stop = stop or threading.Event()
+        self._final_commit_sent = False
+        self._audio_ready: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._commits: asyncio.Queue | None = None
+
+    def stop(self):
+        self._stop.set()
+
+    # ─── Capture (thread) ───────────────────────────────────
+
+    def _capture(self):
+        try:
+            for block in self.source:
+                if self.start_ms is None:
+                    self.start_ms = int(time.time() * 1000) - int(len(block) * 1000 / self.sample_rate)
+                self.buffer.append(block)
+                self._loop.call_soon_threadsafe(self._audio_ready.set)
+                if self._stop.is_set():
+                    break
+        finally:
+            self.buffer.finished = True
+            self._loop.call_soon_threadsafe(self._audio_ready.set)
+
+    # ─── Connection ─────────────────────────────────────────
+
+    def _ws_url(self) -> str:
+        params = {
+            "model_id": ELEVENLABS_STT_REALTIME_MODEL,
+            "language_code": "en",
+            "include_timestamps": "true",
+            "sample_rate": self.sample_rate,
+        }
+        return f"{self.url}{'&' if '?' in self.url else '?'}{urlencode(params)}"
+
+    async def _send_audio(self, ws, origin_frame: int):
+        """Replay retained audio from origin_frame, then follow the capture."""
+        cursor = origin_frame
+        while True:
+            # Clear before looking, so a block captured right after the lookup still wakes us.
+            self._audio_ready.clear()
+            blocks = self.buffer.blocks_from(cursor)
+            for start, data in blocks:
+                await ws.send(json.dumps({
+                    "message_type": "input_audio_chunk",
+                    "audio_base_64": base64.b64encode(data).decode("ascii"),
+                    "sample_rate": self.sample_rate,
+                    "commit": False,
+                }))
+                cursor = start + len(data) // 2
+                self.buffer.mark_sent(cursor)
+            if not blocks and self.buffer.finished and cursor >= self.buffer.end_frame:
+                # Ask for whatever is left to be committed.
+                self._final_commit_sent = True
+                await ws.send(json.dumps({
+                    "message_type": "input_audio_chunk",
+                    "audio_base_64": "",
+                    "sample_rate": self.sample_rate,
+                    "commit": True,
+                }))
+                return
+            if not blocks:
+                await self._audio_ready.wait()
+
+    async def _receive(self, ws, origin_frame: int, sent_until: list):
+        async for raw in ws:
+            msg = json.loads(raw)
+            kind = msg.get("message_type")
+            if kind not in ("committed_transcript", "committed_transcript_with_timestamps"):
+                if kind and kind.endswith("error"):
+                    log.error("server error: %s", msg)
+                continue
+
+            text = (msg.get("text") or "").strip()
+            words = [w for w in msg.get("words") or [] if w.get("type", "word") == "word"]
+            if words:
+                start_frame = origin_frame + int(words[0]["start"] * self.sample_rate)
+                end_frame = origin_frame + int(words[-1]["end"] * self.sample_rate)
+            else:
+                # No timestamps: it covers everything since the last commit.
+                start_frame, end_frame = sent_until[0], self.buffer.end_frame
+            sent_until[0] = end_frame
+
+            self.buffer.commit_upto(end_frame)
+            # Commits for earlier audio can still arrive after the final commit
+            # request, so only let go of what's left once it's trailing silence.
+            if self._final_commit_sent and self.buffer.is_silent(SILENCE_RMS):
+                self.buffer.commit_upto(self.buffer.end_frame)
+            if text:
+                await self._commits.put({
+                    "session_id": self.session_id,
+                    "speaker_label": None,
+                    "text": text,
+                    "start_ms": self.start_ms + start_frame * 1000 // self.sample_rate,
+                    "end_ms": self.start_ms + end_frame * 1000 // self.sample_rate,
+                })
+
+    async def _stream_once(self):
+        origin_frame = self.buffer.first_frame()
+        self._final_commit_sent = False
+        headers = {"xi-api-key": self.api_key} if self.api_key else {}
+        async with websockets.connect(self._ws_url(), additional_headers=headers) as ws:
+            sender = asyncio.create_task(self._send_audio(ws, origin_frame))
+            receiver = asyncio.create_task(self._receive(ws, origin_frame, [origin_frame]))
+            try:
+                done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+                if sender in done:
+                    sender.result()         # re-raise send errors
+                    # All audio sent: let the final commit arrive, then hang up.
+                    try:
+                        await asyncio.wait_for(asyncio.shield(self._wait_committed(receiver)), COMMIT_WAIT_S)
+                    except asyncio.TimeoutError:
+                        log.warning("timed out waiting for the last commit")
+                if receiver.done():
+                    receiver.result()       # re-raise receive errors
+                # Whatever is still buffered was never transcribed: replay it on a new connection.
+                if self.buffer.blocks_from(0):
+                    raise ConnectionError(
+                        f"{self.buffer.uncommitted_frames / self.sample_rate:.1f}s of audio not committed"
+                    )
+            finally:
+                sender.cancel()
+                receiver.cancel()
+
+    async def _wait_committed(self, receiver: asyncio.Task):
+        while self.buffer.blocks_from(0) and not receiver.done():
+            await asyncio.sleep(0.05)
+
+    # ─── DB Writer ──────────────────────────────────────────
+
+    async def _write_commits(self):
+        """
+        Insert committed segments; whatever arrived meanwhile goes in the same
+        transaction. Their audio is already gone from the buffer, so a failed
+        insert is retried with backoff. If it keeps failing, capture stops and
+        the rest of the session's segments are kept in `unwritten`.
+        """
+        while True:
+            rows = [await self._commits.get()]
+            while not self._commits.empty():
+                rows.append(self._commits.get_nowait())
+            done = rows[-1] is None
+            if done:
+                rows.pop()
+            if rows and self.write_error is None:
+                await self._insert(rows)
+            elif rows:
+                self.unwritten.extend(rows)
+            if done:
+                return
+
+    async def _insert(self, rows: list[dict]):
+        delay = WRITE_RETRY_S
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                await asyncio.to_thread(db_manager.insert_transcript_segments, self.db_path, rows)
+                break
+            except Exception as e:
+                if attempt == WRITE_RETRIES:
+                    log.error("could not save %d segment(s), stopping: %s", len(rows), e)
+                    self.write_error = e
+                    self.unwritten.extend(rows)
+                    self.stop()
+                    return
+                log.warning("saving %d segment(s) failed (%s); retrying in %.1f s", len(rows), e, delay)
+                await asyncio.sleep(delay)
+                delay *= 2
+        self.segments_written += len(rows)
+        for row in rows:
+            log.info("+%7.2fs  %s", (row["start_ms"] - self.start_ms) / 1000, row["text"])
+
+    # ─── Main Loop ──────────────────────────────────────────
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._audio_ready = asyncio.Event()
+        self._commits = asyncio.Queue()
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self._loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass        # not the main thread / not supported on this platform
+
+        capture = threading.Thread(target=self._capture, name="realtime-capture", daemon=True)
+        capture.start()
+        writer = asyncio.create_task(self._write_commits())
+
+        attempt = 0
+        stalled = 0             # reconnects in a row, after capture ended, that committed nothing
+        while True:
+            committed_before = self.buffer.first_frame()
+            try:
+                await self._stream_once()
+                break
+            except (OSError, websockets.ConnectionClosed, websockets.InvalidHandshake) as e:
+                if self.buffer.finished and not self.buffer.blocks_from(0):
+                    break
+                if self.buffer.first_frame() > committed_before:
+                    attempt = stalled = 0       # progress was made; this is a fresh outage
+                elif self.buffer.finished:
+                    stalled += 1
+                    if stalled > REALTIME_FINAL_RETRIES:
+                        log.error("giving up after %d retries (%s: %s)", REALTIME_FINAL_RETRIES, type(e).__name__, e)
+                        break
+                delay = random.uniform(0, min(REALTIME_RECONNECT_MAX_S, 0.5 * 2 ** attempt))
+                attempt += 1
+                self.reconnects += 1
+                log.warning("connection lost (%s); reconnecting in %.1fs, %.1fs of audio buffered",
+                            type(e).__name__, delay, self.buffer.uncommitted_frames / self.sample_rate)
+                await asyncio.sleep(delay)
+            else:
+                attempt = 0
+
+        self._stop.set()
+        await self._commits.put(None)
+        await writer
+        capture.join(timeout=1.0)
+
+        if self.buffer.dropped_frames:
+            log.warning("%.1fs of audio dropped (offline longer than REALTIME_MAX_BUFFER_S)",
+                        self.buffer.dropped_frames / self.sample_rate)
+        if self.buffer.uncommitted_frames:
+            log.warning("%.1fs of audio never committed", self.buffer.uncommitted_frames / self.sample_rate)
+        for row in self.unwritten:
+            log.error("not saved: +%7.2fs  %s", (row["start_ms"] - self.start_ms) / 1000, row["text"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SalesLens realtime transcription")
+    parser.add_argument("--session-id", required=True)
+    parser.add_argument("--url", default=ELEVENLABS_STT_WS_URL, help="WebSocket URL (e.g. a local stand-in server)")
+    parser.add_argument("--db", default=str(DB_PATH))
+    parser.add_argument("--synthetic", type=float, metavar="SECONDS",
+                        help="Stream this many seconds of test tone bursts instead of the microphone")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="[realtime] %(message)s")
+
+    if not ELEVENLABS_API_KEY and args.url == ELEVENLABS_STT_WS_URL:
+        raise SystemExit("Missing ELEVENLABS_API_KEY in .env")
+
+    stop = threading.Event()        # Ctrl+C sets it: capture ends, the rest is committed and written
+    if args.synthetic:
+        source = synthetic_source(args.synthetic, ELEVENLABS_STT_SAMPLE_RATE)
+    else:
+        source = sounddevice_source(ELEVENLABS_STT_SAMPLE_RATE, 1, stop=stop)
+
+    transcriber = RealtimeTranscriber(args.session_id, source, url=args.url, db_path=args.db, stop=stop)
+    print(f"[realtime] Streaming to {args.url} (Ctrl+C to stop) ...")
+    asyncio.run(transcriber.run())
+    print(f"[realtime] Done: {transcriber.segments_written} segment(s), {transcriber.reconnects} reconnect(s)")
+    if transcriber.write_error or transcriber.buffer.uncommitted_frames or transcriber.buffer.dropped_frames:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,235 @@
-import sounddevice as sd
-from scipy.io.wavfile import write as wav_write
-
-def record_wav(path: str, seconds: int = (15*3600), sample_rate: int = 16000, channels: int = 1):
-    print(f"[audio] Recording {seconds}s @ {sample_rate}Hz ...")
-    audio = sd.rec(int(seconds * sample_rate), samplerate=sample_rate, channels=channels, dtype="int16")
-    sd.wait()
-    wav_write(path, sample_rate, audio)
-    print(f"[audio] Saved {path}")
-    return path
\ No newline at end of file
+"""
+transcription/recordings/audio.py — Record microphone audio straight to a WAV file.
+
+Audio is written in small blocks as it arrives, so memory stays at a few
+blocks no matter how long the call is, and a crash only loses the last
+moment. The WAV header's size fields are rewritten every HEADER_EVERY_S
+seconds of audio, which means the file on disk is always a valid WAV of
+everything recorded so far — other code can open it mid-call.
+
+The audio source is any iterable of int16 blocks shaped (frames, channels),
+so tests can feed synthetic audio instead of a microphone:
+
+    record_wav("call.wav", seconds=5, source=synthetic_source(5))
+"""
+
+import queue
+import signal
+import struct
+import threading
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+
+HEADER_EVERY_S = 1.0        # How often the on-disk header catches up with the data
+BLOCK_MS = 100              # Size of each block read from the source
+MAX_QUEUED_S = 10.0         # Audio the microphone callback may buffer before dropping blocks
+
+
+class WavStreamWriter:
+    """16-bit PCM WAV writer that appends blocks and keeps the header current."""
+
+    def __init__(self, path: str, sample_rate: int, channels: int, header_every_s: float = HEADER_EVERY_S):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames_written = 0
+        self._block_align = channels * 2
+        self._header_every = max(1, int(header_every_s * sample_rate))
+        self._frames_at_header = 0
+        self._f = open(path, "wb")
+        self._write_header()
+
+    @property
+    def duration_s(self) -> float:
+        return self.frames_written / self.sample_rate
+
+    def _write_header(self):
+        data_bytes = self.frames_written * self._block_align
+        self._f.seek(0)
+        self._f.write(struct.pack(
+            "<4sI4s4sIHHIIHH4sI",
+            b"RIFF", 36 + data_bytes, b"WAVE",
+            b"fmt ", 16, 1, self.channels, self.sample_rate,
+            self.sample_rate * self._block_align, self._block_align, 16,
+            b"data", data_bytes,
+        ))
+        self._f.seek(0, 2)
+        self._frames_at_header = self.frames_written
+
+    def write(self, block: np.ndarray):
+        block = np.asarray(block, dtype="<i2")
+        self._f.write(block.tobytes())
+        self.frames_written += block.size // self.channels
+
+        if self.frames_written - self._frames_at_header >= self._header_every:
+            self._write_header()
+        self._f.flush()
+
+    def close(self):
+        if self._f.closed:
+            return
+        self._write_header()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ─── Audio Sources ──────────────────────────────────────────
+
+def sounddevice_source(
+    sample_rate: int,
+    channels: int,
+    block_ms: int = BLOCK_MS,
+    stop: threading.Event | None = None,
+) -> Iterator[np.ndarray]:
+    """
+    Blocks from the default microphone. The PortAudio callback only puts
+    blocks on a bounded queue; if the consumer falls more than MAX_QUEUED_S
+    behind, blocks are dropped (and counted) instead of growing memory.
+    """
+    import sounddevice as sd
+
+    block_frames = int(sample_rate * block_ms / 1000)
+    blocks: queue.Queue[np.ndarray] = queue.Queue(maxsize=max(1, int(MAX_QUEUED_S * 1000 / block_ms)))
+    dropped = 0
+
+    def callback(indata, frames, time_info, status):
+        nonlocal dropped
+        try:
+            blocks.put_nowait(indata.copy())
+        except queue.Full:
+            dropped += 1
+
+    with sd.InputStream(samplerate=sample_rate, channels=channels, dtype="int16",
+                        blocksize=block_frames, callback=callback):
+        while stop is None or not stop.is_set():
+            try:
+                yield blocks.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+    if dropped:
+        print(f"[audio] ⚠️ dropped {dropped} block(s) ({dropped * block_ms / 1000:.1f}s); disk too slow?")
+
+
+def synthetic_source(
+    seconds: float,
+    sample_rate: int = 16000,
+    channels: int = 1,
+    block_ms: int = BLOCK_MS,
+    freq_hz: float = 440.0,
+    burst_s: float = 2.0,
+    gap_s: float = 0.5,
+) -> Iterator[np.ndarray]:
+    """
+    burst_s of sine tone, gap_s of silence, repeated, in BLOCK_MS blocks: for
+    tests and demos without a microphone. The pauses look like the end of an
+    utterance to a pause-based STT (gap_s=0 gives one continuous tone).
+    """
+    block_frames = int(sample_rate * block_ms / 1000)
+    total = int(seconds * sample_rate)
+    period = int((burst_s + gap_s) * sample_rate)
+    burst = int(burst_s * sample_rate)
+    for start in range(0, total, block_frames):
+        i = np.arange(start, min(start + block_frames, total))
+        tone = 0.3 * 32767 * np.sin(2 * np.pi * freq_hz * i / sample_rate)
+        if gap_s > 0:
+            tone[i % period >= burst] = 0.0
+        yield np.repeat(tone.astype(np.int16)[:, None], channels, axis=1)
+
+
+# ─── Recorder ───────────────────────────────────────────────
+
+class WavRecorder:
+    """
+    Pulls blocks from `source` into a WavStreamWriter until `seconds` of
+    audio are written, the source ends, or stop() is called.
+    frames_written / duration_s can be read from another thread while it runs.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: int = 16000,
+        channels: int = 1,
+        source: Iterable[np.ndarray] | None = None,
+        on_block: Callable[["WavRecorder"], None] | None = None,
+    ):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.on_block = on_block
+        self._stop = threading.Event()
+        self._source = source
+        self._writer: WavStreamWriter | None = None
+
+    @property
+    def frames_written(self) -> int:
+        return self._writer.frames_written if self._writer else 0
+
+    @property
+    def duration_s(self) -> float:
+        return self.frames_written / self.sample_rate
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, seconds: float) -> str:
+        source = self._source
+        if source is None:
+            source = sounddevice_source(self.sample_rate, self.channels, stop=self._stop)
+
+        max_frames = int(seconds * self.sample_rate)
+        with WavStreamWriter(self.path, self.sample_rate, self.channels) as writer:
+            self._writer = writer
+            blocks = iter(source)
+            try:
+                for block in blocks:
+                    remaining = max_frames - writer.frames_written
+                    writer.write(block[:remaining])
+                    if self.on_block:
+                        self.on_block(self)
+                    if self._stop.is_set() or writer.frames_written >= max_frames:
+                        break
+            finally:
+                # Closes the microphone stream (generator cleanup) before the header is finalized.
+                close = getattr(blocks, "close", None)
+                if close:
+                    close()
+        return self.path
+
+
+def record_wav(
+    path: str,
+    seconds: int = (15*3600),
+    sample_rate: int = 16000,
+    channels: int = 1,
+    source: Iterable[np.ndarray] | None = None,
+    on_block: Callable[[WavRecorder], None] | None = None,
+):
+    """
+    Record to `path` for up to `seconds`. Ctrl+C / SIGTERM stop the recording
+    cleanly and keep everything captured so far.
+    """
+    recorder = WavRecorder(path, sample_rate, channels, source=source, on_block=on_block)
+
+    # Signal handlers can only be installed from the main thread.
+    previous = {}
+    if threading.current_thread() is threading.main_thread():
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            previous[sig] = signal.signal(sig, lambda signum, frame: recorder.stop())
+
+    print(f"[audio] Recording up to {seconds}s @ {sample_rate}Hz to {path} (Ctrl+C to stop) ...")
+    try:
+        recorder.run(seconds)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+    print(f"[audio] Saved {path} ({recorder.duration_s:.1f}s)")
+    return path
@@ -0,0 +1,19 @@
+"""
+Shared setup for the transcription tests: import paths and a scratch DB.
+
+shared.config reads DB_PATH once, at import time, so it is set here before
+any test module imports realtime_transcriber / db_manager.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+SCRATCH = Path(tempfile.mkdtemp(prefix="saleslens-transcription-tests-"))
+os.environ.setdefault("DB_PATH", str(SCRATCH / "test.db"))
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "sync_engine" / "src"))
+sys.path.insert(0, str(ROOT / "transcription"))
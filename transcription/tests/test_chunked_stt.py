@@ -0,0 +1,109 @@
+"""chunked_stt.py: memory-mapped WAV reads and chunked transcription with a fake STT client."""
+
+import io
+import struct
+import wave
+
+import numpy as np
+
+from chunked_stt import open_wav_memmap, transcribe_wav
+from recordings.audio import WavStreamWriter
+
+RATE = 16000
+
+
+def _tone(seconds: float, freq_hz: float) -> np.ndarray:
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.3 * 32767 * np.sin(2 * np.pi * freq_hz * t)).astype(np.int16)
+
+
+def test_memmap_reads_past_a_stale_header(tmp_path):
+    """Recorder killed mid-write: the header is up to HEADER_EVERY_S behind the data."""
+    path = tmp_path / "killed.wav"
+    writer = WavStreamWriter(str(path), RATE, 1, header_every_s=1.0)
+    audio = _tone(3.5, 440)
+    for start in range(0, len(audio), 1600):
+        writer.write(audio[start:start + 1600, None])
+    writer._f.close()           # no final header rewrite
+
+    with wave.open(str(path), "rb") as w:
+        assert w.getnframes() == 3 * RATE          # what the header claims
+
+    samples, sample_rate = open_wav_memmap(str(path))
+    assert sample_rate == RATE
+    assert samples.shape == (len(audio), 1)
+    np.testing.assert_array_equal(samples[:, 0], audio)
+
+
+def test_memmap_trusts_a_complete_header(tmp_path):
+    """A finished file may have chunks after the data; they aren't audio."""
+    path = tmp_path / "tagged.wav"
+    audio = _tone(1.0, 440)
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(audio.tobytes())
+    trailer = b"LIST" + struct.pack("<I", 12) + b"INFOISFT\0\0\0\0"
+    data = bytearray(path.read_bytes() + trailer)
+    data[4:8] = struct.pack("<I", len(data) - 8)
+    path.write_bytes(bytes(data))
+
+    samples, _ = open_wav_memmap(str(path))
+    assert samples.shape == (len(audio), 1)
+
+
+class BurstSTT:
+    """
+    Fake diarizing STT: one segment per burst of sound, labelled by pitch
+    (low = one speaker, high = the other). Like a real service, labels are
+    only per request: "speaker_0" is whoever speaks first in this chunk.
+    """
+
+    def __init__(self):
+        self.requests = 0
+
+    def transcribe(self, wav_bytes: bytes) -> list[dict]:
+        self.requests += 1
+        with wave.open(io.BytesIO(wav_bytes), "rb") as w:
+            rate = w.getframerate()
+            audio = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2").astype(np.float64)
+
+        frame = rate // 20
+        loud = np.square(audio[: len(audio) // frame * frame]).reshape(-1, frame).mean(axis=1) > 1e5
+        edges = np.flatnonzero(np.diff(np.concatenate([[0], loud.astype(int), [0]])))
+        segments, labels = [], {}
+        for start, end in zip(edges[::2], edges[1::2]):
+            burst = audio[start * frame:end * frame]
+            pitch = np.argmax(np.abs(np.fft.rfft(burst))) * rate / len(burst)
+            label = labels.setdefault(pitch > 500, f"speaker_{len(labels)}")
+            segments.append({"speaker": label, "text": f"{pitch:.0f} Hz",
+                             "start": start * frame / rate, "end": end * frame / rate})
+        return segments
+
+
+def test_chunks_are_stitched_without_duplicates(tmp_path):
+    # Alternating speakers: 1.5 s bursts at 300 / 800 Hz, 0.5 s pauses, 40 s.
+    truth, parts = [], []
+    for i in range(20):
+        high = i % 3 == 1          # uneven turns, so chunks start with either speaker
+        truth.append((i * 2000, i * 2000 + 1500, high))
+        parts += [_tone(1.5, 800 if high else 300), np.zeros(RATE // 2, dtype=np.int16)]
+    path = tmp_path / "call.wav"
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(np.concatenate(parts).tobytes())
+
+    stt = BurstSTT()
+    segments = transcribe_wav(str(path), stt, chunk_seconds=7, overlap_seconds=2,
+                              search_seconds=1, max_parallel=3)
+
+    assert stt.requests == 6
+    assert len(segments) == len(truth)
+    label_for = {}
+    for seg, (start_ms, end_ms, high) in zip(segments, truth):
+        assert abs(seg["start_ms"] - start_ms) <= 50 and abs(seg["end_ms"] - end_ms) <= 50
+        assert label_for.setdefault(high, seg["speaker_label"]) == seg["speaker_label"]
+    assert len(set(label_for.values())) == 2
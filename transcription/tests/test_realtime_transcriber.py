@@ -0,0 +1,101 @@
+"""realtime_transcriber.py against fake_realtime_server.py: reconnect, replay, and the final commit."""
+
+import asyncio
+import sqlite3
+
+import websockets
+
+import fake_realtime_server
+import realtime_transcriber
+from init_db import init_db
+from realtime_transcriber import RealtimeTranscriber
+from recordings.audio import synthetic_source
+from sync_engine.src import db_manager
+
+RATE = 16000
+
+
+def _transcribe(tmp_path, seconds: float, drop_after: float | None) -> tuple[RealtimeTranscriber, list]:
+    db_path = str(tmp_path / "rt.db")
+    init_db(db_path)
+    db_manager.insert_session(db_path, "rt", 0)
+
+    async def run():
+        async with websockets.serve(
+            lambda ws: fake_realtime_server.handle(ws, drop_after, RATE), "127.0.0.1", 0, close_timeout=0.2,
+        ) as server:
+            port = server.sockets[0].getsockname()[1]
+            transcriber = RealtimeTranscriber(
+                "rt", synthetic_source(seconds), url=f"ws://127.0.0.1:{port}", db_path=db_path,
+            )
+            await asyncio.wait_for(transcriber.run(), 60)
+            return transcriber
+
+    transcriber = asyncio.run(run())
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT timestamp_start_ms, timestamp_end_ms FROM transcript_segments ORDER BY timestamp_start_ms"
+        ).fetchall()
+    return transcriber, [((s - transcriber.start_ms) / 1000, (e - transcriber.start_ms) / 1000) for s, e in rows]
+
+
+def test_replays_uncommitted_audio_after_a_drop(tmp_path):
+    """Bursts of 2 s every 2.5 s; the server hangs up after 5 s of audio on every connection."""
+    transcriber, segments = _transcribe(tmp_path, 12, drop_after=5)
+
+    assert transcriber.reconnects >= 1
+    assert transcriber.buffer.uncommitted_frames == 0
+    assert len(segments) == 5
+    for (start, end), burst in zip(segments, (0.0, 2.5, 5.0, 7.5, 10.0)):
+        assert abs(start - burst) < 0.1
+        assert abs(end - (burst + 2.0)) < 0.1
+
+
+def test_final_commit_covers_speech_cut_off_at_the_end(tmp_path):
+    """The last burst is still sounding when audio ends: only the final commit can cover it."""
+    transcriber, segments = _transcribe(tmp_path, 10.3, drop_after=None)
+
+    assert transcriber.reconnects == 0
+    assert transcriber.buffer.uncommitted_frames == 0
+    assert len(segments) == 5
+    assert abs(segments[-1][0] - 10.0) < 0.1
+
+
+def test_gives_up_when_nothing_is_ever_committed(tmp_path):
+    transcriber, segments = _transcribe(tmp_path, 3, drop_after=0.1)
+
+    assert segments == []
+    assert transcriber.buffer.uncommitted_frames == 3 * RATE
+
+
+def _failing_insert(failures: int):
+    real = db_manager.insert_transcript_segments
+    calls = []
+
+    def insert(db_path, rows):
+        calls.append(len(rows))
+        if len(calls) <= failures:
+            raise sqlite3.OperationalError("database is locked")
+        return real(db_path, rows)
+
+    return insert
+
+
+def test_retries_a_failed_insert(tmp_path, monkeypatch):
+    monkeypatch.setattr(realtime_transcriber, "WRITE_RETRY_S", 0.01)
+    monkeypatch.setattr(db_manager, "insert_transcript_segments", _failing_insert(2))
+    transcriber, segments = _transcribe(tmp_path, 5, drop_after=None)
+
+    assert transcriber.write_error is None
+    assert transcriber.segments_written == len(segments) == 2
+
+
+def test_stops_with_the_text_kept_when_the_db_stays_unwritable(tmp_path, monkeypatch):
+    monkeypatch.setattr(realtime_transcriber, "WRITE_RETRY_S", 0.01)
+    monkeypatch.setattr(db_manager, "insert_transcript_segments", _failing_insert(10**6))
+    transcriber, segments = _transcribe(tmp_path, 5, drop_after=None)
+
+    assert isinstance(transcriber.write_error, sqlite3.OperationalError)
+    assert segments == []
+    assert transcriber.segments_written == 0
+    assert [row["text"] for row in transcriber.unwritten] == ["utterance at 0.00s", "utterance at 2.50s"]